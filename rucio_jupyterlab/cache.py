@@ -0,0 +1,186 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory LRU cache with per-entry TTL and stale-while-revalidate semantics.
+
+    The cache is bounded by the approximate JSON size of its values; the least recently
+    used entries are evicted once the bound is exceeded. An entry older than its TTL is
+    stale: it is still returned for up to another TTL while a single background refresh
+    replaces it. Values can optionally be written through to a persistent store, which is
+    consulted on memory misses.
+    """
+
+    _refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="rucio_cache_refresh")
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._refreshing = set()
+
+    def get_or_load(self, key, loader, ttl, store=None):
+        """
+        Returns the cached value for key, calling loader() on a miss.
+
+        :param key: A string identifying the value.
+        :param loader: Callable returning a JSON-serializable value.
+        :param ttl: Seconds during which the value is considered fresh.
+        :param store: Optional persistent store, see DatabaseCacheStore.
+        """
+        cached = self.lookup(key, ttl, store)
+        if cached is not None:
+            value, stale = cached
+            if stale:
+                self._schedule_refresh(key, loader, store)
+            return value
+
+        value = loader()
+        self.put(key, value, store)
+        return value
+
+    def lookup(self, key, ttl, store=None):
+        """
+        Returns a (value, stale) tuple for key, or None if nothing usable is cached.
+        Callers serving a stale value are expected to refresh it.
+        """
+        entry = self._get_entry(key)
+
+        if entry is None and store is not None:
+            persisted = store.get(key)
+            if persisted is not None:
+                value, stored_at = persisted
+                entry = (value, stored_at, len(json.dumps(value)))
+                self._put_entry(key, entry)
+
+        if entry is None:
+            return None
+
+        value, stored_at, _ = entry
+        age = time.time() - stored_at
+        if age > 2 * ttl:
+            return None
+
+        return value, age > ttl
+
+    def put(self, key, value, store=None, size=None):
+        """
+        Caches value under key.
+
+        :param size: Approximate size of the value in bytes, for values which are not
+                     JSON-serializable and therefore cannot be persisted to a store.
+        """
+        stored_at = time.time()
+        if size is not None:
+            self._put_entry(key, (value, stored_at, size))
+            return
+
+        serialized = json.dumps(value)
+        self._put_entry(key, (value, stored_at, len(serialized)))
+        if store is not None:
+            store.set(key, serialized, stored_at)
+
+    def invalidate(self, key, store=None):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self._total_bytes -= entry[2]
+
+        if store is not None:
+            store.delete(key)
+
+    def invalidate_matching(self, predicate):
+        """
+        Removes the in-memory entries whose key satisfies predicate. Persisted entries are left untouched.
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                self._total_bytes -= self._entries.pop(key)[2]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def _schedule_refresh(self, key, loader, store):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def _refresh():
+            try:
+                self.put(key, loader(), store)
+            except Exception as e:
+                logger.warning("Background refresh of cached response '%s' failed: %s", key, e)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        self._refresh_executor.submit(_refresh)
+
+    def _get_entry(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _put_entry(self, key, entry):
+        size = entry[2]
+        if size > self.max_bytes:
+            logger.debug("Not caching '%s' in memory, %d bytes exceed the cache size", key, size)
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._total_bytes -= previous[2]
+
+            self._entries[key] = entry
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._total_bytes -= evicted[2]
+
+
+class DatabaseCacheStore:
+    """
+    Persists cached responses of a Rucio instance to the SQLite cache database.
+    """
+
+    def __init__(self, namespace, db):
+        self.namespace = namespace
+        self.db = db
+
+    def get(self, key):
+        cached = self.db.get_response_cache(self.namespace, key)
+        if cached is None:
+            return None
+
+        value, stored_at = cached
+        return json.loads(value), stored_at
+
+    def set(self, key, value, stored_at):
+        self.db.set_response_cache(self.namespace, key, value, stored_at)
+
+    def delete(self, key):
+        self.db.delete_response_cache(self.namespace, key)
@@ -0,0 +1,176 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import struct
+import sys
+import zlib
+from array import array
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+ENCODING_PACKED = 'packed'
+ENCODING_ZLIB = 'zlib'
+ENCODING_ZSTD = 'zstd'
+
+_MAGIC = b'RJ'
+_FORMAT_VERSION = 1
+_COMPRESSION_NONE = 0
+_COMPRESSION_ZLIB = 1
+_COMPRESSION_ZSTD = 2
+_FLAG_REPLICAS = 1
+
+# Magic, format version, compression, flags
+_HEADER = struct.Struct('<2sBBB')
+# File count, then the byte length of each section: scopes, PFN prefixes, names, PFN suffixes, scope indexes, prefix indexes, sizes
+_SECTIONS = struct.Struct('<8I')
+_SEPARATOR = '\n'
+
+
+def encode_file_list(files, encoding=ENCODING_PACKED, with_replicas=True):
+    """
+    Packs the files attached to a DID into a compact binary blob.
+
+    Scopes and PFN prefixes (the PFN without the trailing file name) are dictionary-encoded,
+    names are stored once, and the per-file indexes and sizes are packed as integer arrays.
+    The blob is then optionally compressed with zlib or, when installed, zstandard.
+
+    Args:
+        files (list[tuple]): (did, size, pfn) tuples in listing order. The PFN may be None.
+        encoding (str): 'packed', 'zlib' or 'zstd'.
+        with_replicas (bool): Whether the PFNs are known, as opposed to a list of files only.
+
+    Returns:
+        bytes: The encoded blob.
+
+    Raises:
+        ValueError: If a DID or PFN contains a newline, which the format cannot represent.
+    """
+    scopes = dict()
+    prefixes = dict()
+    names = []
+    suffixes = []
+    scope_indexes = array('i')
+    prefix_indexes = array('i')
+    sizes = array('q')
+
+    for did, size, pfn in files:
+        scope, _, name = did.partition(':')
+        names.append(name)
+        scope_indexes.append(scopes.setdefault(scope, len(scopes)))
+        sizes.append(-1 if size is None else size)
+
+        if pfn is None:
+            prefix_indexes.append(-1)
+            suffixes.append('')
+        elif pfn.endswith(name) and name:
+            prefix_indexes.append(prefixes.setdefault(pfn[:-len(name)], len(prefixes)))
+            suffixes.append('')     # An empty suffix stands for the file name
+        else:
+            prefix_indexes.append(prefixes.setdefault('', len(prefixes)))
+            suffixes.append(pfn)
+
+    text_sections = [_join(scopes), _join(prefixes), _join(names), _join(suffixes)]
+    int_sections = [_to_little_endian(scope_indexes), _to_little_endian(prefix_indexes), _to_little_endian(sizes)]
+    sections = text_sections + int_sections
+    payload = b''.join([_SECTIONS.pack(len(names), *(len(section) for section in sections))] + sections)
+
+    compression, payload = _compress(payload, encoding)
+    flags = _FLAG_REPLICAS if with_replicas else 0
+    return _HEADER.pack(_MAGIC, _FORMAT_VERSION, compression, flags) + payload
+
+
+def decode_file_list(data):
+    """
+    Unpacks a blob created by encode_file_list().
+
+    Returns:
+        tuple: The list of (did, size, pfn) tuples, and whether the PFNs are known.
+    """
+    magic, version, compression, flags = _HEADER.unpack_from(data)
+    if magic != _MAGIC or version != _FORMAT_VERSION:
+        raise ValueError("Unsupported file list encoding")
+
+    payload = _decompress(memoryview(data)[_HEADER.size:], compression)
+    count, *lengths = _SECTIONS.unpack_from(payload)
+
+    sections = []
+    offset = _SECTIONS.size
+    for length in lengths:
+        sections.append(payload[offset:offset + length])
+        offset += length
+
+    # An empty dictionary decodes to [''], which no index refers to
+    scopes, prefixes = (_split(section) for section in sections[:2])
+    names, suffixes = (_split(section) if count else [] for section in sections[2:4])
+    scope_indexes, prefix_indexes, sizes = (_from_little_endian(typecode, section) for typecode, section in zip('iiq', sections[4:]))
+
+    files = [
+        (scopes[scope_index] + ':' + name,
+         None if size < 0 else size,
+         None if prefix_index < 0 else prefixes[prefix_index] + (suffix or name))
+        for name, suffix, scope_index, prefix_index, size in zip(names, suffixes, scope_indexes, prefix_indexes, sizes)
+    ]
+    return files, bool(flags & _FLAG_REPLICAS)
+
+
+def get_compression_encoding(encoding):
+    """
+    Returns the encoding actually used for the configured one, i.e. zlib if zstd is not installed.
+    """
+    if encoding == ENCODING_ZSTD and zstandard is None:
+        logger.warning("zstandard is not installed, compressing the cache with zlib instead")
+        return ENCODING_ZLIB
+    return encoding
+
+
+def _join(strings):
+    text = _SEPARATOR.join(strings)
+    if text.count(_SEPARATOR) > max(len(strings) - 1, 0):
+        raise ValueError("Newlines cannot be encoded")
+    return text.encode('utf-8')
+
+
+def _split(section):
+    return bytes(section).decode('utf-8').split(_SEPARATOR)
+
+
+def _to_little_endian(values):
+    if sys.byteorder != 'little':  # pragma: no cover
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _from_little_endian(typecode, section):
+    values = array(typecode)
+    values.frombytes(section)
+    if sys.byteorder != 'little':  # pragma: no cover
+        values.byteswap()
+    return values
+
+
+def _compress(payload, encoding):
+    if encoding == ENCODING_ZSTD and zstandard is not None:
+        return _COMPRESSION_ZSTD, zstandard.ZstdCompressor(level=3).compress(payload)
+    if encoding in (ENCODING_ZLIB, ENCODING_ZSTD):
+        return _COMPRESSION_ZLIB, zlib.compress(payload, 6)
+    return _COMPRESSION_NONE, payload
+
+
+def _decompress(payload, compression):
+    if compression == _COMPRESSION_ZSTD:
+        if zstandard is None:
+            raise ValueError("zstandard is required to read this cache entry")
+        return memoryview(zstandard.ZstdDecompressor().decompress(payload))
+    if compression == _COMPRESSION_ZLIB:
+        return memoryview(zlib.decompress(payload))
+    return payload
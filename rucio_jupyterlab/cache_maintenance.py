@@ -0,0 +1,107 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from jsonschema import validate
+from tornado.ioloop import IOLoop, PeriodicCallback
+from rucio_jupyterlab.cache_codec import get_compression_encoding
+from rucio_jupyterlab.config import schema
+from rucio_jupyterlab.config.config import RucioConfig
+from rucio_jupyterlab.db import DatabaseInstance, get_db
+from rucio_jupyterlab.metrics import CACHE_SIZE, CACHE_EVICTIONS
+
+logger = logging.getLogger(__name__)
+
+# Cached Rucio responses are only served for twice their TTL, older ones are never read again
+RESPONSE_CACHE_MAX_AGE = 86400  # seconds
+# Eviction brings the size down to this fraction of the limit, so that it is not needed again on the next run
+EVICTION_TARGET = 0.9
+# Upper bound on eviction rounds per run, freed space is only estimated from the fraction of rows deleted
+MAX_EVICTION_ROUNDS = 5
+
+
+class CacheMaintenance:
+    """
+    Keeps the cache database bounded: deletes expired rows, evicts the least recently used
+    entries while the database exceeds max_size_bytes, and returns free pages to the filesystem.
+    Upload jobs are never touched.
+    """
+
+    _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rucio_cache_maintenance")
+
+    def __init__(self, max_size_bytes, interval):
+        """
+        :param max_size_bytes: Maximum size of the cache database, no limit if 0 or None.
+        :param interval: Seconds between two maintenance runs.
+        """
+        self.max_size_bytes = max_size_bytes
+        self.interval = interval
+        self._periodic_callback = None
+
+    def start(self):
+        self._periodic_callback = PeriodicCallback(self._run_in_executor, self.interval * 1000)
+        self._periodic_callback.start()
+        IOLoop.current().spawn_callback(self._run_in_executor)
+
+    def stop(self):
+        if self._periodic_callback:
+            self._periodic_callback.stop()
+
+    async def _run_in_executor(self):
+        try:
+            await IOLoop.current().run_in_executor(CacheMaintenance._executor, self.run)
+        except Exception as e:
+            logger.warning("Cache maintenance failed: %s", e)
+
+    def run(self):
+        db = get_db()  # pylint: disable=invalid-name
+        db.flush_access_times()
+
+        expired = db.delete_expired_cache(RESPONSE_CACHE_MAX_AGE)
+        for table, count in expired.items():
+            CACHE_EVICTIONS.labels(table=table, reason='expired').inc(count)
+
+        size = db.get_cache_size()
+        rounds = 0
+        while self.max_size_bytes and size > self.max_size_bytes and rounds < MAX_EVICTION_ROUNDS:
+            target = self.max_size_bytes * EVICTION_TARGET
+            evicted = db.evict_least_recently_used_cache(fraction=(size - target) / size)
+            for table, count in evicted.items():
+                CACHE_EVICTIONS.labels(table=table, reason='lru').inc(count)
+            if not any(evicted.values()):
+                break
+            size = db.get_cache_size()
+            rounds += 1
+
+        db.vacuum()
+        CACHE_SIZE.set(size)
+        logger.debug("Cache maintenance done: %d expired rows deleted, %d LRU rounds, %d bytes used", sum(expired.values()), rounds, size)
+
+
+def start_cache_maintenance(web_app):  # pragma: no cover
+    """
+    Starts the periodic cache maintenance with the limits from the server configuration.
+    """
+    # Read the traits directly, Config would fetch the remote instance configurations again
+    rucio_config = RucioConfig(config=web_app.settings['config'])
+    maintenance = CacheMaintenance(max_size_bytes=rucio_config.cache_max_size_mb * 1024 * 1024,
+                                   interval=rucio_config.cache_maintenance_interval)
+    maintenance.start()
+    return maintenance
+
+
+def configure_cache(web_app):  # pragma: no cover
+    """
+    Applies the server-wide cache TTLs and enables the compact cache format if configured.
+    Entries already stored keep their format until rewritten.
+    """
+    rucio_config = RucioConfig(config=web_app.settings['config'])
+    validate(rucio_config.cache_ttl, schema=schema.cache_ttl)
+    DatabaseInstance.cache_ttl = rucio_config.cache_ttl
+
+    encoding = rucio_config.cache_compact_encoding
+    DatabaseInstance.compact_encoding = get_compression_encoding(encoding) if encoding else None
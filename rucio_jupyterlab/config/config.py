@@ -10,7 +10,7 @@
 import time
 import requests
 from jsonschema import validate
-from traitlets import List, Dict, Unicode, Enum
+from traitlets import List, Dict, Unicode, Enum, Integer
 from traitlets.config import Configurable
 from rucio_jupyterlab.rucio.utils import get_oidc_token
 from . import schema
@@ -21,6 +21,10 @@ class RucioConfig(Configurable):  # pragma: no cover
     default_instance = Unicode(config=True, default_value=None, allow_none=True)
     default_auth_type = Enum(["userpass", "x509", "x509_proxy", "oidc", None], default_value=None, config=True)
     log_level = Enum(["debug", "info", "warning", "error", "critical"], default_value="warning", config=True)
+    cache_max_size_mb = Integer(default_value=512, config=True)
+    cache_maintenance_interval = Integer(default_value=600, config=True)
+    cache_compact_encoding = Enum(["packed", "zlib", "zstd", None], default_value=None, allow_none=True, config=True)
+    cache_ttl = Dict(config=True)
 
 
 class Config:
@@ -7,6 +7,25 @@
 # Authors:
 # - Muhammad Aditya Hilmy, <mhilmy@hey.com>, 2020
 
+cache_ttl_window = {
+    "type": "object",
+    "properties": {
+        "fresh": {"type": "integer", "minimum": 1},
+        "max_stale": {"type": "integer", "minimum": 0}
+    },
+    "additionalProperties": False
+}
+
+cache_ttl = {
+    "type": "object",
+    "properties": {
+        "attached_files": cache_ttl_window,
+        "file_replicas": cache_ttl_window,
+        "replication_rules": cache_ttl_window
+    },
+    "additionalProperties": False
+}
+
 instance_properties = {
     "name": {
         "type": "string"
@@ -84,6 +103,38 @@ instance_properties = {
     "oidc_file_name": {
         "type": "string"
     },
+    "http_pool_size": {
+        "type": "integer",
+        "minimum": 1
+    },
+    "http_pool_idle_timeout": {
+        "type": "integer",
+        "minimum": 1
+    },
+    "response_cache_ttl": {
+        "type": "object",
+        "properties": {
+            "scopes": {"type": "integer", "minimum": 0},
+            "rses": {"type": "integer", "minimum": 0},
+            "rules": {"type": "integer", "minimum": 0},
+            "metadata": {"type": "integer", "minimum": 0}
+        },
+        "additionalProperties": False
+    },
+    "response_cache_persist": {
+        "type": "boolean",
+        "default": False
+    },
+    "auth_token_refresh_fraction": {
+        "type": "number",
+        "exclusiveMinimum": 0,
+        "exclusiveMaximum": 1
+    },
+    "cache_ttl": cache_ttl,
+    "rule_watcher_interval": {
+        "type": "integer",
+        "minimum": 0
+    },
 }
 
 instance = {
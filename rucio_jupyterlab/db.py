@@ -11,13 +11,84 @@
 import os
 import time
 import json
-from peewee import SqliteDatabase, Model, TextField, IntegerField, DateTimeField, CompositeKey, BooleanField
-from .entity import AttachedFile
+import logging
+import math
+import threading
+from urllib.parse import quote
+from peewee import SqliteDatabase, Model, fn, TextField, IntegerField, FloatField, DateTimeField, CompositeKey, BooleanField, BlobField
+from .cache_codec import encode_file_list, decode_file_list
+from .entity import AttachedFile, PfnFileReplica
+
+logger = logging.getLogger(__name__)
+
+# Lookups of up to this many keys bind them in an IN clause, larger ones join a temporary table
+BULK_LOOKUP_MAX_PARAMS = 500
+
+# Tables accepted by DatabaseInstance.invalidate_cache(). Upload jobs are not a cache and only deleted when asked for.
+CACHE_TABLES = ('attached_files', 'file_replicas', 'responses', 'replication_rules')
+UPLOAD_JOBS_TABLE = 'upload_jobs'
+
+# Seconds during which cached entries are fresh, then during which they are still served while being
+# revalidated, per table. Overridable globally with RucioConfig.cache_ttl and per instance with `cache_ttl`.
+DEFAULT_CACHE_TTL = {
+    'attached_files': {'fresh': 3600, 'max_stale': 3600},
+    'file_replicas': {'fresh': 3600, 'max_stale': 3600},
+    'replication_rules': {'fresh': 30, 'max_stale': 600}
+}
+
+# The cache database is read by the API executor threads and written concurrently by the replica
+# fetcher pool and the upload subprocesses. WAL lets readers proceed while a writer commits,
+# and busy_timeout makes writers wait for the lock instead of failing with "database is locked".
+DEFAULT_PRAGMAS = {
+    'auto_vacuum': 'incremental',   # Lets the maintenance task return freed pages without a full VACUUM
+    'journal_mode': 'wal',
+    'synchronous': 'normal',        # Durable with WAL except on power loss, which a cache can afford
+    'cache_size': -16 * 1024,       # Negative values are in KiB, i.e. 16 MiB per connection
+    'mmap_size': 64 * 1024 * 1024,
+    'busy_timeout': 10000           # ms
+}
+
+
+def get_pragmas():
+    """
+    Returns the pragmas applied to every connection to the cache database.
+
+    Each default can be overridden through the RUCIO_CACHE_DB_PRAGMAS environment variable
+    as a comma-separated list, e.g. `journal_mode=delete,mmap_size=0` for home directories
+    on network filesystems, which do not support the shared memory WAL relies on.
+    """
+    pragmas = dict(DEFAULT_PRAGMAS)
+    overrides = os.getenv('RUCIO_CACHE_DB_PRAGMAS', '')
+    for override in filter(None, (o.strip() for o in overrides.split(','))):
+        key, sep, value = override.partition('=')
+        if not sep:
+            logger.warning("Ignoring malformed SQLite pragma override: %s", override)
+            continue
+        pragmas[key.strip()] = value.strip()
+    return pragmas
 
 
 def prepare_db(dir_path):
     path = os.path.join(dir_path, 'cache.db')
-    return SqliteDatabase(path)
+    pragmas = get_pragmas()
+    # peewee opens one connection per thread on first use and keeps it for the thread's lifetime,
+    # the timeout (in seconds) is passed to sqlite3.connect and matches busy_timeout
+    timeout = int(pragmas.get('busy_timeout', DEFAULT_PRAGMAS['busy_timeout'])) / 1000
+    return SqliteDatabase(path, pragmas=list(pragmas.items()), timeout=timeout)
+
+
+def close_db_connection():
+    """
+    Closes the connection of the calling thread, e.g. before a short-lived worker thread exits.
+    """
+    if not db.is_closed():
+        db.close()
+
+
+def _reset_db_connection_after_fork():
+    # A forked child inherits the parent's per-thread connection state, but an SQLite
+    # connection must not be used across a fork. Drop it so the child opens its own.
+    db._state.reset()
 
 
 def prepare_directory(dir_path):
@@ -36,14 +107,122 @@ else:
 
 prepare_directory(dir_path)
 db = prepare_db(dir_path)
+os.register_at_fork(after_in_child=_reset_db_connection_after_fork)
+
+
+_database_instance = None
+_database_instance_lock = threading.Lock()
 
 
 def get_db():
-    db.create_tables([UserConfig, RucioAuthCredentials, AttachedFilesListCache, FileReplicasCache, FileUploadJob])
-    return DatabaseInstance()
+    """
+    Returns the database instance, migrating the schema on the first call of the process.
+    """
+    global _database_instance   # pylint: disable=global-statement
+    if _database_instance is None:
+        with _database_instance_lock:
+            if _database_instance is None:
+                migrate_schema()
+                _database_instance = DatabaseInstance()
+    return _database_instance
+
+
+def get_cache_ttl(instance_config, table):
+    """
+    Returns the {'fresh': ..., 'max_stale': ...} windows in seconds of a cache table for an instance.
+    """
+    instance_ttl = (instance_config or {}).get('cache_ttl', {}).get(table, {})
+    return {**DEFAULT_CACHE_TTL[table], **DatabaseInstance.cache_ttl.get(table, {}), **instance_ttl}
+
+
+def _get_cache_expiry(ttl, table, current_time):
+    # Rows are kept until the end of the stale window, readers tell stale rows apart by subtracting max_stale
+    ttl = ttl or DEFAULT_CACHE_TTL[table]
+    return int(current_time) + ttl['fresh'] + ttl['max_stale']
+
+
+def migrate_schema():
+    """
+    Applies the migrations newer than the version recorded in the SchemaVersion table.
+
+    Each migration runs in its own IMMEDIATE transaction, which holds the write lock while the
+    version is checked, so that processes starting concurrently do not apply a migration twice.
+    """
+    db.create_tables([SchemaVersion])
+    for version, migration in enumerate(SCHEMA_MIGRATIONS, start=1):
+        with db.atomic(lock_type='IMMEDIATE'):
+            current_version = SchemaVersion.select(fn.MAX(SchemaVersion.version)).scalar() or 0
+            if version <= current_version:
+                continue
+
+            logger.info("Migrating the cache database to schema version %d", version)
+            migration()
+            SchemaVersion.create(version=version, applied_at=time.time())
+
+
+def _create_tables():
+    # Tables are created as the models currently define them, later migrations must be idempotent on top of it
+    db.create_tables([UserConfig, RucioAuthCredentials, AttachedFilesCache, AttachedFileCache, FileReplicasCache, FileUploadJob, RucioResponseCache])
+
+
+def _create_expiry_indexes():
+    for model in [AttachedFilesCache, FileReplicasCache, RucioResponseCache]:
+        model._schema.create_indexes(safe=True)   # pylint: disable=protected-access
+
+
+def _add_last_accessed_columns():
+    for model in [AttachedFilesCache, FileReplicasCache, RucioResponseCache]:
+        table_name = model._meta.table_name
+        if 'last_accessed' not in [column.name for column in db.get_columns(table_name)]:
+            db.execute_sql(f'ALTER TABLE {table_name} ADD COLUMN last_accessed REAL')
+        model._schema.create_indexes(safe=True)   # pylint: disable=protected-access
+
+
+def _add_attached_files_version_column():
+    if 'version' not in [column.name for column in db.get_columns('attachedfilescache')]:
+        db.execute_sql('ALTER TABLE attachedfilescache ADD COLUMN version INTEGER NOT NULL DEFAULT 0')
+
+
+def _add_attached_files_packed_column():
+    if 'packed' not in [column.name for column in db.get_columns('attachedfilescache')]:
+        db.execute_sql('ALTER TABLE attachedfilescache ADD COLUMN packed BLOB')
+
+
+def _create_replication_rules_table():
+    db.create_tables([ReplicationRuleCache])
+
+
+def migrate_attached_files_list_cache():
+    """
+    Moves the attached file lists stored as one JSON blob per DID into one row per file,
+    then drops the old table. Expired lists are not carried over.
+    """
+    if 'attachedfileslistcache' not in db.get_tables():
+        return
+
+    current_time = int(time.time())
+    with db.atomic():
+        cursor = db.execute_sql('SELECT namespace, did, file_dids, expiry FROM attachedfileslistcache WHERE expiry > ?', (current_time,))
+        for namespace, parent_did, file_dids, expiry in cursor.fetchall():
+            attached_files = [AttachedFile(did=f.get('did'), size=f.get('size')) for f in json.loads(file_dids)]
+            DatabaseInstance()._store_attached_files(namespace, parent_did, attached_files, int(expiry))
+        db.execute_sql('DROP TABLE attachedfileslistcache')
+    logger.info("Migrated the attached files cache to one row per file")
 
 
 class DatabaseInstance:
+    # Cache keys read since the last maintenance run. Their last_accessed column is updated in one
+    # batch by flush_access_times() instead of issuing an UPDATE on every cache hit.
+    _accessed = dict()
+    _accessed_lock = threading.Lock()
+
+    # When set to 'packed', 'zlib' or 'zstd', file lists and their replicas are written as one compact
+    # blob per DID (see cache_codec) instead of one row per file. Both formats are always readable.
+    compact_encoding = None
+
+    # Server-wide overrides of DEFAULT_CACHE_TTL, see get_cache_ttl()
+    cache_ttl = dict()
+
     def put_config(self, key, value):
         UserConfig.replace(key=key, value=value).execute()
 
@@ -77,77 +256,338 @@ class DatabaseInstance:
         params_str = json.dumps(params)
         RucioAuthCredentials.replace(namespace=namespace, auth_type=auth_type, params=params_str).execute()
 
-    def get_attached_files(self, namespace, did):
+    def get_attached_files(self, namespace, did, offset=0, limit=None):
+        """
+        Returns the cached files attached to a DID, in the order they were listed by Rucio,
+        or None if the list is not cached or expired.
+
+        Args:
+            namespace (str): Cache namespace.
+            did (str): The parent DID.
+            offset (int): Number of files to skip.
+            limit (int): Maximum number of files to return, all remaining files if None.
+        """
+        header = self._get_attached_files_header(namespace, did)
+        if header is None:
+            return None
+
+        self._record_access(AttachedFilesCache, [(namespace, did)])
+        packed, = header
+        if packed is not None:
+            files, _ = decode_file_list(packed)
+            end = None if limit is None else (offset or 0) + limit
+            return [AttachedFile(did=file_did, size=size) for file_did, size, _ in files[offset or 0:end]]
+
+        query = (AttachedFileCache
+                 .select(AttachedFileCache.did, AttachedFileCache.size)
+                 .where((AttachedFileCache.namespace == namespace) & (AttachedFileCache.parent_did == did))
+                 .order_by(AttachedFileCache.position)
+                 .offset(offset or None)
+                 .limit(limit))
+
+        # Fetch plain tuples from the cursor, peewee's row wrappers would dominate for large datasets
+        return [AttachedFile(did=file_did, size=size) for file_did, size in db.execute(query).fetchall()]
+
+    def summarize_attached_file_replicas(self, namespace, did):
+        """
+        Aggregates the cached replicas of the files attached to a DID without materializing them.
+
+        Returns:
+            tuple: The number of files, their total size, the number of files with a PFN and the
+                number of files whose replica is not cached or expired, or None if the list of
+                files is not cached or expired.
+        """
+        header = self._get_attached_files_header(namespace, did)
+        if header is None:
+            return None
+
+        self._record_access(AttachedFilesCache, [(namespace, did)])
+        packed, = header
+        if packed is not None:
+            files, with_replicas = decode_file_list(packed)
+            total_bytes = sum(size or 0 for _, size, _ in files)
+            if with_replicas:
+                return len(files), total_bytes, sum(1 for _, _, pfn in files if pfn is not None), 0
+
+            found, missing = self.lookup_file_replicas(namespace, [file_did for file_did, _, _ in files])
+            return len(files), total_bytes, sum(1 for replica in found.values() if replica.pfn is not None), len(missing)
+
         current_time = int(time.time())
-        db_attached_files = AttachedFilesListCache.get_or_none(
-            (AttachedFilesListCache.namespace == namespace) & (AttachedFilesListCache.did == did) & (AttachedFilesListCache.expiry > current_time))
-        if db_attached_files:
-            json_attached_files = json.loads(db_attached_files.file_dids)
+        total, total_bytes, available, cached = db.execute_sql(
+            'SELECT COUNT(*), TOTAL(a.size), COUNT(r.pfn), COUNT(r.did) FROM attachedfilecache a '
+            'LEFT JOIN filereplicascache r ON r.namespace = a.namespace AND r.did = a.did AND r.expiry > ? '
+            'WHERE a.namespace = ? AND a.parent_did = ?',
+            (current_time, namespace, did)).fetchone()
+        return total, int(total_bytes), available, total - cached
+
+    def get_packed_file_replicas(self, namespace, did):
+        """
+        Returns the cached replicas of the files attached to a DID if they are stored in the compact
+        format, or None if the DID is not cached, expired, or stored as one row per file.
+        """
+        header = self._get_attached_files_header(namespace, did)
+        if header is None or header[0] is None:
+            return None
 
-            attached_files = []
-            for json_attached_file in json_attached_files:
-                attached_file = AttachedFile(did=json_attached_file.get('did'), size=json_attached_file.get('size'))
-                attached_files.append(attached_file)
+        files, with_replicas = decode_file_list(header[0])
+        if not with_replicas:
+            return None
 
-            return attached_files
+        self._record_access(AttachedFilesCache, [(namespace, did)])
+        return [PfnFileReplica(did=file_did, pfn=pfn, size=size) for file_did, size, pfn in files]
 
-        return None
+    def is_attached_files_stale(self, namespace, did, max_stale):
+        """
+        Returns whether the cached file list of a DID is past its fresh window and should be revalidated.
+        """
+        expiry = AttachedFilesCache.select(AttachedFilesCache.expiry).where(
+            (AttachedFilesCache.namespace == namespace) & (AttachedFilesCache.did == did)).scalar()
+        return expiry is None or expiry - max_stale <= time.time()
+
+    def set_attached_files(self, namespace, parent_did, attached_files, ttl=None):
+        cache_expires = _get_cache_expiry(ttl, 'attached_files', time.time())
+        with db.atomic():
+            self._set_attached_files(namespace, parent_did, attached_files, cache_expires)
+
+    def set_attached_files_bulk(self, namespace, attached_files, ttl=None):
+        """
+        Stores the file lists of many DIDs in a single transaction, e.g. file DIDs attached to themselves.
+
+        Args:
+            namespace (str): Cache namespace.
+            attached_files (dict): The attached files (list[AttachedFile]) of each parent DID.
+            ttl (dict): TTL windows of the file lists, see get_cache_ttl().
+        """
+        cache_expires = _get_cache_expiry(ttl, 'attached_files', time.time())
+        with db.atomic():
+            for parent_did, files in attached_files.items():
+                self._set_attached_files(namespace, parent_did, files, cache_expires)
+
+    def get_attached_files_version(self, namespace, did):
+        """
+        Returns the version of the cached file list and replicas of a DID, incremented whenever
+        a file is added, removed or changes replica, but not when an unchanged list is stored again.
+        Returns None if the DID is not cached.
+        """
+        attached_files = AttachedFilesCache.get_or_none((AttachedFilesCache.namespace == namespace) & (AttachedFilesCache.did == did))
+        return attached_files.version if attached_files else None
+
+    def increment_attached_files_version(self, namespace, did):
+        """
+        Increments the version of the cached file list of a DID, e.g. after some of its replicas were stored.
+        """
+        (AttachedFilesCache
+         .update(version=AttachedFilesCache.version + 1)
+         .where((AttachedFilesCache.namespace == namespace) & (AttachedFilesCache.did == did))
+         .execute())
+
+    def sync_attached_file_replicas(self, namespace, parent_did, file_replicas, ttl=None, replica_ttl=None):
+        """
+        Stores the files attached to a DID with their replicas, writing only what changed since
+        the cached state. The expiry of unchanged replicas is extended with one set-based UPDATE.
+
+        Args:
+            namespace (str): Cache namespace.
+            parent_did (str): The parent DID.
+            file_replicas (list[PfnFileReplica]): The attached files, in listing order.
+            ttl (dict): TTL windows of the file list, see get_cache_ttl().
+            replica_ttl (dict): TTL windows of the replicas.
+
+        Returns:
+            dict: Number of 'added', 'removed' and 'changed' files, and the resulting 'version'.
+        """
+        current_time = time.time()
+        cache_expires = _get_cache_expiry(ttl, 'attached_files', current_time)
+        replica_expires = _get_cache_expiry(replica_ttl, 'file_replicas', current_time)
+        replica_fresh = (replica_ttl or DEFAULT_CACHE_TTL['file_replicas'])['fresh']
+        attached_fresh = (ttl or DEFAULT_CACHE_TTL['attached_files'])['fresh']
+
+        with db.atomic():
+            header = AttachedFilesCache.get_or_none((AttachedFilesCache.namespace == namespace) & (AttachedFilesCache.did == parent_did))
+            packed_before = header.packed if header else None
+            if packed_before is None:
+                cached = {
+                    file_did: (attached_size, pfn, replica_size)
+                    for file_did, attached_size, pfn, replica_size in db.execute_sql(
+                        'SELECT a.did, a.size, r.pfn, r.size FROM attachedfilecache a '
+                        'LEFT JOIN filereplicascache r ON r.namespace = a.namespace AND r.did = a.did '
+                        'WHERE a.namespace = ? AND a.parent_did = ?', (namespace, parent_did)).fetchall()
+                }
+            elif self.compact_encoding:
+                files, with_replicas = decode_file_list(packed_before)
+                cached = {file_did: (size, pfn, size if with_replicas else None) for file_did, size, pfn in files}
+            else:
+                cached = dict()     # Compact format turned off, store every file as rows again
+
+            fetched_dids = set()
+            added = []
+            changed = []
+            for replica in file_replicas:
+                fetched_dids.add(replica.did)
+                cached_file = cached.get(replica.did)
+                if cached_file is None:
+                    added.append(replica)
+                elif cached_file != (replica.size, replica.pfn, replica.size):
+                    changed.append(replica)
+            removed = len(cached.keys() - fetched_dids)
+
+            version = header.version if header else 0
+            if added or changed or removed or header is None:
+                version += 1
+
+            packed = None
+            if added or changed or removed or packed_before is None:
+                packed = self._pack([(replica.did, replica.size, replica.pfn) for replica in file_replicas], with_replicas=True)
+
+            if packed is not None:
+                attached_files = [AttachedFile(did=replica.did, size=replica.size) for replica in file_replicas]
+                self._store_attached_files(namespace, parent_did, attached_files, cache_expires, packed=packed)
+            elif packed_before is None or not self.compact_encoding:
+                db.cursor().executemany(
+                    'INSERT OR REPLACE INTO filereplicascache (namespace, did, pfn, size, expiry, last_accessed) VALUES (?, ?, ?, ?, ?, ?)',
+                    [(namespace, replica.did, replica.pfn, replica.size, replica_expires, current_time) for replica in added + changed])
+
+                if added or removed:
+                    attached_files = [AttachedFile(did=replica.did, size=replica.size) for replica in file_replicas]
+                    self._store_attached_files(namespace, parent_did, attached_files, cache_expires)
+                elif changed:
+                    db.cursor().executemany('UPDATE attachedfilecache SET size = ? WHERE namespace = ? AND parent_did = ? AND did = ?',
+                                            [(replica.size, namespace, parent_did, replica.did) for replica in changed])
+
+            # Like the replicas below, the expiry of an unchanged list is only extended past half of its fresh window
+            if packed is not None or header is None or version != header.version or header.expiry < cache_expires - attached_fresh // 2:
+                (AttachedFilesCache
+                 .insert(namespace=namespace, did=parent_did, expiry=cache_expires, last_accessed=current_time, version=version)
+                 .on_conflict(conflict_target=[AttachedFilesCache.namespace, AttachedFilesCache.did],
+                              update={AttachedFilesCache.expiry: cache_expires, AttachedFilesCache.version: version})
+                 .execute())
+
+            # Only extend replicas past half of their fresh window, so that frequent polls of an unchanged dataset write nothing
+            db.execute_sql(
+                'UPDATE filereplicascache SET expiry = ? WHERE namespace = ? AND expiry < ? '
+                'AND did IN (SELECT did FROM attachedfilecache WHERE namespace = ? AND parent_did = ?)',
+                (replica_expires, namespace, replica_expires - replica_fresh // 2, namespace, parent_did))
+
+        return {'added': len(added), 'removed': removed, 'changed': len(changed), 'version': version}
+
+    def _get_attached_files_header(self, namespace, did):
+        # Returns a (packed,) tuple for an unexpired file list, None otherwise
+        current_time = int(time.time())
+        return db.execute_sql('SELECT packed FROM attachedfilescache WHERE namespace = ? AND did = ? AND expiry > ?',
+                              (namespace, did, current_time)).fetchone()
+
+    def _pack(self, files, with_replicas):
+        if not self.compact_encoding:
+            return None
 
-    def set_attached_files(self, namespace, parent_did, attached_files):
-        cache_expires = int(time.time()) + (3600)  # an hour TODO change?
-        attached_files_dict = [x.__dict__ for x in attached_files]
-        file_dids_json = json.dumps(attached_files_dict)
-        AttachedFilesListCache.replace(namespace=namespace, did=parent_did,
-                                       file_dids=file_dids_json, expiry=cache_expires).execute()
+        try:
+            return encode_file_list(files, self.compact_encoding, with_replicas)
+        except ValueError as e:
+            logger.warning("Storing file list as rows, it cannot be encoded: %s", e)
+            return None
+
+    def _set_attached_files(self, namespace, parent_did, attached_files, expiry):
+        """
+        Stores the file list of a DID without replicas. The version is only incremented if the list differs
+        from the cached one, an unchanged list only gets its expiry extended.
+        """
+        header = AttachedFilesCache.get_or_none((AttachedFilesCache.namespace == namespace) & (AttachedFilesCache.did == parent_did))
+        files = [(attached_file.did, attached_file.size) for attached_file in attached_files]
+
+        if header is not None:
+            if header.packed is None:
+                cached_files = db.execute_sql('SELECT did, size FROM attachedfilecache WHERE namespace = ? AND parent_did = ? ORDER BY position',
+                                              (namespace, parent_did)).fetchall()
+            else:
+                cached_files, with_replicas = decode_file_list(header.packed)
+                # Storing the list again drops the replicas packed with it
+                cached_files = None if with_replicas else [(file_did, size) for file_did, size, _ in cached_files]
+
+            if cached_files is not None and [tuple(row) for row in cached_files] == files:
+                AttachedFilesCache.update(expiry=expiry).where(
+                    (AttachedFilesCache.namespace == namespace) & (AttachedFilesCache.did == parent_did)).execute()
+                return
+
+        packed = self._pack([(file_did, size, None) for file_did, size in files], with_replicas=False)
+        self._store_attached_files(namespace, parent_did, attached_files, expiry, packed=packed,
+                                   version=header.version + 1 if header is not None else 1)
+
+    def _store_attached_files(self, namespace, parent_did, attached_files, expiry, packed=None, version=None):
+        AttachedFileCache.delete().where((AttachedFileCache.namespace == namespace) & (AttachedFileCache.parent_did == parent_did)).execute()
+
+        if packed is None:
+            # executemany skips building one peewee query per chunk, which is several times slower for large datasets
+            rows = [(namespace, parent_did, attached_file.did, attached_file.size, position)
+                    for position, attached_file in enumerate(attached_files)]
+            db.cursor().executemany(
+                'INSERT OR REPLACE INTO attachedfilecache (namespace, parent_did, did, size, position) VALUES (?, ?, ?, ?, ?)', rows)
+
+        # The version is left to the caller, which knows whether the list changed
+        update = {AttachedFilesCache.expiry: expiry, AttachedFilesCache.packed: packed}
+        if version is not None:
+            update[AttachedFilesCache.version] = version
+        (AttachedFilesCache
+         .insert(namespace=namespace, did=parent_did, expiry=expiry, last_accessed=time.time(), packed=packed, version=version or 0)
+         .on_conflict(conflict_target=[AttachedFilesCache.namespace, AttachedFilesCache.did], update=update)
+         .execute())
 
     def get_file_replica(self, namespace, file_did):
         current_time = int(time.time())
         replica_cache = FileReplicasCache.get_or_none((FileReplicasCache.namespace == namespace) & (
             FileReplicasCache.did == file_did) & (FileReplicasCache.expiry > current_time))
 
+        if replica_cache:
+            self._record_access(FileReplicasCache, [(namespace, file_did)])
         return replica_cache
 
-    def get_file_replicas_bulk(self, namespace, file_dids):
+    def lookup_file_replicas(self, namespace, file_dids):
         """
-        Retrieve multiple file replicas in a single query to avoid N+1 problem.
+        Retrieves the unexpired cached replicas of many files.
+
+        Small key sets are bound in an IN clause. Larger ones are loaded into a temporary
+        table and joined, which stays below SQLite's bound variable limit and lets SQLite
+        use the primary key index instead of scanning a huge IN list.
 
         Args:
             namespace (str): Cache namespace.
             file_dids (list): List of DIDs to fetch.
 
         Returns:
-            dict: Mapping of DID to replica object, or empty dict if any are missing/expired.
+            tuple: A dict mapping each cached DID to a PfnFileReplica, and the list of
+                   DIDs which are missing or expired, in input order.
         """
         if not file_dids:
-            return {}
+            return {}, []
 
         current_time = int(time.time())
-        
-        # Fetch all replicas in one query
-        replicas = (FileReplicasCache
-                   .select()
-                   .where(
-                       (FileReplicasCache.namespace == namespace) &
-                       (FileReplicasCache.did.in_(file_dids)) &
-                       (FileReplicasCache.expiry > current_time)
-                   ))
-        
-        # Build a dict for O(1) lookups
-        replica_dict = {r.did: r for r in replicas}
-        
-        # Check if we got all of them
-        if len(replica_dict) != len(file_dids):
-            # Some are missing or expired - return None to indicate incomplete cache
-            return None
-        
-        return replica_dict
-
-    def set_file_replica(self, namespace, file_did, pfn, size):
-        cache_expires = int(time.time()) + (3600)  # an hour TODO change?
+        if len(file_dids) <= BULK_LOOKUP_MAX_PARAMS:
+            placeholders = ', '.join('?' * len(file_dids))
+            rows = db.execute_sql(
+                f'SELECT did, pfn, size FROM filereplicascache WHERE namespace = ? AND expiry > ? AND did IN ({placeholders})',
+                (namespace, current_time, *file_dids)).fetchall()
+        else:
+            with db.atomic():
+                # Temporary tables are private to the connection, i.e. to the calling thread
+                db.execute_sql('CREATE TEMP TABLE IF NOT EXISTS lookup_dids (did TEXT PRIMARY KEY)')
+                db.execute_sql('DELETE FROM temp.lookup_dids')
+                db.cursor().executemany('INSERT OR IGNORE INTO temp.lookup_dids (did) VALUES (?)', ((did,) for did in file_dids))
+                rows = db.execute_sql(
+                    'SELECT r.did, r.pfn, r.size FROM temp.lookup_dids l '
+                    'JOIN filereplicascache r ON r.namespace = ? AND r.did = l.did WHERE r.expiry > ?',
+                    (namespace, current_time)).fetchall()
+                db.execute_sql('DELETE FROM temp.lookup_dids')
+
+        found = {did: PfnFileReplica(did=did, pfn=pfn, size=size) for did, pfn, size in rows}
+        missing = [did for did in file_dids if did not in found]
+        self._record_access(FileReplicasCache, [(namespace, did) for did in found])
+        return found, missing
+
+    def set_file_replica(self, namespace, file_did, pfn, size, ttl=None):
+        cache_expires = _get_cache_expiry(ttl, 'file_replicas', time.time())
         FileReplicasCache.replace(
-            namespace=namespace, did=file_did, pfn=pfn, size=size, expiry=cache_expires).execute()
+            namespace=namespace, did=file_did, pfn=pfn, size=size, expiry=cache_expires, last_accessed=time.time()).execute()
 
-    def set_file_replicas_bulk(self, namespace, file_replicas, chunk_size=1000):
+    def set_file_replicas_bulk(self, namespace, file_replicas, chunk_size=1000, ttl=None):
         """
         Store many file replicas in a single transaction to avoid per-row commits.
 
@@ -155,11 +595,13 @@ class DatabaseInstance:
             namespace (str): Cache namespace.
             file_replicas (Iterable): Collection of objects exposing did, pfn, size.
             chunk_size (int): Number of rows per bulk insert to keep memory bounded.
+            ttl (dict): TTL windows of the replicas, see get_cache_ttl().
         """
         if not file_replicas:
             return
 
-        cache_expires = int(time.time()) + (3600)  # an hour TODO change?
+        current_time = time.time()
+        cache_expires = _get_cache_expiry(ttl, 'file_replicas', current_time)
 
         def iter_rows():
             for replica in file_replicas:
@@ -168,7 +610,8 @@ class DatabaseInstance:
                     'did': replica.did,
                     'pfn': replica.pfn,
                     'size': replica.size,
-                    'expiry': cache_expires
+                    'expiry': cache_expires,
+                    'last_accessed': current_time
                 }
 
         with db.atomic():
@@ -188,6 +631,49 @@ class DatabaseInstance:
                  .on_conflict_replace()
                  .execute())
 
+    def get_replication_rule(self, namespace, did, rse, max_stale):
+        """
+        Returns the cached replication rule of a DID on an RSE.
+
+        Returns:
+            tuple: The (rule_id, status, expires_at) tuple of the rule, or None if the DID has no rule
+                on the RSE, and whether the entry is past its fresh window, or None if nothing is cached.
+        """
+        row = db.execute_sql('SELECT rule_id, status, expires_at, expiry FROM replicationrulecache '
+                             'WHERE namespace = ? AND did = ? AND rse = ? AND expiry > ?',
+                             (namespace, did, rse or '', int(time.time()))).fetchone()
+        if row is None:
+            return None
+
+        self._record_access(ReplicationRuleCache, [(namespace, did)])
+        rule_id, status, expires_at, expiry = row
+        rule = (rule_id, status, expires_at) if status is not None else None
+        return rule, expiry - max_stale <= time.time()
+
+    def set_replication_rule(self, namespace, did, rse, rule, ttl=None):
+        """
+        Caches the (rule_id, status, expires_at) tuple of the replication rule of a DID on an RSE,
+        or None if the DID has no rule on the RSE.
+        """
+        rule_id, status, expires_at = rule or (None, None, None)
+        ReplicationRuleCache.replace(namespace=namespace, did=did, rse=rse or '', rule_id=rule_id, status=status,
+                                     expires_at=expires_at, expiry=_get_cache_expiry(ttl, 'replication_rules', time.time()),
+                                     last_accessed=time.time()).execute()
+
+    def get_response_cache(self, namespace, key):
+        response_cache = RucioResponseCache.get_or_none((RucioResponseCache.namespace == namespace) & (RucioResponseCache.key == key))
+        if response_cache:
+            self._record_access(RucioResponseCache, [(namespace, key)])
+            return response_cache.value, response_cache.stored_at
+
+        return None
+
+    def set_response_cache(self, namespace, key, value, stored_at):
+        RucioResponseCache.replace(namespace=namespace, key=key, value=value, stored_at=stored_at, last_accessed=time.time()).execute()
+
+    def delete_response_cache(self, namespace, key):
+        RucioResponseCache.delete().where((RucioResponseCache.namespace == namespace) & (RucioResponseCache.key == key)).execute()
+
     def get_upload_jobs(self, namespace):
         upload_jobs = FileUploadJob.select().dicts().where(FileUploadJob.namespace == namespace).execute()
         return upload_jobs
@@ -212,11 +698,182 @@ class DatabaseInstance:
 
         return job
 
-    def purge_cache(self):
-        FileReplicasCache.delete().execute(database=None)
-        AttachedFilesListCache.delete().execute(database=None)
-        FileUploadJob.delete().execute(database=None)
-    
+    def flush_access_times(self):
+        """
+        Writes the access times recorded since the last call to the last_accessed columns.
+        """
+        with DatabaseInstance._accessed_lock:
+            accessed, DatabaseInstance._accessed = DatabaseInstance._accessed, dict()
+
+        now = time.time()
+        with db.atomic():
+            for model, keys in accessed.items():
+                key_column = _CACHE_KEY_COLUMNS[model]
+                db.cursor().executemany(
+                    f'UPDATE {model._meta.table_name} SET last_accessed = ? WHERE namespace = ? AND {key_column} = ?',
+                    [(now, namespace, key) for namespace, key in keys])
+
+    def delete_expired_cache(self, response_max_age, batch_size=500):
+        """
+        Deletes expired cache rows in batches of batch_size, one transaction per batch, so that
+        concurrent writers only wait for a short time.
+
+        Args:
+            response_max_age (int): Age in seconds after which a cached Rucio response is deleted.
+            batch_size (int): Number of rows deleted per transaction.
+
+        Returns:
+            dict: Number of deleted rows per table.
+        """
+        current_time = time.time()
+        return {
+            'filereplicascache': self._delete_in_batches(FileReplicasCache, 'expiry <= ?', (int(current_time),), batch_size),
+            'attachedfilescache': self._delete_in_batches(AttachedFilesCache, 'expiry <= ?', (int(current_time),), batch_size),
+            'rucioresponsecache': self._delete_in_batches(RucioResponseCache, 'stored_at <= ?', (current_time - response_max_age,), batch_size),
+            'replicationrulecache': self._delete_in_batches(ReplicationRuleCache, 'expiry <= ?', (int(current_time),), batch_size)
+        }
+
+    def evict_least_recently_used_cache(self, fraction, batch_size=500):
+        """
+        Deletes the least recently used rows of each cache table.
+
+        Args:
+            fraction (float): Fraction of the rows of each table to delete.
+            batch_size (int): Number of rows deleted per transaction.
+
+        Returns:
+            dict: Number of deleted rows per table.
+        """
+        evicted = dict()
+        for model in _CACHE_KEY_COLUMNS:
+            max_rows = math.ceil(model.select().count() * fraction)
+            evicted[model._meta.table_name] = self._delete_in_batches(model, '1', (), batch_size, order_by='last_accessed', max_rows=max_rows)
+        return evicted
+
+    def get_cache_size(self):
+        """
+        Returns the number of bytes used by the database file, excluding free pages.
+        """
+        page_size = db.execute_sql('PRAGMA page_size').fetchone()[0]
+        page_count = db.execute_sql('PRAGMA page_count').fetchone()[0]
+        freelist_count = db.execute_sql('PRAGMA freelist_count').fetchone()[0]
+        return (page_count - freelist_count) * page_size
+
+    def vacuum(self, pages=None):
+        """
+        Returns free pages to the filesystem. Databases created before incremental auto-vacuum was
+        enabled are converted with a full VACUUM first.
+        """
+        if db.execute_sql('PRAGMA auto_vacuum').fetchone()[0] != 2 and get_pragmas().get('auto_vacuum') == 'incremental':
+            logger.info("Enabling incremental auto-vacuum on the cache database")
+            db.execute_sql('VACUUM')
+            return
+
+        # The pragma frees one page per step, which the sqlite3 cursor stops after, executescript runs it to completion
+        db.connection().executescript(f'PRAGMA incremental_vacuum({int(pages)});' if pages else 'PRAGMA incremental_vacuum;')
+        # With WAL the file only shrinks once the truncated pages are checkpointed
+        db.execute_sql('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def _delete_in_batches(self, model, condition, params, batch_size, order_by=None, max_rows=None):
+        table_name = model._meta.table_name
+        if order_by:
+            condition = f'{condition} ORDER BY {order_by}'
+        deleted = 0
+        while max_rows is None or deleted < max_rows:
+            limit = batch_size if max_rows is None else min(batch_size, max_rows - deleted)
+            with db.atomic():
+                if model is AttachedFilesCache:
+                    # Deleting a list also deletes its files
+                    rows = db.execute_sql(f'SELECT namespace, did FROM {table_name} WHERE {condition} LIMIT ?', (*params, limit)).fetchall()
+                    db.cursor().executemany('DELETE FROM attachedfilecache WHERE namespace = ? AND parent_did = ?', rows)
+                cursor = db.execute_sql(
+                    f'DELETE FROM {table_name} WHERE rowid IN (SELECT rowid FROM {table_name} WHERE {condition} LIMIT ?)', (*params, limit))
+            deleted += cursor.rowcount
+            if cursor.rowcount < limit:
+                break
+        return deleted
+
+    @staticmethod
+    def _record_access(model, keys):
+        with DatabaseInstance._accessed_lock:
+            DatabaseInstance._accessed.setdefault(model, set()).update(keys)
+
+    def invalidate_cache(self, namespace=None, did=None, tables=CACHE_TABLES, batch_size=500):
+        """
+        Deletes cached entries, optionally restricted to a namespace and to a DID and its attached files.
+        Rows are deleted in batches of batch_size, one transaction per batch, so that concurrent writers
+        only wait for a short time.
+
+        Args:
+            namespace (str): Only delete entries of this namespace, all namespaces if None.
+            did (str): Only delete the file list and replicas of this DID and of its attached files,
+                the cached responses and replication rules about it, and its upload jobs. Everything if None.
+            tables (Iterable[str]): Tables to delete from, among CACHE_TABLES and UPLOAD_JOBS_TABLE.
+            batch_size (int): Number of rows deleted per transaction.
+
+        Returns:
+            dict: Number of deleted rows per table.
+
+        Raises:
+            ValueError: If a table is unknown.
+        """
+        unknown_tables = set(tables) - set(CACHE_TABLES) - {UPLOAD_JOBS_TABLE}
+        if unknown_tables:
+            raise ValueError(f"Unknown cache tables: {', '.join(sorted(unknown_tables))}")
+
+        condition, params = ('namespace = ?', (namespace,)) if namespace is not None else ('1', ())
+        if did is not None:
+            # Collect the attached files before their list is deleted
+            keys = [(row_namespace, did) for row_namespace in self._get_cache_namespaces(namespace, did)]
+            keys += self._get_attached_file_keys(namespace, did)
+
+        deleted = dict()
+        for table in tables:
+            if did is None:
+                deleted[table] = self._delete_in_batches(_INVALIDATION_TABLES[table], condition, params, batch_size)
+            elif table in ('attached_files', 'file_replicas'):
+                deleted[table] = self._delete_keys_in_batches(_INVALIDATION_TABLES[table], keys, batch_size)
+            elif table == 'replication_rules':
+                deleted[table] = self._delete_in_batches(ReplicationRuleCache, f'{condition} AND did = ?', (*params, did), batch_size)
+            elif table == 'responses':
+                scope, _, name = did.partition(':')
+                did_path = f"/dids/{quote(scope)}/{quote(name)}/"
+                deleted[table] = self._delete_in_batches(RucioResponseCache, f'{condition} AND instr(key, ?) > 0', (*params, did_path), batch_size)
+            else:
+                deleted[table] = self._delete_in_batches(FileUploadJob, f'{condition} AND (did = ? OR dataset_did = ?)', (*params, did, did), batch_size)
+
+        logger.info("Invalidated cache of namespace %s, DID %s: %s", namespace or '*', did or '*', deleted)
+        return deleted
+
+    def _get_cache_namespaces(self, namespace, did):
+        if namespace is not None:
+            return [namespace]
+        rows = db.execute_sql('SELECT namespace FROM attachedfilescache WHERE did = ? UNION SELECT namespace FROM filereplicascache WHERE did = ?',
+                              (did, did)).fetchall()
+        return [row_namespace for row_namespace, in rows]
+
+    def _get_attached_file_keys(self, namespace, did):
+        namespace_condition, params = ('AND namespace = ?', (did, namespace)) if namespace is not None else ('', (did,))
+        keys = db.execute_sql(f'SELECT namespace, did FROM attachedfilecache WHERE parent_did = ? {namespace_condition}', params).fetchall()
+        for row_namespace, packed in db.execute_sql(
+                f'SELECT namespace, packed FROM attachedfilescache WHERE did = ? AND packed IS NOT NULL {namespace_condition}', params).fetchall():
+            keys += [(row_namespace, file_did) for file_did, _, _ in decode_file_list(packed)[0]]
+        return keys
+
+    def _delete_keys_in_batches(self, model, keys, batch_size):
+        table_name = model._meta.table_name
+        key_column = _CACHE_KEY_COLUMNS[model]
+        deleted = 0
+        for i in range(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            with db.atomic():
+                if model is AttachedFilesCache:
+                    db.cursor().executemany('DELETE FROM attachedfilecache WHERE namespace = ? AND parent_did = ?', batch)
+                cursor = db.cursor()
+                cursor.executemany(f'DELETE FROM {table_name} WHERE namespace = ? AND {key_column} = ?', batch)
+            deleted += cursor.rowcount
+        return deleted
+
     def has_any_auth_credentials(self, namespace):
         """Returns True if ANY auth credentials exist for this namespace."""
         return (
@@ -226,6 +883,14 @@ class DatabaseInstance:
             .exists()
         )
 
+class SchemaVersion(Model):
+    version = IntegerField(primary_key=True)
+    applied_at = FloatField()
+
+    class Meta:
+        database = db
+
+
 class UserConfig(Model):
     key = TextField(unique=True)
     value = TextField()
@@ -244,29 +909,74 @@ class RucioAuthCredentials(Model):
         primary_key = CompositeKey('namespace', 'auth_type')
 
 
-class AttachedFilesListCache(Model):
+class AttachedFilesCache(Model):
     namespace = TextField()
     did = TextField()
-    file_dids = TextField()
-    expiry = DateTimeField()
+    expiry = IntegerField(index=True)
+    last_accessed = FloatField(null=True, index=True)
+    version = IntegerField(default=0)
+    packed = BlobField(null=True)
 
     class Meta:
         database = db
         primary_key = CompositeKey('namespace', 'did')
 
 
+class AttachedFileCache(Model):
+    namespace = TextField()
+    parent_did = TextField()
+    did = TextField()
+    size = IntegerField(null=True)
+    position = IntegerField()
+
+    class Meta:
+        database = db
+        primary_key = CompositeKey('namespace', 'parent_did', 'did')
+        indexes = (
+            (('namespace', 'parent_did', 'position'), False),
+        )
+
+
 class FileReplicasCache(Model):
     namespace = TextField()
     did = TextField()
     pfn = TextField(null=True)
     size = IntegerField()
-    expiry = DateTimeField()
+    expiry = DateTimeField(index=True)
+    last_accessed = FloatField(null=True, index=True)
 
     class Meta:
         database = db
         primary_key = CompositeKey('namespace', 'did')
 
 
+class RucioResponseCache(Model):
+    namespace = TextField()
+    key = TextField()
+    value = TextField()
+    stored_at = FloatField(index=True)
+    last_accessed = FloatField(null=True, index=True)
+
+    class Meta:
+        database = db
+        primary_key = CompositeKey('namespace', 'key')
+
+
+class ReplicationRuleCache(Model):
+    namespace = TextField()
+    did = TextField()
+    rse = TextField()
+    rule_id = TextField(null=True)
+    status = TextField(null=True)
+    expires_at = TextField(null=True)
+    expiry = IntegerField(index=True)
+    last_accessed = FloatField(null=True, index=True)
+
+    class Meta:
+        database = db
+        primary_key = CompositeKey('namespace', 'did', 'rse')
+
+
 class FileUploadJob(Model):
     id = IntegerField(primary_key=True)
     namespace = TextField()
@@ -281,3 +991,31 @@ class FileUploadJob(Model):
     class Meta:
         database = db
         # primary_key = CompositeKey('namespace', 'did')
+
+
+# Append only: the position in this list is the schema version a migration brings the database to
+SCHEMA_MIGRATIONS = [
+    _create_tables,
+    migrate_attached_files_list_cache,
+    _create_expiry_indexes,
+    _add_last_accessed_columns,
+    _add_attached_files_version_column,
+    _add_attached_files_packed_column,
+    _create_replication_rules_table,
+]
+
+# Cache tables subject to expiry and LRU eviction, with the column identifying an entry within a namespace
+_CACHE_KEY_COLUMNS = {
+    FileReplicasCache: 'did',
+    AttachedFilesCache: 'did',
+    RucioResponseCache: 'key',
+    ReplicationRuleCache: 'did'
+}
+
+_INVALIDATION_TABLES = {
+    'attached_files': AttachedFilesCache,
+    'file_replicas': FileReplicasCache,
+    'responses': RucioResponseCache,
+    'replication_rules': ReplicationRuleCache,
+    UPLOAD_JOBS_TABLE: FileUploadJob
+}
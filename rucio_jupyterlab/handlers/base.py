@@ -31,6 +31,24 @@ async def run_in_api_executor(func, *args, **kwargs):
     result = await loop.run_in_executor(rucio_api_executor, blocking_task)
     return result
 
+
+# Executor of the long-lived event streams, kept apart so their periodic checks never queue behind user actions
+EVENTS_MAX_WORKERS = 2
+rucio_events_executor = concurrent.futures.ThreadPoolExecutor(max_workers=EVENTS_MAX_WORKERS, thread_name_prefix="rucio_events")
+
+async def run_in_events_executor(func, *args, **kwargs):
+    """
+    Run a function in the event stream executor.
+    :param func: The function to run.
+    :param args: Positional arguments for the function.
+    :param kwargs: Keyword arguments for the function.
+    :return: The result of the function.
+    """
+    loop = tornado.ioloop.IOLoop.current()
+    blocking_task = partial(func, *args, **kwargs)
+    result = await loop.run_in_executor(rucio_events_executor, blocking_task)
+    return result
+
 class RucioAPIHandler(APIHandler):  # pragma: no cover
     def initialize(self, rucio_config, rucio, *args, **kwargs):
         super().initialize(*args, **kwargs)
@@ -43,6 +61,7 @@ class RucioAPIHandler(APIHandler):  # pragma: no cover
             "/instances",
             "/auth",
             "/oidc-auth-check",
+            "/purge-cache",
         )):
             return
 
@@ -10,7 +10,8 @@
 
 import json
 import logging
-from rucio_jupyterlab.db import get_db
+from tornado.ioloop import IOLoop
+from rucio_jupyterlab.db import get_db, get_cache_ttl
 from rucio_jupyterlab.entity import AttachedFile
 from rucio_jupyterlab.rucio.authenticators import RucioAuthenticationException
 from .base import RucioAPIHandler, run_in_api_executor
@@ -20,6 +21,11 @@ import tornado
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
+def _to_attached_file(replica):
+    return AttachedFile(did=(replica.get('scope') + ':' + replica.get('name')), size=replica.get('bytes'))
+
+
 class DIDBrowserHandlerImpl:
     """
     Implementation of a handler for browsing Data Identifier (DID) files.
@@ -39,35 +45,63 @@ class DIDBrowserHandlerImpl:
         get_files(scope, name, force_fetch=False):
             Fetches files associated with the given DID (scope:name). Files are retrieved
             from the local cache if available, or fetched directly from Rucio if `force_fetch`
-            is set to True or no cached files are found.
+            is set to True or no cached files are found. Stale cached files are returned
+            while they are fetched again in the background.
     """
 
+    # (namespace, parent DID) pairs whose stale file list is being fetched again
+    _revalidating = set()
+
     def __init__(self, namespace, rucio):
         self.namespace = namespace
         self.rucio = rucio
         self.db = get_db()  # pylint: disable=invalid-name
+        self.attached_files_ttl = get_cache_ttl(rucio.instance_config, 'attached_files')
         logger.info("DIDBrowserHandlerImpl initialized with namespace: %s", namespace)
         logger.debug("Namespace: %s, Rucio instance: %s", namespace, rucio)
 
-    def get_files(self, scope, name, force_fetch=False):
+    async def get_files(self, scope, name, force_fetch=False):
         parent_did = f'{scope}:{name}'
         logger.info("Fetching files for DID: %s, force_fetch=%s", parent_did, force_fetch)
         logger.debug("Scope: %s, Name: %s, Force fetch: %s", scope, name, force_fetch)
 
-        attached_files = self.db.get_attached_files(namespace=self.namespace, did=parent_did) if not force_fetch else None
+        # Cached lists of large datasets take a while to load, keep the DB off the event loop
+        attached_files = await run_in_api_executor(self.db.get_attached_files, namespace=self.namespace, did=parent_did) if not force_fetch else None
         if attached_files:
             logger.info("Found cached attached files for DID: %s", parent_did)
             logger.debug("Cached attached files: %s", attached_files)
+            if await run_in_api_executor(self.db.is_attached_files_stale, self.namespace, parent_did, self.attached_files_ttl['max_stale']):
+                self._revalidate(scope, name, parent_did)
             return [d.__dict__ for d in attached_files]
 
         logger.info("No cached files found for DID: %s. Fetching from Rucio.", parent_did)
-        file_dids = self.rucio.get_replicas(scope, name)
-        logger.debug("Fetched file DIDs from Rucio: %s", file_dids)
-        attached_files = [AttachedFile(did=(d.get('scope') + ':' + d.get('name')), size=d.get('bytes')) for d in file_dids]
-        self.db.set_attached_files(self.namespace, parent_did, attached_files)
+        attached_files = await self._fetch_files(scope, name, parent_did)
+        return [d.__dict__ for d in attached_files]
+
+    async def _fetch_files(self, scope, name, parent_did):
+        # Replicas are mapped as they are received, the raw records of large datasets are never held at once
+        attached_files = await self.rucio.get_replicas(scope, name, map_record=_to_attached_file)
+        await run_in_api_executor(self.db.set_attached_files, self.namespace, parent_did, attached_files, ttl=self.attached_files_ttl)
         logger.info("Fetched and cached %d files for DID: %s", len(attached_files), parent_did)
         logger.debug("Attached files cached: %s", attached_files)
-        return [d.__dict__ for d in attached_files]
+        return attached_files
+
+    def _revalidate(self, scope, name, parent_did):
+        key = (self.namespace, parent_did)
+        if key in DIDBrowserHandlerImpl._revalidating:
+            return
+        DIDBrowserHandlerImpl._revalidating.add(key)
+
+        async def revalidate():
+            try:
+                await self._fetch_files(scope, name, parent_did)
+            except Exception as e:
+                logger.warning("Background refresh of the cached files of %s failed: %s", parent_did, e)
+            finally:
+                DIDBrowserHandlerImpl._revalidating.discard(key)
+
+        logger.info("Cached files of DID %s are stale, fetching them again in the background", parent_did)
+        IOLoop.current().spawn_callback(revalidate)
 
 
 class DIDBrowserHandler(RucioAPIHandler):
@@ -102,14 +136,14 @@ class DIDBrowserHandler(RucioAPIHandler):
         logger.info("Handling GET request for namespace: %s, DID: %s, poll=%s", namespace, did, poll)
         logger.debug("Query arguments - Namespace: %s, Poll: %s, DID: %s", namespace, poll, did)
 
-        rucio = self.rucio.for_instance(namespace)
+        rucio = self.rucio.for_instance_async(namespace)
         (scope, name) = did.split(':')
         logger.debug("Split DID into scope: %s, name: %s", scope, name)
 
         handler = DIDBrowserHandlerImpl(namespace, rucio)
 
         try:
-            dids = await run_in_api_executor(handler.get_files, scope, name, poll)
+            dids = await handler.get_files(scope, name, poll)
             logger.info("Successfully fetched files for DID: %s", did)
             logger.debug("Fetched files: %s", dids)
             self.finish(json.dumps(dids))
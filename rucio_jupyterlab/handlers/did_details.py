@@ -19,6 +19,9 @@ import tornado
 
 logger = logging.getLogger(__name__)
 
+# Maximum number of files returned in a single page of DID details
+PAGE_LIMIT = 10000
+
 
 class DIDDetailsHandler(RucioAPIHandler):
     """
@@ -27,6 +30,21 @@ class DIDDetailsHandler(RucioAPIHandler):
     It retrieves the details of a DID based on the provided scope and name, and can optionally poll for updates.
     The handler uses the appropriate mode handler (ReplicaModeHandler or DownloadModeHandler)
     based on the Rucio instance's configuration.
+
+    The files can be retrieved a page at a time with the `offset` and `limit` query arguments.
+    The response is then an object holding the files of the page under `files`, along with
+    `total`, `total_bytes`, `status_counts` and `status` computed over all files of the DID.
+    With `summary=1`, only these totals are returned.
+
+    Unlike the other async handlers, this one still runs the mode handler in the API executor rather than
+    awaiting AsyncRucioAPI: the details are served from the SQLite caches, and a cache miss returns a
+    FETCHING placeholder while the replicas are fetched in the background by the mode handler's own executor.
+    Forced refreshes, uncached replication rules and the POST file details still reach Rucio from the API executor.
+
+    A POST request retrieves the details of many file DIDs at once. The expected JSON body is:
+    {
+        "dids": ["scope:name1", "scope:name2"]
+    }
     """
 
     STATUS_NOT_AVAILABLE = "NOT_AVAILABLE"
@@ -39,9 +57,24 @@ class DIDDetailsHandler(RucioAPIHandler):
     async def get(self):
         namespace = self.get_query_argument('namespace')
         force_refresh = self.get_query_argument('force', '0') == '1'
+        summary = self.get_query_argument('summary', '0') == '1'
         did = self.get_query_argument('did')
         scope, name = did.split(':')
 
+        paged = self.get_query_argument('offset', None) is not None or self.get_query_argument('limit', None) is not None
+        try:
+            offset = int(self.get_query_argument('offset', '0'))
+            limit = min(int(self.get_query_argument('limit', str(PAGE_LIMIT))), PAGE_LIMIT)
+            if offset < 0 or limit < 1:
+                raise ValueError()
+        except ValueError:
+            self.set_status(400)
+            self.finish(json.dumps({
+                'success': False,
+                'error': "Invalid paging parameters: offset must be >= 0 and limit must be >= 1"
+            }))
+            return
+
         rucio_instance = self.rucio.for_instance(namespace)
         mode = rucio_instance.instance_config.get('mode', 'replica')
 
@@ -51,7 +84,55 @@ class DIDDetailsHandler(RucioAPIHandler):
             handler = DownloadModeHandler(namespace, rucio_instance)
 
         try:
-            output = await run_in_api_executor(handler.get_did_details, scope, name, force_refresh)
+            if summary:
+                output = await run_in_api_executor(handler.get_did_summary, scope, name, force_refresh)
+            elif paged:
+                output = await run_in_api_executor(handler.get_did_details_page, scope, name, force_refresh, offset, limit)
+            else:
+                output = await run_in_api_executor(handler.get_did_details, scope, name, force_refresh)
+            self.finish(json.dumps(output))
+        except RucioAPIException as e:
+            # Log the exception details
+            logger.error("RucioAPIException occurred: %s, Class: %s, Message: %s", e.message, e.exception_class, e.exception_message)
+            # Set the HTTP status from the exception, falling back to 500 if not present
+            self.set_status(e.status_code or 500)
+
+            # Finish the request with a detailed JSON error payload
+            self.finish(json.dumps({
+                'success': False,
+                'error': e.message,
+                'exception_class': e.exception_class,
+                'exception_message': e.exception_message
+            }))
+
+    @tornado.web.authenticated
+    @prometheus_metrics
+    async def post(self):
+        namespace = self.get_query_argument('namespace')
+        body = self.get_json_body()
+        dids = body.get('dids') if isinstance(body, dict) else None
+        if not isinstance(dids, list) or not all(isinstance(did, str) and ':' in did for did in dids):
+            self.set_status(400)
+            self.finish(json.dumps({
+                'success': False,
+                'error': "Expected a JSON body with a list of DIDs in scope:name format under 'dids'"
+            }))
+            return
+
+        rucio_instance = self.rucio.for_instance(namespace)
+        mode = rucio_instance.instance_config.get('mode', 'replica')
+
+        try:
+            if mode == 'replica':
+                handler = ReplicaModeHandler(namespace, rucio_instance)
+                output = await run_in_api_executor(handler.get_file_dids_details, dids)
+            else:
+                handler = DownloadModeHandler(namespace, rucio_instance)
+                output = []
+                for did in dids:
+                    scope, name = did.split(':', 1)
+                    output += await run_in_api_executor(handler.get_did_details, scope, name)
+
             self.finish(json.dumps(output))
         except RucioAPIException as e:
             # Log the exception details
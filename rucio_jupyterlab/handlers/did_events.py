@@ -0,0 +1,151 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import json
+import logging
+import time
+import tornado
+from tornado.iostream import StreamClosedError
+from rucio_jupyterlab.rucio.exceptions import RucioAPIException
+from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
+from rucio_jupyterlab.mode_handlers.download import DownloadModeHandler
+from .base import RucioAPIHandler, run_in_events_executor
+
+logger = logging.getLogger(__name__)
+
+# Seconds between two checks of the subscribed DIDs, as often as clients used to poll
+EVENTS_INTERVAL = 10
+# Seconds after which every subscribed DID is summarized again even if its cached state did not change,
+# which also revalidates its cached replicas and replication rule
+SUMMARY_REFRESH_INTERVAL = 60
+# Maximum number of DIDs a single stream can subscribe to, the same as MAX_STREAMED_DIDS of the frontend
+MAX_SUBSCRIBED_DIDS = 200
+
+
+def get_did_revisions(handler, dids):
+    """
+    Returns the revision of each DID as returned by ReplicaModeHandler.get_did_revision(), or None
+    if the DID has none, e.g. in download mode, in which case it is summarized on every check.
+    """
+    if not isinstance(handler, ReplicaModeHandler):
+        return dict.fromkeys(dids)
+
+    revisions = dict()
+    for did in dids:
+        try:
+            revisions[did] = handler.get_did_revision(did)
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Failed to get the revision of '%s' for the event stream: %s", did, e)
+            revisions[did] = None
+    return revisions
+
+
+def get_did_states(handler, dids, revisions):
+    """
+    Returns the state of each DID, i.e. its summary as returned by get_did_summary() along with the
+    version of its cached file list and replicas, or the error which prevented getting the summary.
+    """
+    states = dict()
+    for did in dids:
+        scope, name = did.split(':', 1)
+        revision = revisions.get(did)
+        try:
+            summary = handler.get_did_summary(scope, name)
+            states[did] = {'did': did, 'version': revision[0] if revision else None, **summary}
+        except RucioAPIException as e:
+            logger.warning("Failed to get the state of '%s' for the event stream: %s", did, e.message)
+            states[did] = {'did': did, 'error': e.message}
+        except Exception as e:  # pylint: disable=broad-except
+            logger.error("Failed to get the state of '%s' for the event stream: %s", did, e, exc_info=True)
+            states[did] = {'did': did, 'error': str(e) or type(e).__name__}
+    return states
+
+
+def check_did_states(handler, dids, settled_revisions, refresh):
+    """
+    Summarizes the DIDs whose revision differs from the one of their settled state, or all of them if refresh is set.
+
+    Returns:
+        tuple: The current revision of each DID, and the new state of each summarized DID.
+    """
+    revisions = get_did_revisions(handler, dids)
+    outdated = [did for did in dids if refresh or revisions[did] is None or settled_revisions.get(did) != revisions[did]]
+    return revisions, get_did_states(handler, outdated, revisions)
+
+
+class DIDEventsHandler(RucioAPIHandler):
+    """
+    Streams the state of a set of DIDs as Server-Sent Events, replacing one details request per DID and poll.
+
+    The DIDs are given as a comma-separated `dids` query argument. The state of every DID is sent once, then
+    again only when it changes, i.e. when its status or file counts change or its cached replicas get a new
+    version. A comment is sent instead when nothing changed, so that closed connections are noticed.
+    Clients change their subscription by opening a new stream.
+
+    Each check only reads the revision of every DID from the caches. DIDs are summarized when their revision
+    changed, while their state is an error or still being fetched, and every SUMMARY_REFRESH_INTERVAL seconds.
+    The checks run in their own executor, so that open streams never take threads from the user-facing handlers.
+    """
+
+    # Not timed by prometheus_metrics, the request lasts as long as the client listens
+    @tornado.web.authenticated
+    async def get(self):
+        namespace = self.get_query_argument('namespace')
+        dids = list(dict.fromkeys(did for did in self.get_query_argument('dids', '').split(',') if did))
+
+        if not dids or len(dids) > MAX_SUBSCRIBED_DIDS or any(':' not in did for did in dids):
+            self.set_status(400)
+            self.finish(json.dumps({
+                'success': False,
+                'error': f"Expected between 1 and {MAX_SUBSCRIBED_DIDS} comma-separated DIDs in scope:name format"
+            }))
+            return
+
+        rucio_instance = self.rucio.for_instance(namespace)
+        mode = rucio_instance.instance_config.get('mode', 'replica')
+
+        if mode == 'replica':
+            handler = ReplicaModeHandler(namespace, rucio_instance)
+        else:
+            handler = DownloadModeHandler(namespace, rucio_instance)
+
+        self.set_header('Content-Type', 'text/event-stream')
+        self.set_header('Cache-Control', 'no-cache')
+        self.set_header('X-Accel-Buffering', 'no')     # Keep reverse proxies from buffering the stream
+
+        sent_states = dict()
+        settled_revisions = dict()
+        summarized_at = 0
+        while True:
+            refresh = time.time() - summarized_at >= SUMMARY_REFRESH_INTERVAL
+            if refresh:
+                summarized_at = time.time()
+
+            revisions, states = await run_in_events_executor(check_did_states, handler, dids, settled_revisions, refresh)
+            for did, state in states.items():
+                # Unsettled states are summarized again on the next check, whatever their revision
+                if 'error' in state or state.get('status') == ReplicaModeHandler.STATUS_FETCHING:
+                    settled_revisions.pop(did, None)
+                else:
+                    settled_revisions[did] = revisions[did]
+
+            changed = [state for did, state in states.items() if sent_states.get(did) != state]
+
+            if changed:
+                for state in changed:
+                    self.write(f"event: status\ndata: {json.dumps(state)}\n\n")
+                sent_states.update((state['did'], state) for state in changed)
+            else:
+                self.write(": unchanged\n\n")
+
+            try:
+                await self.flush()
+            except StreamClosedError:
+                logger.debug("Event stream of %d DIDs closed by the client.", len(dids))
+                return
+
+            await asyncio.sleep(EVENTS_INTERVAL)
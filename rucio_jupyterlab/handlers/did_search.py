@@ -14,7 +14,7 @@ import logging
 from rucio_jupyterlab.db import get_db
 from rucio_jupyterlab.rucio.exceptions import RucioAPIException
 import rucio_jupyterlab.utils as utils
-from .base import RucioAPIHandler, run_in_api_executor
+from .base import RucioAPIHandler
 from rucio_jupyterlab.metrics import prometheus_metrics
 import tornado
 
@@ -41,43 +41,41 @@ class DIDSearchHandlerImpl:
         self.db = get_db()  # pylint: disable=invalid-name
         logger.info("DIDSearchHandlerImpl initialized for namespace: %s", namespace)
 
-    def search_did(self, scope, name, search_type, filters, limit):
-        logger.info("Searching DID with scope: %s, name: %s, type: %s, filters: %s, limit: %s", scope, name, search_type, filters, limit)
+    async def search_did(self, scope, name, search_type, filters, limit, offset=0):
+        logger.info("Searching DID with scope: %s, name: %s, type: %s, filters: %s, limit: %s, offset: %s", scope, name, search_type, filters, limit, offset)
         wildcard_enabled = self.rucio.instance_config.get('wildcard_enabled', False)
 
         if ('*' in name or '%' in name) and not wildcard_enabled:
             logger.warning("Wildcard search attempted but is disabled in the configuration.")
             raise WildcardDisallowedException()
-        dids = self.rucio.search_did(scope, name, search_type, filters, limit)
+        dids = await self.rucio.search_did(scope, name, search_type, filters, limit, offset=offset)
         logger.debug("Initial search results: %s", dids)
 
+        # Paging past the last result is not an error
+        if offset and not dids:
+            return []
+
         # Check if filters are provided and if dids are found
         if filters and not dids:
-            print(filters)
+            logger.debug("No DIDs found with filters: %s", filters)
             # If no filters are provided and no DIDs are found, search for all DIDs in the scope
             raise ValueError("No DIDs found for scope: \"%s\" and filters: %s. Please check the parameters or try a different search." % (scope, filters))
         # If filters are provided but no DIDs are found, raise an error
         if not filters and not dids:
             raise ValueError("No DIDs found for scope: \"%s\". Please check the parameters or try a different search." % (scope))
 
-        try:
+        # The JSON metadata plugin lacks the DID columns, complete them with a batched metadata lookup
+        incomplete = [{'scope': did.get('scope') or scope, 'name': did['name']} for did in dids if did.get('did_type') is None]
+        if incomplete:
+            logger.debug("Fetching metadata for %d DIDs", len(incomplete))
+            metadata_by_did = await self.rucio.get_metadata_bulk(incomplete)
             for did in dids:
-                if did['did_type'] is None:  # JSON plugin was used lacking data
-                    logger.debug("Fetching metadata for DID with scope: %s, name: %s", scope, did['name'])
-                    metadata_str = self.rucio.get_metadata(scope, did['name']) # This should be a single dict
-                    metadata = json.loads(metadata_str) # Convert JSON string to dict
-
+                metadata = metadata_by_did.get((did.get('scope') or scope, did['name']))
+                if did.get('did_type') is None and metadata:
                     did['did_type'] = metadata['did_type']
                     did['bytes'] = metadata['bytes']
                     did['length'] = metadata['length']
                     logger.debug("Updated DID metadata: %s", did)
-        except Exception as e:
-            logger.error(e)
-            self.set_status(500)
-            self.finish(json.dumps({
-                'success': False,
-                'error': str(e)
-            }))
 
         def mapper(entry, _):
             logger.debug("Mapping entry: %s", entry)
@@ -111,7 +109,21 @@ class DIDSearchHandler(RucioAPIHandler):
         did = self.get_query_argument('did')
         filters = self.get_query_argument('filters', default=None)
         logger.info("Received DID search request: namespace=%s, type=%s, did=%s, filters=%s", namespace, search_type, did, filters)
-        rucio = self.rucio.for_instance(namespace)
+
+        try:
+            offset = int(self.get_query_argument('offset', '0'))
+            limit = min(int(self.get_query_argument('limit', str(ROW_LIMIT))), ROW_LIMIT)
+            if offset < 0 or limit < 1:
+                raise ValueError()
+        except ValueError:
+            self.set_status(400)
+            self.finish(json.dumps({
+                'success': False,
+                'error': "Invalid paging parameters: offset must be >= 0 and limit must be >= 1"
+            }))
+            return
+
+        rucio = self.rucio.for_instance_async(namespace)
 
         try:
             (scope, name) = did.split(':')
@@ -128,7 +140,7 @@ class DIDSearchHandler(RucioAPIHandler):
         handler = DIDSearchHandlerImpl(namespace, rucio)
 
         try:
-            dids = await run_in_api_executor(handler.search_did, scope, name, search_type, filters, ROW_LIMIT)
+            dids = await handler.search_did(scope, name, search_type, filters, limit, offset)
             logger.info("DID search successful. Returning %d results.", len(dids))
             self.finish(json.dumps(dids))
         except WildcardDisallowedException:
@@ -10,6 +10,7 @@
 import json
 import tornado
 from rucio_jupyterlab.db import get_db
+from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
 from rucio_jupyterlab.rucio import RucioAPI
 from .base import RucioAPIHandler
 from rucio_jupyterlab.metrics import prometheus_metrics
@@ -48,5 +49,6 @@ class InstancesHandler(RucioAPIHandler):
         db.set_active_auth_method(picked_auth_type)
 
         RucioAPI.clear_auth_token_cache()
+        ReplicaModeHandler.did_details_cache.clear()
 
         self.finish(json.dumps({'success': True}))
@@ -10,7 +10,7 @@
 import json
 import tornado
 from rucio_jupyterlab.rucio.exceptions import RucioAPIException
-from .base import RucioAPIHandler, run_in_api_executor
+from .base import RucioAPIHandler
 from rucio_jupyterlab.metrics import prometheus_metrics
 
 
@@ -35,10 +35,10 @@ class ListScopesHandler(RucioAPIHandler):
     @prometheus_metrics
     async def get(self):
         namespace = self.get_query_argument('namespace')
-        rucio = self.rucio.for_instance(namespace)
+        rucio = self.rucio.for_instance_async(namespace)
 
         try:
-            scopes = await run_in_api_executor(rucio.get_scopes)
+            scopes = await rucio.get_scopes()
             self.finish(json.dumps({'success': True, 'scopes': scopes}))
         except RucioAPIException as e:
             # Set the HTTP status from the exception, falling back to 500 if not present
@@ -8,16 +8,62 @@
 # - Muhammad Aditya Hilmy, <mhilmy@hey.com>, 2020
 
 import json
+from urllib.parse import quote
 import tornado
-from rucio_jupyterlab.db import get_db
-from .base import RucioAPIHandler
+from rucio_jupyterlab.db import get_db, CACHE_TABLES
+from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
+from rucio_jupyterlab.rucio import RucioAPI
+from .base import RucioAPIHandler, run_in_api_executor
 from rucio_jupyterlab.metrics import prometheus_metrics
 
 
+def invalidate_memory_caches(namespace=None, did=None, tables=CACHE_TABLES):
+    """
+    Drops the in-memory entries matching a cache invalidation, see DatabaseInstance.invalidate_cache().
+    """
+    def in_namespace(key):
+        return namespace is None or key.startswith(namespace + '|')
+
+    if 'responses' in tables:
+        if did is None:
+            RucioAPI.response_cache.invalidate_matching(in_namespace)
+        else:
+            scope, _, name = did.partition(':')
+            did_path = f"/dids/{quote(scope)}/{quote(name)}/"
+            RucioAPI.response_cache.invalidate_matching(lambda key: in_namespace(key) and did_path in key)
+
+    if 'attached_files' in tables or 'file_replicas' in tables:
+        # Memory entries are keyed by the polled DID, those of attached files cannot be told apart from the key
+        ReplicaModeHandler.did_details_cache.invalidate_matching(
+            lambda key: in_namespace(key) and (did is None or key.endswith('|' + did)))
+
+
 class PurgeCacheHandler(RucioAPIHandler):
+    """
+    Deletes cached data. The optional `namespace` query argument restricts the purge to an instance, and
+    the optional JSON body to a DID and its attached files (`did`) or to some tables (`tables`, among
+    attached_files, file_replicas, responses, replication_rules and upload_jobs). Upload jobs are only deleted if listed.
+    """
+
     @tornado.web.authenticated
     @prometheus_metrics
-    def post(self):
-        db = get_db()  # pylint: disable=invalid-name
-        db.purge_cache()
-        self.finish(json.dumps({'success': True}))
+    async def post(self):
+        namespace = self.get_query_argument('namespace', default=None)
+        try:
+            body = self.get_json_body() or {}
+            did = body.get('did')
+            tables = body.get('tables', list(CACHE_TABLES))
+            if did is not None and ':' not in did:
+                raise ValueError(f"Malformed DID received: '{did}'. Expected format: scope:name")
+            if not isinstance(tables, list):
+                raise ValueError("Expected a list of tables")
+
+            db = get_db()  # pylint: disable=invalid-name
+            deleted = await run_in_api_executor(db.invalidate_cache, namespace=namespace, did=did, tables=tables)
+        except (ValueError, AttributeError) as e:
+            self.set_status(400)
+            self.finish(json.dumps({'success': False, 'error': str(e)}))
+            return
+
+        invalidate_memory_caches(namespace, did, tables)
+        self.finish(json.dumps({'success': True, 'deleted': deleted}))
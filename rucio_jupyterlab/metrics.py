@@ -8,10 +8,14 @@
 # - Giovanni Guerrieri, <giovanni.guerrieri@cern.ch>, 2025
 
 import functools
-from prometheus_client import Counter, Summary
+from prometheus_client import Counter, Gauge, Summary
 
 REQUEST_COUNT = Counter('rucio_jupyterlab_requests_total', 'Total number of HTTP requests')
 REQUEST_LATENCY = Summary('rucio_jupyterlab_request_latency_seconds', 'Latency of HTTP requests')
+SINGLEFLIGHT_REQUESTS = Counter('rucio_jupyterlab_rucio_singleflight_total', 'Rucio GET requests, either executed or merged into an identical in-flight request', ['outcome'])
+DID_DETAILS_CACHE_REQUESTS = Counter('rucio_jupyterlab_did_details_cache_requests_total', 'Lookups of DID file replicas in the in-process cache, either hits or misses', ['outcome'])
+CACHE_SIZE = Gauge('rucio_jupyterlab_cache_size_bytes', 'Bytes used by the cache database, excluding free pages')
+CACHE_EVICTIONS = Counter('rucio_jupyterlab_cache_evictions_total', 'Cache rows deleted by the maintenance task', ['table', 'reason'])
 
 
 def prometheus_metrics(handler_method):
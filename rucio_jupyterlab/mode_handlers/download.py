@@ -165,6 +165,40 @@ class DownloadModeHandler:
             logger.exception("An unexpected error occurred in get_did_details for DID '%s'", did)
             raise
 
+    def get_did_details_page(self, scope, name, force_fetch=False, offset=0, limit=None):
+        """
+        Retrieves a window of the file statuses of a DID, together with totals over all of its files.
+        """
+        results = self.get_did_details(scope, name, force_fetch)
+        end = None if limit is None else offset + limit
+
+        status_counts = dict()
+        for result in results:
+            status_counts[result['status']] = status_counts.get(result['status'], 0) + 1
+
+        if len(status_counts) == 1:
+            status = next(iter(status_counts))
+        else:
+            # Either no files, or some of the downloaded files are missing
+            status = self.STATUS_STUCK if status_counts else self.STATUS_NOT_AVAILABLE
+
+        return {
+            'files': results[offset:end],
+            'offset': offset,
+            'limit': limit,
+            'total': len(results),
+            'total_bytes': sum(x['size'] or 0 for x in results),
+            'status_counts': status_counts,
+            'status': status
+        }
+
+    def get_did_summary(self, scope, name, force_fetch=False):
+        """
+        Retrieves the number of files of a DID and their total size per status, without the file list.
+        """
+        page = self.get_did_details_page(scope, name, force_fetch, limit=0)
+        return {key: value for key, value in page.items() if key not in ('files', 'offset', 'limit')}
+
     def _get_error_details(self, did):
         """
         Checks for and reads an error.json file.
@@ -184,7 +218,7 @@ class DownloadModeHandler:
         did = scope + ':' + name
         attached_files = self.db.get_attached_files(self.namespace, did) if not force_fetch else None
         if not attached_files:
-            rucio_attached_files = self.rucio.get_files(scope, name)
+            rucio_attached_files = self.rucio.get_files(scope, name, stream=True)
 
             def mapper(d, _):
                 return AttachedFile(did=(d.get('scope') + ':' + d.get('name')), size=d.get('bytes'))
@@ -4,12 +4,22 @@ import threading
 from concurrent.futures import ThreadPoolExecutor, Future
 from typing import Dict
 from urllib.parse import urlparse
-from rucio_jupyterlab.db import get_db
+from rucio_jupyterlab.cache import TTLCache
+from rucio_jupyterlab.db import get_db, get_cache_ttl
 from rucio_jupyterlab.entity import AttachedFile, PfnFileReplica
+from rucio_jupyterlab.metrics import DID_DETAILS_CACHE_REQUESTS
+from rucio_jupyterlab.rucio.rule_watcher import RuleWatcher, DEFAULT_WATCH_INTERVAL
 from rucio_jupyterlab import utils
 
 logger = logging.getLogger(__name__)
 
+# Materialized file replicas of recently polled DIDs are kept in memory in front of SQLite.
+# Entries are invalidated whenever this process stores a change, the TTL bounds staleness otherwise.
+DID_DETAILS_CACHE_TTL = 60  # seconds
+DID_DETAILS_CACHE_MAX_BYTES = 32 * 1024 * 1024
+# Above this many replicas missing from the DB, the whole dataset is fetched again in the background
+PARTIAL_FETCH_MAX_DIDS = 1000
+
 
 class ReplicaModeHandler:
     """
@@ -20,11 +30,15 @@ class ReplicaModeHandler:
     STATUS_FETCHING = "FETCHING"
     STATUS_OK = "OK"
     STATUS_STUCK = "STUCK"
+    STATUS_FAILED = "FAILED"
 
     # Class-level shared state for tracking inflight fetches across all instances
     _inflight_lock = threading.Lock()
     _inflight_fetches: Dict[str, Future] = {}
     _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="rucio_fetcher")
+    # Serializes the cache writes of all handlers, request handlers and background fetches alike
+    _write_lock = threading.Lock()
+    did_details_cache = TTLCache(max_bytes=DID_DETAILS_CACHE_MAX_BYTES)
 
     def __init__(self, namespace, rucio):
         """
@@ -37,8 +51,9 @@ class ReplicaModeHandler:
         self.namespace = namespace
         self.rucio = rucio
         self.db = get_db()  # pylint: disable=invalid-name
-        # Thread pool for async DB writes (instance-specific)
-        self._write_lock = threading.Lock()
+        self.attached_files_ttl = get_cache_ttl(rucio.instance_config, 'attached_files')
+        self.file_replicas_ttl = get_cache_ttl(rucio.instance_config, 'file_replicas')
+        self.replication_rules_ttl = get_cache_ttl(rucio.instance_config, 'replication_rules')
         logger.info("ReplicaModeHandler initialized for namespace: %s", self.namespace)
 
     def make_available(self, scope, name):
@@ -62,6 +77,8 @@ class ReplicaModeHandler:
 
         try:
             replication_result = self.rucio.add_replication_rule(dids=dids, rse_expression=destination_rse, copies=1, lifetime=lifetime)
+            # The new rule must show up on the next status check
+            self.db.invalidate_cache(self.namespace, f'{scope}:{name}', tables=['replication_rules'])
             logger.info("Successfully initiated replication rule for '%s:%s'. Result: %s", scope, name, replication_result)
             return replication_result
         except Exception as e:
@@ -81,8 +98,32 @@ class ReplicaModeHandler:
         Returns:
             list[dict]: A list of dictionaries, each containing status, DID, path, size, and PFN.
         """
+        return self.get_did_details_page(scope, name, force_fetch)['files']
+
+    def get_did_details_page(self, scope, name, force_fetch=False, offset=0, limit=None):
+        """
+        Retrieves a window of the details of a DID, together with totals over all of its files.
+        Only the files in the window are mapped to paths. When the file list is stored as rows, the window
+        is read with LIMIT/OFFSET and the totals are aggregated by SQLite, see _get_did_details_page_from_db().
+
+        Args:
+            scope (str): The scope of the DID.
+            name (str): The name of the DID.
+            force_fetch (bool): If True, forces fetching from Rucio instead of DB.
+            offset (int): Index of the first file to return.
+            limit (int): Maximum number of files to return, or None for all of them.
+
+        Returns:
+            dict: The files in the window under 'files', the window itself under 'offset' and 'limit',
+                and the totals returned by get_did_summary().
+        """
         logger.info("Getting DID details for '%s:%s', force_fetch=%s.", scope, name, force_fetch)
         did = scope + ':' + name
+
+        if limit and not force_fetch:
+            page = self._get_did_details_page_from_db(scope, name, did, offset, limit)
+            if page is not None:
+                return page
         
         # Check if there's an ongoing fetch for this DID
         with self._inflight_lock:
@@ -101,15 +142,7 @@ class ReplicaModeHandler:
             if is_fetching:
                 # Fetch is already in progress, return FETCHING status
                 logger.info("Fetch in progress for '%s:%s'. Returning FETCHING status.", scope, name)
-                return [{
-                    'status': ReplicaModeHandler.STATUS_FETCHING,
-                    'did': did,
-                    'path': None,
-                    'size': 0,
-                    'pfn': None,
-                    'message': 'Fetching replica information...',
-                    'progress': {'mode': 'indeterminate'}
-                }]
+                return self._make_fetching_page(did, offset, limit)
             elif not force_fetch:
                 # No cache and no ongoing fetch, start one
                 logger.info("No cached data for '%s:%s'. Returning placeholder and fetching async.", scope, name)
@@ -118,15 +151,7 @@ class ReplicaModeHandler:
                 self._fetch_and_cache_async(scope, name, did)
                 
                 # Return placeholder indicating data is being fetched
-                return [{
-                    'status': ReplicaModeHandler.STATUS_FETCHING,
-                    'did': did,
-                    'path': None,
-                    'size': 0,
-                    'pfn': None,
-                    'message': 'Fetching replica information...',
-                    'progress': {'mode': 'indeterminate'}
-                }]
+                return self._make_fetching_page(did, offset, limit)
             # If force_fetch and no data, fall through to sync fetch (which shouldn't happen normally)
             logger.warning("Force fetch requested for '%s:%s' but no data found. This is unexpected.", scope, name)
         
@@ -142,22 +167,143 @@ class ReplicaModeHandler:
         else:
             logger.debug("All PFNs are complete, assuming OK status for individual files unless otherwise specified.")
 
-        def result_mapper(file_replica, _):
-            file_did = file_replica.did
-            pfn = file_replica.pfn
-            path = self.translate_pfn_to_path(pfn) if pfn else None
-            size = file_replica.size
+        end = None if limit is None else offset + limit
+        results = [self._make_file_details(file_replica, status) for file_replica in attached_file_replicas[offset:end]]
+        logger.info("Finished getting DID details for '%s:%s'. Returned %d results.", scope, name, len(results))
 
-            if path is None:
-                # This is to handle newly-attached files in which the replication rule hasn't been reevaluated by the judger daemon.
-                result_status = status if status != ReplicaModeHandler.STATUS_OK else ReplicaModeHandler.STATUS_REPLICATING
-                return dict(status=result_status, did=file_did, path=None, size=size, pfn=pfn)
+        available = sum(1 for x in attached_file_replicas if x.pfn is not None)
+        total_bytes = sum(x.size or 0 for x in attached_file_replicas)
+        summary = self._make_summary(len(attached_file_replicas), total_bytes, available, status)
+        return {'files': results, 'offset': offset, 'limit': limit, **summary}
 
-            return dict(status=ReplicaModeHandler.STATUS_OK, did=file_did, path=path, size=size, pfn=pfn)
+    def _get_did_details_page_from_db(self, scope, name, did, offset, limit):
+        """
+        Pages the details of a DID whose file list is stored as one row per file in SQLite, so that only
+        the files in the window are loaded. Returns None when the page should be served by the general
+        path instead, i.e. when the replicas are in memory, packed, or not all cached.
+        """
+        cached = ReplicaModeHandler.did_details_cache.lookup(self._did_details_cache_key(did), DID_DETAILS_CACHE_TTL)
+        if cached is not None and not cached[1]:
+            return None
 
-        results = utils.map(attached_file_replicas, result_mapper)
-        logger.info("Finished getting DID details for '%s:%s'. Returned %d results.", scope, name, len(results))
-        return results
+        # Packed lists are decoded as a whole anyway, keeping them in memory serves the next pages
+        pfn_file_replicas = self.db.get_packed_file_replicas(self.namespace, did)
+        if pfn_file_replicas:
+            self._put_did_details_cache(did, pfn_file_replicas)
+            return None
+
+        aggregates = self.db.summarize_attached_file_replicas(self.namespace, did)
+        if aggregates is None or aggregates[3]:
+            return None
+
+        attached_files = self.db.get_attached_files(self.namespace, did, offset, limit)
+        replica_dict, missing_dids = self.db.lookup_file_replicas(self.namespace, [af.did for af in attached_files or []])
+        if attached_files is None or missing_dids:
+            # The cache changed between the two queries
+            return None
+
+        total, total_bytes, available, _ = aggregates
+        status = self.get_did_status(scope, name) if available < total else ReplicaModeHandler.STATUS_NOT_AVAILABLE
+        self._refresh_replicas_async(scope, name, did)
+
+        results = [self._make_file_details(replica_dict[af.did], status) for af in attached_files]
+        logger.info("Finished getting DID details for '%s:%s' from DB. Returned %d of %d results.", scope, name, len(results), total)
+        return {'files': results, 'offset': offset, 'limit': limit, **self._make_summary(total, total_bytes, available, status)}
+
+    def _make_file_details(self, file_replica, status):
+        pfn = file_replica.pfn
+        path = self.translate_pfn_to_path(pfn) if pfn else None
+
+        if path is None:
+            # This is to handle newly-attached files in which the replication rule hasn't been reevaluated by the judger daemon.
+            result_status = status if status != ReplicaModeHandler.STATUS_OK else ReplicaModeHandler.STATUS_REPLICATING
+            return dict(status=result_status, did=file_replica.did, path=None, size=file_replica.size, pfn=pfn)
+
+        return dict(status=ReplicaModeHandler.STATUS_OK, did=file_replica.did, path=path, size=file_replica.size, pfn=pfn)
+
+    def get_did_summary(self, scope, name, force_fetch=False):
+        """
+        Retrieves the number of files of a DID and their total size per status, without the file list.
+        The counts are aggregated by SQLite when the file list and all replicas are cached, otherwise
+        the replicas are loaded or fetched as for get_did_details().
+
+        Args:
+            scope (str): The scope of the DID.
+            name (str): The name of the DID.
+            force_fetch (bool): If True, forces fetching from Rucio instead of DB.
+
+        Returns:
+            dict: The number of files under 'total', their total size under 'total_bytes', the number of
+                files per status under 'status_counts' and the status of the DID as a whole under 'status'.
+        """
+        did = scope + ':' + name
+        if not force_fetch:
+            cached = ReplicaModeHandler.did_details_cache.lookup(self._did_details_cache_key(did), DID_DETAILS_CACHE_TTL)
+            if cached is not None and not cached[1]:
+                pfn_file_replicas = cached[0]
+                aggregates = (len(pfn_file_replicas), sum(x.size or 0 for x in pfn_file_replicas),
+                              sum(1 for x in pfn_file_replicas if x.pfn is not None), 0)
+            else:
+                aggregates = self.db.summarize_attached_file_replicas(self.namespace, did)
+
+            if aggregates is not None and aggregates[3] == 0:
+                total, total_bytes, available, _ = aggregates
+                status = self.get_did_status(scope, name) if available < total else ReplicaModeHandler.STATUS_NOT_AVAILABLE
+                self._refresh_replicas_async(scope, name, did)
+                return self._make_summary(total, total_bytes, available, status)
+
+        page = self.get_did_details_page(scope, name, force_fetch, limit=0)
+        return {key: value for key, value in page.items() if key not in ('files', 'offset', 'limit')}
+
+    def get_did_revision(self, did):
+        """
+        Returns a value which changes whenever the summary of a DID may change, read from the caches only:
+        the version of its cached file list and replicas and the status of its replication rule.
+        Unlike get_did_summary(), nothing is fetched or refreshed.
+        """
+        watcher = self._get_covering_rule_watcher(did)
+        if watcher is not None:
+            replication_rule = self._parse_rule(watcher.get_rule(did))
+        else:
+            destination_rse = self.rucio.instance_config.get('destination_rse')
+            cached = self.db.get_replication_rule(self.namespace, did, destination_rse, self.replication_rules_ttl['max_stale'])
+            replication_rule = cached[0] if cached is not None else None
+
+        return self.db.get_attached_files_version(self.namespace, did), self._get_rule_status(replication_rule)
+
+    @staticmethod
+    def _make_summary(total, total_bytes, available, status):
+        # Files without a PFN take the status of the replication rule, see get_did_details()
+        unavailable_status = status if status != ReplicaModeHandler.STATUS_OK else ReplicaModeHandler.STATUS_REPLICATING
+        status_counts = {ReplicaModeHandler.STATUS_OK: available, unavailable_status: total - available}
+        return {
+            'total': total,
+            'total_bytes': total_bytes,
+            'status_counts': {k: v for k, v in status_counts.items() if v},
+            'status': ReplicaModeHandler.STATUS_OK if total and available == total else unavailable_status
+        }
+
+    @staticmethod
+    def _make_fetching_page(did, offset, limit):
+        placeholder = {
+            'status': ReplicaModeHandler.STATUS_FETCHING,
+            'did': did,
+            'path': None,
+            'size': 0,
+            'pfn': None,
+            'message': 'Fetching replica information...',
+            'progress': {'mode': 'indeterminate'}
+        }
+        # The placeholder stands for the whole DID, so it is returned whatever the window
+        return {
+            'files': [placeholder],
+            'offset': offset,
+            'limit': limit,
+            'total': 1,
+            'total_bytes': 0,
+            'status_counts': {ReplicaModeHandler.STATUS_FETCHING: 1},
+            'status': ReplicaModeHandler.STATUS_FETCHING
+        }
 
     def _fetch_and_cache_async(self, scope, name, did):
         """
@@ -202,6 +348,21 @@ class ReplicaModeHandler:
         fetch_reason = None
         
         if not force_fetch:
+            cached = ReplicaModeHandler.did_details_cache.lookup(self._did_details_cache_key(did), DID_DETAILS_CACHE_TTL)
+            if cached is not None and not cached[1]:
+                DID_DETAILS_CACHE_REQUESTS.labels(outcome='hit').inc()
+                logger.debug("Serving %d file replicas of '%s' from memory.", len(cached[0]), did)
+                self._refresh_replicas_async(scope, name, did)
+                return cached[0]
+
+            DID_DETAILS_CACHE_REQUESTS.labels(outcome='miss').inc()
+            pfn_file_replicas = self.db.get_packed_file_replicas(self.namespace, did)
+            if pfn_file_replicas:
+                logger.debug("Found %d packed file replicas in DB for '%s'.", len(pfn_file_replicas), did)
+                self._put_did_details_cache(did, pfn_file_replicas)
+                self._refresh_replicas_async(scope, name, did)
+                return pfn_file_replicas
+
             attached_files = self.db.get_attached_files(self.namespace, did)
             if attached_files:
                 logger.debug("Found %d attached files in DB for '%s'.", len(attached_files), did)
@@ -214,9 +375,10 @@ class ReplicaModeHandler:
 
         pfn_file_replicas = None
         if attached_files:
-            pfn_file_replicas = self.get_all_pfn_file_replicas_from_db(attached_files)
+            pfn_file_replicas = self.get_all_pfn_file_replicas_from_db(attached_files, did)
             if pfn_file_replicas:
                 logger.debug("Successfully retrieved PFN file replicas from DB for '%s'. Count: %d", did, len(pfn_file_replicas))
+                self._put_did_details_cache(did, pfn_file_replicas)
                 
                 # Optimistic refresh: return cached data immediately, refresh in background
                 if not force_fetch:
@@ -269,12 +431,20 @@ class ReplicaModeHandler:
     def _refresh_replicas_async(self, scope, name, did):
         """
         Refreshes replicas in the background without blocking the current request.
+        Replicas of DIDs covered by the rule watcher are only refreshed when their rule changes.
 
         Args:
             scope (str): The scope of the DID.
             name (str): The name of the DID.
             did (str): The full DID string.
         """
+        if self._get_covering_rule_watcher(did) is not None:
+            logger.debug("Replicas of '%s' are refreshed when its replication rule changes.", did)
+            return
+
+        self._schedule_replica_refresh(scope, name, did)
+
+    def _schedule_replica_refresh(self, scope, name, did):
         def _refresh():
             try:
                 logger.debug("Background refresh started for '%s'.", did)
@@ -290,13 +460,15 @@ class ReplicaModeHandler:
 
         self._schedule_fetch_task(did, _refresh, "background_refresh")
 
-    def get_all_pfn_file_replicas_from_db(self, attached_files):
+    def get_all_pfn_file_replicas_from_db(self, attached_files, did=None):
         """
         Retrieves all PFN file replicas from the database based on a list of attached files.
-        Uses bulk query to avoid N+1 problem with large datasets.
+        Replicas missing from the cache, e.g. expired ones, are fetched from Rucio in bulk in the
+        background instead of fetching the replicas of the whole dataset again.
 
         Args:
             attached_files (list[AttachedFile]): A list of AttachedFile objects.
+            did (str): The DID the files are attached to, under which the missing replicas are fetched.
 
         Returns:
             list[PfnFileReplica] or None: A list of PfnFileReplica objects if all found, else None.
@@ -305,36 +477,51 @@ class ReplicaModeHandler:
         start_time = time.time()
         count = len(attached_files)
         logger.debug("Retrieving %d PFN file replicas from DB.", count)
-        
-        # Extract all DIDs and use bulk query
+
         file_dids = [af.did for af in attached_files]
-        replica_dict = self.db.get_file_replicas_bulk(self.namespace, file_dids)
-        
-        if replica_dict is None:
-            logger.warning("Incomplete cache - some replicas not found in DB.")
+        replica_dict, missing_dids = self.db.lookup_file_replicas(self.namespace, file_dids)
+
+        if missing_dids:
+            logger.warning("Incomplete cache - %d of %d replicas not found in DB.", len(missing_dids), count)
+            if did is not None and len(missing_dids) <= PARTIAL_FETCH_MAX_DIDS:
+                missing = set(missing_dids)
+                self._schedule_missing_replicas_fetch(did, [af for af in attached_files if af.did in missing])
             return None
-        
+
         # Build result list in same order as input
-        pfn_file_replicas = []
-        for attached_file in attached_files:
-            db_file_replica = replica_dict.get(attached_file.did)
-            if db_file_replica is None:
-                # This shouldn't happen given the check above, but be defensive
-                logger.warning("File replica for '%s' not in bulk result.", attached_file.did)
-                return None
-            
-            pfn_file_replica = PfnFileReplica(
-                did=db_file_replica.did, 
-                pfn=db_file_replica.pfn, 
-                size=db_file_replica.size
-            )
-            pfn_file_replicas.append(pfn_file_replica)
+        pfn_file_replicas = [replica_dict[attached_file.did] for attached_file in attached_files]
 
         duration = time.time() - start_time
         logger.info("Retrieved %d PFN file replicas from DB in %.2fs (%.0f replicas/sec)", 
                    count, duration, count/duration if duration > 0 else 0)
         return pfn_file_replicas
 
+    def _schedule_missing_replicas_fetch(self, did, missing_files):
+        """
+        Fetches the replicas of some files attached to a DID in the background. The fetch counts as
+        in progress for the DID, so that callers return the FETCHING placeholder until it is done.
+        Files which Rucio does not return anymore are stored without a PFN, so that they are not fetched
+        again on every poll.
+        """
+        def _fetch():
+            try:
+                logger.info("Fetching %d replicas of '%s' missing from the DB.", len(missing_files), did)
+                fetched_file_replicas = self.fetch_file_replicas_bulk([af.did for af in missing_files])
+                fetched_dids = {replica.did for replica in fetched_file_replicas}
+                unknown_file_replicas = [PfnFileReplica(did=af.did, pfn=None, size=af.size) for af in missing_files
+                                         if af.did not in fetched_dids]
+                if unknown_file_replicas:
+                    logger.warning("Rucio returned no replica for %d files of '%s'.", len(unknown_file_replicas), did)
+
+                with self._write_lock:
+                    self.db.set_file_replicas_bulk(self.namespace, fetched_file_replicas + unknown_file_replicas, ttl=self.file_replicas_ttl)
+                    self.db.increment_attached_files_version(self.namespace, did)
+                ReplicaModeHandler.did_details_cache.invalidate(self._did_details_cache_key(did))
+            except Exception as e:
+                logger.error("Fetching the missing replicas of '%s' failed: %s", did, e, exc_info=True)
+
+        self._schedule_fetch_task(did, _fetch, "missing_replicas_fetch")
+
     def fetch_file_replicas(self, scope, name):
         """
         Fetches file replicas for a given DID from Rucio.
@@ -351,25 +538,116 @@ class ReplicaModeHandler:
         logger.info("Fetching file replicas from Rucio for '%s:%s'.", scope, name)
         destination_rse = self.rucio.instance_config.get('destination_rse')
 
-        replicas = []
+        # Track statistics to avoid thousands of log lines
+        stats = {'available': 0, 'unavailable': 0, 'no_pfn': 0}
+        rucio_replica_mapper = self._make_replica_mapper(destination_rse, stats)
+
         try:
-            rucio_replicas = self.rucio.get_replicas(scope, name)
-            fetch_duration = time.time() - start_time
-            logger.info("Rucio returned %d raw replicas for '%s:%s' in %.2fs.", 
-                       len(rucio_replicas), scope, name, fetch_duration)
+            # Replicas are parsed and mapped one by one as they are streamed, so the raw response is never held in memory.
+            # Only the destination RSE is requested, as PFNs on any other RSE are discarded by the mapper anyway.
+            rucio_replicas = self.rucio.get_replicas(scope, name, rse_expression=destination_rse, stream=True)
+            replicas = utils.map(rucio_replicas, rucio_replica_mapper)
         except Exception as e:
             logger.error("Failed to fetch replicas from Rucio for '%s:%s'. Error: %s", scope, name, e, exc_info=True)
             return []  # Return empty list on error
 
-        # Track statistics to avoid thousands of log lines
+        total_duration = time.time() - start_time
+        logger.info("Processed %d replicas for '%s:%s' in %.2fs: %d available, %d unavailable, %d missing PFN", 
+                   len(replicas), scope, name, total_duration, 
+                   stats['available'], stats['unavailable'], stats['no_pfn'])
+        return replicas
+
+    def fetch_file_replicas_bulk(self, dids):
+        """
+        Fetches the replicas of many file DIDs from Rucio with a single bulk request per chunk.
+
+        Args:
+            dids (list[str]): The file DIDs, in 'scope:name' format.
+
+        Returns:
+            list[PfnFileReplica]: A list of PfnFileReplica objects. DIDs unknown to Rucio are omitted.
+        """
+        import time
+        start_time = time.time()
+        logger.info("Fetching file replicas from Rucio for %d DIDs in bulk.", len(dids))
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+
         stats = {'available': 0, 'unavailable': 0, 'no_pfn': 0}
-        
+        rucio_replica_mapper = self._make_replica_mapper(destination_rse, stats)
+
+        rucio_dids = []
+        for did in dids:
+            scope, name = did.split(':', 1)
+            rucio_dids.append({'scope': scope, 'name': name})
+
+        rucio_replicas = self.rucio.list_replicas_bulk(rucio_dids, rse_expression=destination_rse)
+        replicas = utils.map(rucio_replicas, rucio_replica_mapper)
+
+        total_duration = time.time() - start_time
+        logger.info("Processed %d replicas for %d DIDs in %.2fs: %d available, %d unavailable, %d missing PFN",
+                    len(replicas), len(dids), total_duration,
+                    stats['available'], stats['unavailable'], stats['no_pfn'])
+        return replicas
+
+    def get_file_dids_details(self, dids):
+        """
+        Retrieves details for many file DIDs at once, resolving and caching all of them
+        with bulk Rucio calls instead of one request per DID.
+
+        Args:
+            dids (list[str]): The file DIDs, in 'scope:name' format.
+
+        Returns:
+            list[dict]: A list of dictionaries, each containing status, DID, path, size, and PFN.
+                        DIDs unknown to Rucio are reported as NOT_AVAILABLE, and all DIDs as FAILED
+                        along with the error if the replicas could not be fetched.
+        """
+        logger.info("Getting DID details for %d file DIDs in bulk.", len(dids))
+        try:
+            fetched_file_replicas = self.fetch_file_replicas_bulk(dids)
+        except Exception as e:
+            logger.error("Failed to fetch replicas from Rucio for %d file DIDs. Error: %s", len(dids), e, exc_info=True)
+            error = getattr(e, 'message', None) or str(e)
+            return [dict(status=ReplicaModeHandler.STATUS_FAILED, did=did, path=None, size=None, pfn=None, error=error)
+                    for did in dict.fromkeys(dids)]
+
+        self._cache_file_replicas(fetched_file_replicas)
+
+        # Rule statuses are resolved once per file without PFN, in bulk where they are not cached
+        statuses = self.get_did_statuses([file_replica.did for file_replica in fetched_file_replicas if not file_replica.pfn])
+
+        def result_mapper(file_replica, _):
+            file_did = file_replica.did
+            pfn = file_replica.pfn
+            size = file_replica.size
+
+            if pfn:
+                return dict(status=ReplicaModeHandler.STATUS_OK, did=file_did, path=self.translate_pfn_to_path(pfn), size=size, pfn=pfn)
+
+            status = statuses[file_did]
+            # The replica is not there yet although the rule is already OK, the judger has not caught up
+            result_status = status if status != ReplicaModeHandler.STATUS_OK else ReplicaModeHandler.STATUS_REPLICATING
+            return dict(status=result_status, did=file_did, path=None, size=size, pfn=None)
+
+        results = utils.map(fetched_file_replicas, result_mapper)
+
+        # Report DIDs unknown to Rucio instead of leaving them out, so that clients stop polling them
+        fetched_dids = {file_replica.did for file_replica in fetched_file_replicas}
+        results += [dict(status=ReplicaModeHandler.STATUS_NOT_AVAILABLE, did=did, path=None, size=None, pfn=None)
+                    for did in dict.fromkeys(dids) if did not in fetched_dids]
+        logger.info("Finished getting DID details for %d file DIDs. Returned %d results.", len(dids), len(results))
+        return results
+
+    def _make_replica_mapper(self, destination_rse, stats):
+        """
+        Returns a mapper turning a Rucio replica record into a PfnFileReplica on the destination RSE.
+        """
         def rucio_replica_mapper(rucio_replica, _):
             rses = rucio_replica.get('rses', {})
             scope = rucio_replica.get('scope')
             name = rucio_replica.get('name')
             size = rucio_replica.get('bytes')
-            states = rucio_replica.get('states')    # If there is no replica, states is omitted
+            states = rucio_replica.get('states') or {}    # If there is no replica, states is omitted
 
             pfn = None
             if destination_rse in rses and destination_rse in states:
@@ -388,17 +666,15 @@ class ReplicaModeHandler:
             did = scope + ':' + name
             return PfnFileReplica(pfn=pfn, did=did, size=size)
 
-        replicas = utils.map(rucio_replicas, rucio_replica_mapper)
-        total_duration = time.time() - start_time
-        logger.info("Processed %d replicas for '%s:%s' in %.2fs: %d available, %d unavailable, %d missing PFN", 
-                   len(replicas), scope, name, total_duration, 
-                   stats['available'], stats['unavailable'], stats['no_pfn'])
-        return replicas
+        return rucio_replica_mapper
 
     def get_did_status(self, scope, name):
         """
         Determines the replication status of a DID.
 
+        The replication rule is cached per DID and destination RSE. A cached rule past its fresh window
+        is served while it is fetched again in the background, so polls do not wait for Rucio.
+
         Args:
             scope (str): The scope of the DID.
             name (str): The name of the DID.
@@ -407,18 +683,169 @@ class ReplicaModeHandler:
             str: The status (e.g., STATUS_NOT_AVAILABLE, STATUS_REPLICATING, STATUS_OK, STATUS_STUCK).
         """
         logger.info("Getting DID status for '%s:%s'.", scope, name)
-        status = ReplicaModeHandler.STATUS_NOT_AVAILABLE
-        replication_rule = self.fetch_replication_rule_by_did(scope, name)
-        if replication_rule is not None:
-            _, replication_status, _ = replication_rule
-            status = replication_status
-            logger.debug("Replication rule found, status: '%s'.", status)
-        else:
-            logger.debug("No replication rule found for '%s:%s'. Status remains '%s'.", scope, name, status)
+        status = self._get_cached_did_status(scope, name)
+        if status is not None:
+            return status
 
+        status = self._refresh_replication_rule(scope, name)
         logger.info("Determined DID status for '%s:%s': %s.", scope, name, status)
         return status
 
+    def get_did_statuses(self, dids):
+        """
+        Determines the replication status of many DIDs as get_did_status() does. The rules which are neither
+        watched nor cached are looked up with a single listing of the rules of the account on the destination
+        RSE, only DIDs without a rule in that listing are looked up one by one.
+
+        Args:
+            dids (list[str]): The DIDs, in 'scope:name' format.
+
+        Returns:
+            dict: The status of each distinct DID.
+        """
+        statuses = dict()
+        uncached = dict()
+        for did in dict.fromkeys(dids):
+            scope, name = did.split(':', 1)
+            status = self._get_cached_did_status(scope, name)
+            if status is None:
+                uncached[did] = None
+            else:
+                statuses[did] = status
+
+        account = (self.rucio.auth_config or {}).get('account')
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+        if len(uncached) > 1 and account and destination_rse:
+            listed = dict()
+            try:
+                for rule in self.rucio.list_rules({'account': account, 'rse_expression': destination_rse}):
+                    rule_did = f"{rule['scope']}:{rule['name']}"
+                    if rule_did in uncached:
+                        # Keep the first rule of a DID, as the per-DID lookup does
+                        listed.setdefault(rule_did, rule)
+            except Exception as e:
+                logger.error("Failed to list the rules of '%s' on '%s'. Error: %s", account, destination_rse, e, exc_info=True)
+
+            for did in uncached:
+                if did in listed:
+                    replication_rule = self._parse_rule(listed[did])
+                    self.db.set_replication_rule(self.namespace, did, destination_rse, replication_rule, ttl=self.replication_rules_ttl)
+                    statuses[did] = self._get_rule_status(replication_rule)
+
+        for did in uncached:
+            if did not in statuses:
+                scope, name = did.split(':', 1)
+                statuses[did] = self.get_did_status(scope, name)
+        return statuses
+
+    def _get_cached_did_status(self, scope, name):
+        # Returns the status of a DID from the rule watcher or the rule cache, None if it has to be fetched
+        did = scope + ':' + name
+        watcher = self._get_covering_rule_watcher(did)
+        if watcher is not None:
+            status = self._get_rule_status(self._parse_rule(watcher.get_rule(did)))
+            logger.debug("Serving replication rule status '%s' of '%s' from the rule watcher.", status, did)
+            return status
+
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+        cached = self.db.get_replication_rule(self.namespace, did, destination_rse, self.replication_rules_ttl['max_stale'])
+        if cached is None:
+            return None
+
+        replication_rule, stale = cached
+        status = self._get_rule_status(replication_rule)
+        if stale:
+            self._schedule_fetch_task(did + '|rule', lambda: self._refresh_replication_rule(scope, name, status), "rule_refresh")
+        logger.debug("Serving cached replication rule status '%s' of '%s' (stale=%s).", status, did, stale)
+        return status
+
+    def _refresh_replication_rule(self, scope, name, previous_status=None):
+        """
+        Fetches the replication rule of a DID and caches it. When the rule turns OK, the cached replicas
+        of the DID are dropped, as they were stored while the files were still being replicated.
+
+        Returns:
+            str: The new status, or previous_status if the rule could not be fetched.
+        """
+        did = scope + ':' + name
+        try:
+            replication_rule = self._fetch_replication_rule(scope, name)
+        except Exception as e:
+            logger.error("Failed to fetch rules from Rucio for '%s'. Error: %s", did, e, exc_info=True)
+            return previous_status or ReplicaModeHandler.STATUS_NOT_AVAILABLE
+
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+        self.db.set_replication_rule(self.namespace, did, destination_rse, replication_rule, ttl=self.replication_rules_ttl)
+
+        status = self._get_rule_status(replication_rule)
+        if status == ReplicaModeHandler.STATUS_OK and previous_status not in (None, ReplicaModeHandler.STATUS_OK):
+            self._invalidate_replicas(did, previous_status, status)
+        return status
+
+    def _apply_rule_change(self, did, previous_rule, rule):
+        """
+        Stores a replication rule change reported by the rule watcher. Replicas of the DID are dropped if the
+        rule turned OK, and refreshed in the background if they are cached and the rule changed otherwise,
+        e.g. because files got replicated.
+
+        Args:
+            did (str): The DID of the rule.
+            previous_rule (dict): The rule in the previous listing, None if it was not listed.
+            rule (dict): The rule in the current listing, None if it is not listed anymore.
+        """
+        replication_rule = self._parse_rule(rule)
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+        self.db.set_replication_rule(self.namespace, did, destination_rse, replication_rule, ttl=self.replication_rules_ttl)
+
+        previous_status = self._get_rule_status(self._parse_rule(previous_rule))
+        status = self._get_rule_status(replication_rule)
+        if status == ReplicaModeHandler.STATUS_OK and previous_status != ReplicaModeHandler.STATUS_OK:
+            self._invalidate_replicas(did, previous_status, status)
+        elif self.db.get_attached_files_version(self.namespace, did) is not None:
+            scope, name = did.split(':', 1)
+            self._schedule_replica_refresh(scope, name, did)
+
+    def _invalidate_replicas(self, did, previous_status, status):
+        logger.info("Replication rule of '%s' turned %s from %s, invalidating its cached replicas.", did, status, previous_status)
+        with self._write_lock:
+            self.db.invalidate_cache(self.namespace, did, tables=['attached_files', 'file_replicas'])
+        ReplicaModeHandler.did_details_cache.invalidate(self._did_details_cache_key(did))
+
+    def _get_rule_watcher(self):
+        """
+        Returns the watcher of the replication rules of the account on the destination RSE, starting it if needed,
+        or None if it is disabled or the account is unknown.
+        """
+        interval = self.rucio.instance_config.get('rule_watcher_interval', DEFAULT_WATCH_INTERVAL)
+        account = (self.rucio.auth_config or {}).get('account')
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+        if not interval or not account or not destination_rse:
+            return None
+
+        namespace, rucio = self.namespace, self.rucio
+
+        def list_rules():
+            return rucio.list_rules({'account': account, 'rse_expression': destination_rse})
+
+        def on_change(did, previous_rule, rule):
+            ReplicaModeHandler(namespace, rucio)._apply_rule_change(did, previous_rule, rule)   # pylint: disable=protected-access
+
+        return RuleWatcher.watch((namespace, account, destination_rse), list_rules, on_change, interval)
+
+    def _get_covering_rule_watcher(self, did):
+        # Returns the rule watcher if its latest listing is current and includes the rule of the DID
+        watcher = self._get_rule_watcher()
+        if watcher is not None and watcher.is_current() and watcher.covers(did):
+            return watcher
+        return None
+
+    @staticmethod
+    def _get_rule_status(replication_rule):
+        if replication_rule is None:
+            return ReplicaModeHandler.STATUS_NOT_AVAILABLE
+        _, status, _ = replication_rule
+        return status
+
     def fetch_replication_rule_by_did(self, scope, name):
         """
         Fetches the replication rule for a DID by ID.
@@ -430,30 +857,36 @@ class ReplicaModeHandler:
         Returns:
             tuple or None: (rule_id, status, expires_at) or None if no rule found.
         """
-        logger.info("Fetching replication rule for DID '%s:%s'.", scope, name)
-        destination_rse = self.rucio.instance_config.get('destination_rse')
-        logger.debug("Filtering rules for destination RSE: '%s'.", destination_rse)
-
         try:
-            rules = self.rucio.get_rules(scope, name)
-            logger.debug("Rucio returned %d rules for '%s:%s'.", len(rules), scope, name)
+            return self._fetch_replication_rule(scope, name)
         except Exception as e:
             logger.error("Failed to fetch rules from Rucio for '%s:%s'. Error: %s", scope, name, e, exc_info=True)
             return None  # Return None on error
 
+    def _fetch_replication_rule(self, scope, name):
+        logger.info("Fetching replication rule for DID '%s:%s'.", scope, name)
+        destination_rse = self.rucio.instance_config.get('destination_rse')
+        logger.debug("Filtering rules for destination RSE: '%s'.", destination_rse)
+
+        # Not through the response cache, the rule is cached by the caller
+        rules = self.rucio.get_rules(scope, name, stream=True)
         filtered_rules = utils.filter(rules, lambda x, _: x['rse_expression'] == destination_rse)
+        logger.debug("Rucio returned %d rules for '%s:%s' on '%s'.", len(filtered_rules), scope, name, destination_rse)
 
         if filtered_rules:
-            replication_rule = filtered_rules[0]
-            rule_id = replication_rule.get('id')
-            parsed_status = self.parse_rule_status(replication_rule.get('state'))
-            expires_at = replication_rule.get('expires_at')
+            rule_id, parsed_status, expires_at = self._parse_rule(filtered_rules[0])
             logger.info("Found replication rule for '%s:%s': ID=%s, Status='%s', Expires='%s'.", scope, name, rule_id, parsed_status, expires_at)
             return (rule_id, parsed_status, expires_at)
         else:
             logger.info("No replication rule found for '%s:%s' matching destination RSE '%s'.", scope, name, destination_rse)
             return None
 
+    def _parse_rule(self, rule):
+        # Returns the (rule_id, status, expires_at) tuple of a rule as listed by Rucio
+        if rule is None:
+            return None
+        return (rule.get('id'), self.parse_rule_status(rule.get('state')), rule.get('expires_at'))
+
     def parse_rule_status(self, status):
         """
         Parses a Rucio rule status string into a standardized ReplicaModeHandler status.
@@ -518,6 +951,7 @@ class ReplicaModeHandler:
         Should be called when the handler is no longer needed.
         """
         logger.info("Shutting down ReplicaModeHandler executor...")
+        RuleWatcher.stop_all()
         cls._executor.shutdown(wait=True)
         logger.info("ReplicaModeHandler executor shut down complete.")
 
@@ -532,14 +966,42 @@ class ReplicaModeHandler:
         start_time = time.time()
         count = len(fetched_file_replicas)
         
-        attached_dids = [AttachedFile(did=replica.did, size=replica.size) for replica in fetched_file_replicas]
+        # Only the difference with the cached state is written, polling an unchanged dataset just extends the expiry
         with self._write_lock:
-            self.db.set_file_replicas_bulk(self.namespace, fetched_file_replicas)
-            self.db.set_attached_files(self.namespace, did, attached_dids)
-        
+            changes = self.db.sync_attached_file_replicas(self.namespace, did, fetched_file_replicas,
+                                                          ttl=self.attached_files_ttl, replica_ttl=self.file_replicas_ttl)
+
+        if changes['added'] or changes['removed'] or changes['changed']:
+            ReplicaModeHandler.did_details_cache.invalidate(self._did_details_cache_key(did))
+
         duration = time.time() - start_time
-        logger.info("Cached %d replicas for '%s' to DB in %.2fs (%.0f replicas/sec)", 
-                   count, did, duration, count/duration if duration > 0 else 0)
+        logger.info("Cached %d replicas for '%s' to DB in %.2fs (%.0f replicas/sec): %d added, %d removed, %d changed, version %d",
+                    count, did, duration, count/duration if duration > 0 else 0,
+                    changes['added'], changes['removed'], changes['changed'], changes['version'])
+
+    def _cache_file_replicas(self, file_replicas):
+        """
+        Persist replicas of file DIDs, each file DID being attached to itself.
+        """
+        if not file_replicas:
+            return
+
+        attached_files = {replica.did: [AttachedFile(did=replica.did, size=replica.size)] for replica in file_replicas}
+        with self._write_lock:
+            self.db.set_file_replicas_bulk(self.namespace, file_replicas, ttl=self.file_replicas_ttl)
+            self.db.set_attached_files_bulk(self.namespace, attached_files, ttl=self.attached_files_ttl)
+        for did in attached_files:
+            ReplicaModeHandler.did_details_cache.invalidate(self._did_details_cache_key(did))
+
+        logger.info("Cached %d file replicas to DB.", len(file_replicas))
+
+    def _did_details_cache_key(self, did):
+        return f"{self.namespace}|{did}"
+
+    def _put_did_details_cache(self, did, pfn_file_replicas):
+        # Rough in-memory footprint: the strings plus a fixed per-object overhead
+        size = sum(len(r.did) + len(r.pfn or '') + 200 for r in pfn_file_replicas)
+        ReplicaModeHandler.did_details_cache.put(self._did_details_cache_key(did), pfn_file_replicas, size=size)
 
     def _schedule_fetch_task(self, did, worker, label):
         """
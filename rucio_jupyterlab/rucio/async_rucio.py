@@ -0,0 +1,366 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import json
+import logging
+import weakref
+from urllib.parse import urlencode
+from tornado.httpclient import HTTPRequest, HTTPClientError
+from tornado.ioloop import IOLoop
+from tornado.iostream import StreamClosedError
+from rucio_jupyterlab.rucio.exceptions import RucioAPIException, RucioRequestsException, RucioHTTPException
+from rucio_jupyterlab.rucio.session import DEFAULT_POOL_SIZE
+from rucio_jupyterlab.rucio.token_refresher import AuthTokenRefresher
+
+from tornado.simple_httpclient import SimpleAsyncHTTPClient
+
+try:
+    # libcurl keeps connections alive between requests, pycurl is a dependency of the extension
+    import pycurl
+    from tornado.curl_httpclient import CurlAsyncHTTPClient as HTTPClientClass
+except ImportError:  # pragma: no cover
+    pycurl = None
+    HTTPClientClass = SimpleAsyncHTTPClient
+
+logger = logging.getLogger(__name__)
+
+CONNECT_TIMEOUT = 20  # seconds
+REQUEST_TIMEOUT = 600  # seconds, replica listings of large datasets can take minutes
+BULK_METADATA_CHUNK_SIZE = 500
+# The simple client rejects bodies above 100 MB by default, even streamed ones, which replica listings of large datasets exceed
+MAX_BODY_SIZE = 16 * 1024 ** 3
+
+
+class _HTTPResponseAdapter:
+    """
+    Exposes a Tornado HTTPResponse with the attributes RucioAPIException reads from a requests.Response.
+    """
+
+    def __init__(self, response):
+        self.status_code = response.code
+        self.reason = response.reason
+        self.headers = response.headers
+        self.text = response.body.decode('utf-8', errors='replace') if response.body else ''
+
+
+class AsyncRucioAPI:
+    """
+    Non-blocking counterpart of RucioAPI, to be awaited directly from the Tornado event loop.
+
+    It wraps a RucioAPI object for configuration, authentication, request parameters and the
+    response cache, but performs the HTTP requests with Tornado's AsyncHTTPClient. Concurrency
+    is bounded by the number of connections per Rucio server (`http_pool_size`) instead of the
+    number of executor threads. Concurrent identical GETs share a single upstream request.
+    """
+
+    _clients = weakref.WeakKeyDictionary()
+    _inflight = dict()
+    _bulk_metadata_unsupported = set()
+
+    def __init__(self, rucio):
+        self.rucio = rucio
+        self.instance_config = rucio.instance_config
+        self.base_url = rucio.base_url
+
+    async def get_scopes(self):
+        return await self._fetch_cached('scopes', 'scopes/')
+
+    async def get_rses(self, rse_expression=None):
+        params = {'expression': rse_expression} if rse_expression else None
+        return await self._fetch_cached('rses', 'rses', params=params, parse_lines=True)
+
+    async def search_did(self, scope, name, search_type='collection', filters=None, limit=None, offset=0):
+        """
+        Non-blocking RucioAPI.search_did(). The first `offset` records are skipped unparsed while streaming,
+        and the connection is dropped once `limit` more records have arrived.
+        """
+        params = self.rucio._search_did_params(name, search_type, filters, limit, offset)
+        return await self._fetch('GET', f'dids/{scope}/dids/search', params=params, parse_lines=True,
+                                 skip_records=offset, max_records=limit)
+
+    async def get_metadata(self, scope, name):
+        return await self._fetch('GET', 'dids', scope, name + '/meta', parse_json=False)
+
+    async def get_metadata_bulk(self, dids, chunk_size=BULK_METADATA_CHUNK_SIZE):
+        """
+        Returns the metadata of many DIDs as a dict keyed by (scope, name).
+
+        Metadata is cached per DID. Uncached DIDs are resolved with POST /dids/bulkmeta, one request
+        per chunk, falling back to concurrent GET /dids/{scope}/{name}/meta requests on Rucio servers
+        without the bulk endpoint.
+
+        :param dids: A list of {'scope': ..., 'name': ...} dicts.
+        :param chunk_size: Maximum number of DIDs sent in a single bulk request.
+        """
+        ttl = self.rucio.response_cache_ttl.get('metadata')
+        response_cache = self.rucio.response_cache
+        store = self.rucio._response_cache_store()
+
+        result = dict()
+        missing = dict()
+        for did in dids:
+            key = (did['scope'], did['name'])
+            cached = response_cache.lookup(self._metadata_cache_key(*key), ttl, store) if ttl else None
+            if cached is not None and not cached[1]:
+                result[key] = cached[0]
+            else:
+                missing[key] = {'scope': did['scope'], 'name': did['name']}
+
+        if not missing:
+            return result
+
+        missing = list(missing.values())
+        if self.base_url in AsyncRucioAPI._bulk_metadata_unsupported:
+            fetched = await self._get_metadata_concurrently(missing)
+        else:
+            try:
+                fetched = await self._get_metadata_in_bulk(missing, chunk_size)
+            except RucioHTTPException as e:
+                # A missing route has no Rucio exception class, unlike e.g. DataIdentifierNotFound
+                if e.status_code not in (404, 405) or e.exception_class:
+                    raise
+                logger.info("Rucio server at %s does not support bulk metadata, falling back to individual requests", self.base_url)
+                AsyncRucioAPI._bulk_metadata_unsupported.add(self.base_url)
+                fetched = await self._get_metadata_concurrently(missing)
+
+        for key, metadata in fetched:
+            result[key] = metadata
+            if ttl:
+                response_cache.put(self._metadata_cache_key(*key), metadata, store)
+
+        return result
+
+    async def _get_metadata_in_bulk(self, dids, chunk_size):
+        async def fetch_chunk(chunk):
+            data = json.dumps({'dids': chunk, 'inherit': False, 'plugin': 'DID_COLUMN'})
+            return await self._fetch('POST', 'dids/bulkmeta', data=data, parse_lines=True)
+
+        chunks = [dids[i:i + chunk_size] for i in range(0, len(dids), chunk_size)]
+        responses = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks))
+        return [((metadata['scope'], metadata['name']), metadata) for response in responses for metadata in response]
+
+    async def _get_metadata_concurrently(self, dids):
+        # Bound the fan-out so a large page does not flood the HTTP client queue
+        semaphore = asyncio.Semaphore(self.rucio.http_pool_size or DEFAULT_POOL_SIZE)
+
+        async def fetch_one(did):
+            async with semaphore:
+                metadata = await self.get_metadata(did['scope'], did['name'])
+            return (did['scope'], did['name']), json.loads(metadata)
+
+        return await asyncio.gather(*(fetch_one(did) for did in dids))
+
+    def _metadata_cache_key(self, scope, name):
+        return self.rucio._response_cache_key('dids', scope, name + '/meta')
+
+    async def get_files(self, scope, name):
+        return await self._fetch('GET', 'dids', scope, name + '/files', parse_lines=True)
+
+    async def get_rules(self, scope, name):
+        return await self._fetch_cached('rules', 'dids', scope, name + '/rules', parse_lines=True)
+
+    async def get_replicas(self, scope, name, rse_expression=None, schemes=None, all_states=False, map_record=None):
+        """
+        :param map_record: Optional function applied to each record as it is received, so that only the
+                           mapped values are kept in memory. Pass a module-level function, requests are
+                           only shared between calls with the same mapper.
+        """
+        params = self.rucio._replicas_params(rse_expression, schemes, all_states)
+        return await self._fetch('GET', 'replicas', scope, name, params=params, parse_lines=True, map_record=map_record)
+
+    async def _fetch_cached(self, cache_name, endpoint, scope=None, name=None, params=None, parse_lines=False):
+        ttl = self.rucio.response_cache_ttl.get(cache_name)
+        if not ttl:
+            return await self._fetch('GET', endpoint, scope, name, params=params, parse_lines=parse_lines)
+
+        response_cache = self.rucio.response_cache
+        key = self.rucio._response_cache_key(endpoint, scope, name, params)
+        store = self.rucio._response_cache_store()
+
+        async def load():
+            value = await self._fetch('GET', endpoint, scope, name, params=params, parse_lines=parse_lines)
+            response_cache.put(key, value, store)
+            return value
+
+        cached = response_cache.lookup(key, ttl, store)
+        if cached is None:
+            return await load()
+
+        value, stale = cached
+        if stale:
+            IOLoop.current().spawn_callback(self._refresh_cached, key, load)
+        return value
+
+    @staticmethod
+    async def _refresh_cached(key, load):
+        try:
+            await load()
+        except Exception as e:
+            logger.warning("Background refresh of cached response '%s' failed: %s", key, e)
+
+    async def _fetch(self, method, endpoint, scope=None, name=None, params=None, data=None, parse_json=True, parse_lines=False,
+                     map_record=None, skip_records=0, max_records=None):
+        url = self.rucio._build_url(endpoint, scope, name)
+        if params:
+            url += '?' + urlencode(params)
+
+        if method.upper() != 'GET':
+            return await self._send(method, url, data, parse_json, parse_lines, map_record, skip_records, max_records)
+
+        account = (self.rucio.auth_config or {}).get('account')
+        key = (self.instance_config.get('name'), method.upper(), url, self.rucio.auth_type, account, parse_json, parse_lines, map_record,
+               skip_records, max_records)
+
+        inflight = AsyncRucioAPI._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.ensure_future(self._send(method, url, data, parse_json, parse_lines, map_record, skip_records, max_records))
+        AsyncRucioAPI._inflight[key] = future
+
+        def _cleanup(_):
+            if AsyncRucioAPI._inflight.get(key) is future:
+                AsyncRucioAPI._inflight.pop(key)
+
+        future.add_done_callback(_cleanup)
+        return await asyncio.shield(future)
+
+    async def _send(self, method, url, data, parse_json, parse_lines, map_record=None, skip_records=0, max_records=None):
+        """
+        :param skip_records: Number of leading records to discard without parsing them.
+        :param max_records: Number of records after which the response is no longer read, all of them if None.
+        """
+        try:
+            token = await self._get_auth_token()
+            records = []
+            pending = bytearray()
+            parse_errors = []
+            status = []
+            seen = [0]
+            stopped = []
+
+            def add_record(line):
+                # Returns False once enough records were read
+                seen[0] += 1
+                if seen[0] > skip_records:
+                    record = json.loads(line)
+                    records.append(map_record(record) if map_record else record)
+                return max_records is None or len(records) < max_records
+
+            def on_chunk(chunk):
+                # Parse newline-delimited records as they arrive instead of buffering the whole body.
+                # Error bodies also end up here, so parse failures are only raised for successful responses.
+                if stopped:
+                    return      # The simple client cannot be aborted, the rest of the body is discarded
+                pending.extend(chunk)
+                *lines, rest = pending.split(b'\n')
+                pending[:] = rest
+                try:
+                    for line in lines:
+                        if line.strip() and not add_record(line):
+                            stopped.append(True)
+                            break
+                except Exception as e:
+                    parse_errors.append(e)
+
+            def on_header(line):
+                # The curl client queues these calls, they run before the request completes but possibly after some chunks
+                if line.startswith('HTTP/'):
+                    status[:] = [int(line.split(' ', 2)[1])]
+
+            def prepare_curl(curl):
+                # The curl client hands chunks to streaming_callback later on, writing less than the chunk
+                # from the write function itself is what makes libcurl drop the transfer
+                def write(chunk):
+                    on_chunk(chunk)
+                    return 0 if stopped else None
+
+                curl.setopt(pycurl.WRITEFUNCTION, write)
+
+            streaming = parse_lines and max_records is not None
+            request = HTTPRequest(
+                url=url,
+                method=method.upper(),
+                headers={'X-Rucio-Auth-Token': token},
+                body=data,
+                streaming_callback=on_chunk if parse_lines else None,
+                header_callback=on_header if streaming else None,
+                prepare_curl_callback=prepare_curl if streaming and HTTPClientClass is not SimpleAsyncHTTPClient else None,
+                connect_timeout=CONNECT_TIMEOUT,
+                request_timeout=REQUEST_TIMEOUT,
+                **self._tls_options()
+            )
+            try:
+                response = await self._get_client().fetch(request)
+                logger.debug("AsyncRucioAPI: %s request to %s returned %s", method.upper(), url, response.code)
+            except HTTPClientError as e:
+                # Only an abort of a successful response is ours, error bodies are not records
+                if not stopped or e.code != 599 or status != [200]:
+                    raise
+                logger.debug("AsyncRucioAPI: %s request to %s closed after %d records", method.upper(), url, len(records))
+
+            if parse_lines:
+                if parse_errors:
+                    raise parse_errors[0]
+                if pending.strip() and not stopped:
+                    add_record(pending)
+                return records
+
+            body = response.body.decode('utf-8') if response.body else ''
+            if parse_json:
+                return json.loads(body) if body else {}
+            return body
+
+        except HTTPClientError as e:
+            if e.response is not None and e.code != 599:
+                logger.error("HTTP error for %s request to %s: %s %s", method.upper(), url, e.code, e.response.reason)
+                raise RucioHTTPException(_HTTPResponseAdapter(e.response))
+
+            logger.error("Request error for %s request to %s: %s", method.upper(), url, str(e))
+            raise RucioRequestsException(e)
+        except RucioAPIException:
+            raise
+        except (OSError, StreamClosedError) as e:
+            # Connection refused, DNS and TLS failures
+            logger.error("Request error for %s request to %s: %s", method.upper(), url, str(e))
+            raise RucioRequestsException(e)
+        except Exception as e:
+            logger.error("An error occurred during the %s request to %s: %s", method.upper(), url, str(e))
+            raise RucioAPIException(None, str(e))
+
+    async def _get_auth_token(self):
+        instance_name = self.instance_config.get('name')
+        token = self.rucio._get_cached_token(instance_name)
+        if token:
+            AuthTokenRefresher.touch(instance_name)
+            return token
+
+        # Authentication is rare and goes through the blocking authenticators, keep it off the event loop
+        return await IOLoop.current().run_in_executor(None, self.rucio._get_auth_token)
+
+    def _tls_options(self):
+        ca_cert = self.rucio.rucio_ca_cert
+        if isinstance(ca_cert, str):
+            return {'ca_certs': ca_cert}
+        return {'validate_cert': bool(ca_cert)}
+
+    def _get_client(self):
+        """
+        Returns the HTTP client of the current event loop for this Rucio server,
+        limited to `http_pool_size` concurrent connections.
+        """
+        loop_clients = AsyncRucioAPI._clients.setdefault(IOLoop.current(), dict())
+        client = loop_clients.get(self.base_url)
+        if client is None:
+            max_clients = self.rucio.http_pool_size or DEFAULT_POOL_SIZE
+            options = dict()
+            if HTTPClientClass is SimpleAsyncHTTPClient:
+                logger.warning("pycurl is not installed, connections to %s are not kept alive", self.base_url)
+                options = {'max_body_size': MAX_BODY_SIZE, 'max_buffer_size': MAX_BODY_SIZE}
+            client = HTTPClientClass(force_instance=True, max_clients=max_clients, **options)
+            loop_clients[self.base_url] = client
+        return client
@@ -21,7 +21,7 @@ from rucio_jupyterlab.rucio.exceptions import RucioAuthenticationException, Ruci
 logger = logging.getLogger(__name__)
 
 
-def authenticate_userpass(base_url, username, password, account=None, vo=None, app_id=None, rucio_ca_cert=False):
+def authenticate_userpass(base_url, username, password, account=None, vo=None, app_id=None, rucio_ca_cert=False, session=None):
     response = None  # predefine response to avoid UnboundLocalError
 
     try:
@@ -40,7 +40,7 @@ def authenticate_userpass(base_url, username, password, account=None, vo=None, a
         logger.debug("Rucio CA path: %s", rucio_ca_cert)
         logger.debug("Headers: %s", headers)
 
-        response = requests.get(
+        response = (session or requests).get(
             url=f'{base_url}/auth/userpass',
             headers=headers,
             verify=rucio_ca_cert
@@ -76,7 +76,7 @@ def authenticate_userpass(base_url, username, password, account=None, vo=None, a
         raise RucioAuthenticationException(response, fallback_msg=str(e)) from e
 
 
-def authenticate_x509(base_url, cert_path, key_path=None, account=None, vo=None, app_id=None, rucio_ca_cert=False):
+def authenticate_x509(base_url, cert_path, key_path=None, account=None, vo=None, app_id=None, rucio_ca_cert=False, session=None):
     response = None  # predefine response to avoid UnboundLocalError
 
     try:
@@ -107,7 +107,7 @@ def authenticate_x509(base_url, cert_path, key_path=None, account=None, vo=None,
         logger.debug("Certificate path: %s", cert)
         logger.debug("Headers: %s", headers)
 
-        response = requests.get(
+        response = (session or requests).get(
             url=f'{base_url}/auth/x509',
             headers=headers,
             cert=cert,
@@ -142,7 +142,7 @@ def authenticate_x509(base_url, cert_path, key_path=None, account=None, vo=None,
         raise RucioAuthenticationException(response, fallback_msg=str(e)) from e
 
 
-def authenticate_oidc(base_url, oidc_auth, oidc_auth_source, rucio_ca_cert=False):
+def authenticate_oidc(base_url, oidc_auth, oidc_auth_source, rucio_ca_cert=False, session=None):
     response = None  # predefine response to avoid UnboundLocalError
 
     try:
@@ -152,7 +152,7 @@ def authenticate_oidc(base_url, oidc_auth, oidc_auth_source, rucio_ca_cert=False
 
         logger.debug("Sending OIDC validation request to %s/auth/validate", base_url)
 
-        response = requests.get(
+        response = (session or requests).get(
             url=f'{base_url}/auth/validate',
             headers=headers,
             verify=rucio_ca_cert)
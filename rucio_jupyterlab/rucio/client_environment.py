@@ -13,6 +13,7 @@ import tempfile
 import logging
 from shutil import copyfile, which
 import subprocess
+from rucio_jupyterlab.rucio.token_refresher import AuthTokenRefresher
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,7 @@ class RucioClientEnvironment:
         self.auth_type = self.rucio.auth_type
         self.auth_url = self.rucio.auth_url
         self.tempdir = None  # Initialize to None for robust cleanup
+        self.token_file_path = None
 
     def __enter__(self):
         try:
@@ -45,6 +47,13 @@ class RucioClientEnvironment:
             logger.info("Set RUCIO_HOME to: %s", rucio_home)
 
             config = self._get_config()
+            token_file_path = self.write_auth_token_file(rucio_home)
+            if token_file_path:
+                # The Rucio client reuses this token instead of authenticating again
+                config['auth_token_file_path'] = token_file_path
+                self.token_file_path = token_file_path
+                AuthTokenRefresher.add_listener(self.instance_config.get('name'), self.republish_auth_token)
+
             if not self.write_temp_config_file(rucio_home, config):
                 # The helper method logs the specific error.
                 raise RuntimeError("Failed to write rucio.cfg file. See logs for details.")
@@ -68,6 +77,9 @@ class RucioClientEnvironment:
             raise  # Re-raise the exception to the caller
 
     def __exit__(self, exc_type, exc_val, exc_tb):
+        if self.token_file_path:
+            AuthTokenRefresher.remove_listener(self.instance_config.get('name'), self.republish_auth_token)
+            self.token_file_path = None
         if self.tempdir:
             self.tempdir.cleanup()
             logger.debug("Cleaned up temporary directory: %s", self.tempdir.name)
@@ -135,6 +147,43 @@ class RucioClientEnvironment:
             logger.error("Failed to write Rucio config file at %s: %s", cfg_path, e)
             return False
 
+    def write_auth_token_file(self, base_dir):
+        try:
+            token = self.rucio._get_auth_token()
+        except Exception as e:
+            logger.warning("No auth token to share with the Rucio client, it will authenticate on its own: %s", e)
+            return None
+
+        dest_token_path = os.path.join(base_dir, 'auth_token')
+        if self._write_token(dest_token_path, token):
+            logger.info("Wrote auth token for the Rucio client to: %s", dest_token_path)
+            return dest_token_path
+        return None
+
+    def republish_auth_token(self):
+        """
+        Replaces the shared token file with the token renewed in the background, so that
+        long-running clients do not keep using the previous one until it expires.
+        """
+        token = self.rucio._get_cached_token(self.instance_config.get('name'))
+        token_file_path = self.token_file_path
+        if token and token_file_path and self._write_token(token_file_path, token):
+            logger.info("Republished the renewed auth token to: %s", token_file_path)
+
+    @staticmethod
+    def _write_token(dest_token_path, token):
+        # Written next to the file and renamed, so that readers never see a partial token
+        tmp_token_path = dest_token_path + '.tmp'
+        try:
+            with open(tmp_token_path, 'w') as token_file:
+                token_file.write(token)
+            os.chmod(tmp_token_path, 0o600)
+            os.replace(tmp_token_path, dest_token_path)
+            return True
+        except (IOError, OSError) as e:
+            logger.error("Failed to write auth token file at %s: %s", dest_token_path, e)
+            return False
+
     @staticmethod
     def write_user_certificate_files(base_dir, cert_path, key_path):
         dest_cert_path = os.path.join(base_dir, 'usercert.pem')
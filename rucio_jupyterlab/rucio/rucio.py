@@ -15,14 +15,30 @@ import time
 import json
 from urllib.parse import urlencode, quote, urljoin
 import requests
+from rucio_jupyterlab.cache import TTLCache, DatabaseCacheStore
 from rucio_jupyterlab.db import get_db
 from rucio_jupyterlab.rucio.authenticators import authenticate_userpass, authenticate_x509, authenticate_oidc
 from rucio_jupyterlab.rucio.exceptions import RucioAPIException, RucioAuthenticationException, RucioRequestsException, RucioHTTPException
+from rucio_jupyterlab.rucio.async_rucio import AsyncRucioAPI
+from rucio_jupyterlab.rucio.session import RucioSessionPool
+from rucio_jupyterlab.rucio.singleflight import SingleFlight
+from rucio_jupyterlab.rucio.token_refresher import AuthTokenRefresher
 
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
+# Number of DIDs sent per POST /replicas/list request
+BULK_REPLICAS_CHUNK_SIZE = 500
+
+# Seconds during which slow-changing responses are served from the cache, overridable per instance
+DEFAULT_RESPONSE_CACHE_TTL = {
+    'scopes': 3600,
+    'rses': 600,
+    'rules': 30,
+    'metadata': 300
+}
+
 
 def parse_did_filter_from_string_fe(input_string, name='*', type='collection', omit_name=False):
     """
@@ -149,10 +165,14 @@ def is_numeric(value):
 
 class RucioAPI:
     rucio_auth_token_cache = dict()
+    # Identical GETs issued concurrently by different handlers share a single upstream call
+    request_coalescer = SingleFlight()
+    response_cache = TTLCache()
 
     @staticmethod
     def clear_auth_token_cache():
         RucioAPI.rucio_auth_token_cache.clear()
+        AuthTokenRefresher.cancel_all()
 
     def __init__(self, instance_config, auth_type, auth_config):
         self.instance_config = instance_config
@@ -161,6 +181,18 @@ class RucioAPI:
         self.base_url = instance_config.get('rucio_base_url')
         self.auth_url = instance_config.get('rucio_auth_url', self.base_url)
         self.rucio_ca_cert = instance_config.get('rucio_ca_cert', True)    # Default should be True to use system CA certs
+        self.http_pool_size = instance_config.get('http_pool_size')
+        self.http_pool_idle_timeout = instance_config.get('http_pool_idle_timeout')
+        self.response_cache_ttl = {**DEFAULT_RESPONSE_CACHE_TTL, **instance_config.get('response_cache_ttl', {})}
+        self.response_cache_persist = instance_config.get('response_cache_persist', False)
+
+    def _get_session(self, base_url=None, cert=None):
+        """
+        Checks out the pooled keep-alive session shared by all RucioAPI objects talking to the same server.
+        The session must be used as a context manager, and kept checked out until the response has been read.
+        """
+        return RucioSessionPool.checkout(base_url or self.base_url, verify=self.rucio_ca_cert, cert=cert,
+                                         pool_size=self.http_pool_size, idle_timeout=self.http_pool_idle_timeout)
 
     def _build_url(self, endpoint, scope=None, name=None):
         """
@@ -183,72 +215,188 @@ class RucioAPI:
                             parse_json=False, parse_lines=False):
         """
         Centralizes logic for making Rucio API requests and handling errors.
+        Concurrent identical GET requests are coalesced into a single upstream call.
         """
+        if method.upper() == 'GET':
+            account = (self.auth_config or {}).get('account')
+            key = (self.instance_config.get('name'), method.upper(), self._build_url(endpoint, scope, name),
+                   tuple(sorted((params or {}).items())), self.auth_type, account, parse_json, parse_lines)
+            return RucioAPI.request_coalescer.do(key, self._send_rucio_request, method, endpoint, scope, name,
+                                                 params, data, parse_json, parse_lines)
+
+        return self._send_rucio_request(method, endpoint, scope, name, params, data, parse_json, parse_lines)
+
+    def _send_rucio_request(self, method, endpoint, scope=None, name=None, params=None, data=None,
+                            parse_json=False, parse_lines=False):
         url = self._build_url(endpoint, scope, name)
 
         try:
             token = self._get_auth_token()
             headers = {'X-Rucio-Auth-Token': token}
 
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                params=params,
-                data=data,
-                verify=self.rucio_ca_cert
-            )
-            logger.debug("RucioAPI: %s request to %s", method.upper(), url)
-            
+            with self._get_session() as session:
+                response = session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    data=data,
+                    verify=self.rucio_ca_cert
+                )
+                logger.debug("RucioAPI: %s request to %s", method.upper(), url)
+
+                # Decode the body once, responses can be several hundred MB for large datasets
+                body = response.text
+
             # Only log response details if it's a short response (< 512 bytes)
             # Avoid logging massive replica lists that spam the logs
-            if len(response.text) < 512:
-                logger.debug("Response status: %s, body: %s", response.status_code, response.text)
+            if len(body) < 512:
+                logger.debug("Response status: %s, body: %s", response.status_code, body)
             else:
-                logger.debug("Response status: %s, body size: %d bytes", response.status_code, len(response.text))
+                logger.debug("Response status: %s, body size: %d bytes", response.status_code, len(body))
 
             response.raise_for_status()
 
             if parse_json:
                 if parse_lines:
-                    if response.text.strip():
-                        return [json.loads(line) for line in response.text.strip().splitlines()]
-                    else:
-                        return []
-                return response.json() if response.text else {}
+                    return [json.loads(line) for line in body.splitlines() if line.strip()]
+                return json.loads(body) if body else {}
             else:
-                return response.text
+                return body
 
-        except requests.exceptions.HTTPError as e:
+        except Exception as e:
+            raise self._translate_request_exception(method, url, e)
+
+    def _stream_rucio_request(self, method, endpoint, scope=None, name=None, params=None, data=None):
+        """
+        Makes a Rucio API request returning newline-delimited JSON and yields the records as they are received.
+        The response body is never held in memory as a whole, and the connection is released once the
+        generator is exhausted or closed.
+        """
+        url = self._build_url(endpoint, scope, name)
+
+        try:
+            token = self._get_auth_token()
+            headers = {'X-Rucio-Auth-Token': token}
+
+            with self._get_session() as session:
+                response = session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    params=params,
+                    data=data,
+                    verify=self.rucio_ca_cert,
+                    stream=True
+                )
+                logger.debug("RucioAPI: %s streaming request to %s", method.upper(), url)
+                logger.debug("Response status: %s", response.status_code)
+
+                with response:
+                    response.raise_for_status()
+
+                    count = 0
+                    for line in response.iter_lines():
+                        if line.strip():
+                            count += 1
+                            yield json.loads(line)
+
+            logger.debug("Streamed %d records from %s", count, url)
+
+        except Exception as e:
+            raise self._translate_request_exception(method, url, e)
+
+    def _translate_request_exception(self, method, url, e):
+        """
+        Maps an exception raised while talking to Rucio to the matching RucioAPIException subclass.
+        """
+        if isinstance(e, requests.exceptions.HTTPError):
             logger.error("HTTP error for %s request to %s: %s %s", method.upper(), url, e.response.status_code, e.response.reason)
-            raise RucioHTTPException(e.response)
+            return RucioHTTPException(e.response)
 
-        except requests.exceptions.RequestException as e:
+        if isinstance(e, requests.exceptions.RequestException):
             # For other requests-related errors like connection, timeout
             logger.error("Request error for %s request to %s: %s", method.upper(), url, str(e))
-            raise RucioRequestsException(e)
+            return RucioRequestsException(e)
 
-        except Exception as e:
-            # For errors unrelated to requests itself (e.g., JSON parse)
-            logger.error("An error occurred during the %s request to %s: %s", method.upper(), url, str(e))
-            raise RucioAPIException(None, str(e))
+        # For errors unrelated to requests itself (e.g., JSON parse)
+        logger.error("An error occurred during the %s request to %s: %s", method.upper(), url, str(e))
+        return RucioAPIException(None, str(e))
+
+    def _make_cached_rucio_request(self, cache_name, endpoint, scope=None, name=None, params=None, parse_lines=False):
+        """
+        Makes a JSON GET request through the response cache, using the TTL configured for cache_name.
+        A TTL of 0 disables caching for that kind of response.
+        """
+        def load():
+            return self._make_rucio_request('GET', endpoint, scope, name, params=params, parse_json=True, parse_lines=parse_lines)
+
+        ttl = self.response_cache_ttl.get(cache_name)
+        if not ttl:
+            return load()
+
+        key = self._response_cache_key(endpoint, scope, name, params)
+        return RucioAPI.response_cache.get_or_load(key, load, ttl, store=self._response_cache_store())
+
+    def _invalidate_cached_rucio_request(self, endpoint, scope=None, name=None, params=None):
+        key = self._response_cache_key(endpoint, scope, name, params)
+        RucioAPI.response_cache.invalidate(key, store=self._response_cache_store())
+
+    def _response_cache_key(self, endpoint, scope=None, name=None, params=None):
+        url = self._build_url(endpoint, scope, name)
+        if params:
+            url += '?' + urlencode(sorted(params.items()))
+
+        account = (self.auth_config or {}).get('account')
+        return f"{self.instance_config.get('name')}|{self.auth_type}|{account}|{url}"
+
+    def _response_cache_store(self):
+        if not self.response_cache_persist:
+            return None
+        return DatabaseCacheStore(self.instance_config.get('name'), get_db())
 
     def get_scopes(self):
         # DEBUG: response = requests.get(url=f'{self.base_url}/scopes/', headers=headers, verify=self.rucio_ca_cert)
-        return self._make_rucio_request('GET', 'scopes/', parse_json=True)
+        return self._make_cached_rucio_request('scopes', 'scopes/')
 
     def get_rses(self, rse_expression=None):
         # DEBUG: response = requests.get(url=f'{self.base_url}/rses?{urlencoded_params}', headers=headers, verify=self.rucio_ca_cert)
         params = {'expression': rse_expression} if rse_expression else None
-        return self._make_rucio_request('GET', 'rses', params=params, parse_json=True, parse_lines=True)
+        return self._make_cached_rucio_request('rses', 'rses', params=params, parse_lines=True)
+
+    def search_did(self, scope, name, search_type='collection', filters=None, limit=None, offset=0):
+        """
+        Searches DIDs in a scope, returning at most `limit` results starting from `offset`.
 
-    def search_did(self, scope, name, search_type='collection', filters=None, limit=None):
+        The limit is forwarded to Rucio so that the server stops producing results early,
+        and the streamed response is closed as soon as enough records have been read.
+        """
+        params = self._search_did_params(name, search_type, filters, limit, offset)
+        records = self._stream_rucio_request('GET', f'dids/{scope}/dids/search', params=params)
+
+        results = []
+        try:
+            for index, record in enumerate(records):
+                if index < offset:
+                    continue
+                if limit is not None and len(results) >= limit:
+                    break
+                results.append(record)
+        finally:
+            records.close()     # Drop the connection instead of reading the rest of the body
+        return results
+
+    def _search_did_params(self, name, search_type, filters, limit, offset):
         params = {
             'type': search_type,
             'long': '1',
             'name': name
         }
 
+        if limit is not None:
+            # Rucio has no offset parameter, the skipped records are discarded while streaming
+            params['limit'] = offset + limit
+
         if filters:
             # Move the parsing logic inside the try block
             try:
@@ -260,41 +408,80 @@ class RucioAPI:
         else:
             logger.warning("No filters provided for DID search, using default parameters.")
 
-        results = self._make_rucio_request(
-            'GET',
-            f'dids/{scope}/dids/search',
-            params=params,
-            parse_json=True,
-            parse_lines=True
-        )
-
-        if limit is not None:
-            results = results[:limit]
-        return results
+        return params
 
     def get_metadata(self, scope, name):
         # DEBUG: response = requests.get(url=f'{self.base_url}/dids/{scope}/{name}/meta', headers=headers, verify=self.rucio_ca_cert)
         return self._make_rucio_request('GET', 'dids', scope, name + '/meta', parse_lines=True)
 
-    def get_files(self, scope, name):
+    def get_files(self, scope, name, stream=False):
         # DEBUG: response = requests.get(url=f'{self.base_url}/dids/{scope}/{name}/files', headers=headers, verify=self.rucio_ca_cert)
+        if stream:
+            return self._stream_rucio_request('GET', 'dids', scope, name + '/files')
         return self._make_rucio_request('GET', 'dids', scope, name + '/files', parse_json=True, parse_lines=True)
 
     def get_parents(self, scope, name):
         # DEBUG: response = requests.get(url=f'{self.base_url}/dids/{scope}/{name}/parents', headers=headers, verify=self.rucio_ca_cert)
         return self._make_rucio_request('GET', 'dids', scope, name + '/parents', parse_json=True, parse_lines=True)
 
-    def get_rules(self, scope, name):
+    def get_rules(self, scope, name, stream=False):
         # DEBUG: response = requests.get(url=f'{self.base_url}/dids/{scope}/{name}/rules', headers=headers, verify=self.rucio_ca_cert)
-        return self._make_rucio_request('GET', 'dids', scope, name + '/rules', parse_json=True, parse_lines=True)
+        if stream:
+            return self._stream_rucio_request('GET', 'dids', scope, name + '/rules')
+        return self._make_cached_rucio_request('rules', 'dids', scope, name + '/rules', parse_lines=True)
+
+    def list_rules(self, filters=None):
+        """
+        Lists replication rules as they are received, e.g. those of an account on an RSE with
+        {'account': ..., 'rse_expression': ...}.
+        """
+        # DEBUG: response = requests.get(url=f'{self.base_url}/rules/?{urlencoded_params}', headers=headers, verify=self.rucio_ca_cert)
+        return self._stream_rucio_request('GET', 'rules/', params=filters)
 
     def get_rule_details(self, rule_id):
         # DEBUG: response = requests.get(url=f'{self.base_url}/rules/{rule_id}', headers=headers, verify=self.rucio_ca_cert)
         return self._make_rucio_request('GET', 'rules', rule_id, parse_json=True)
 
-    def get_replicas(self, scope, name):
+    def get_replicas(self, scope, name, rse_expression=None, schemes=None, all_states=False, stream=False):
+        """
+        Lists the file replicas of a DID.
+
+        :param rse_expression: Only return replicas on the RSEs matching this expression.
+        :param schemes: Only return PFNs with these protocol schemes, e.g. ['root', 'https'].
+        :param all_states: Also return replicas which are not AVAILABLE.
+        """
         # DEBUG: response = requests.get(url=f'{self.base_url}/replicas/{scope}/{name}', headers=headers, verify=self.rucio_ca_cert)
-        return self._make_rucio_request('GET', 'replicas', scope, name, parse_json=True, parse_lines=True)
+        params = self._replicas_params(rse_expression, schemes, all_states)
+        if stream:
+            return self._stream_rucio_request('GET', 'replicas', scope, name, params=params)
+        return self._make_rucio_request('GET', 'replicas', scope, name, params=params, parse_json=True, parse_lines=True)
+
+    @staticmethod
+    def _replicas_params(rse_expression=None, schemes=None, all_states=False):
+        params = {}
+        if rse_expression:
+            params['rse_expression'] = rse_expression
+        if schemes:
+            params['schemes'] = ','.join(schemes)
+        if all_states:
+            params['all_states'] = 'true'
+        return params
+
+    def list_replicas_bulk(self, dids, rse_expression=None, schemes=None, all_states=False, chunk_size=BULK_REPLICAS_CHUNK_SIZE):
+        """
+        Lists the file replicas of many DIDs using POST /replicas/list, yielding replicas as they are streamed.
+
+        :param dids: A list of {'scope': ..., 'name': ...} dicts.
+        :param chunk_size: Maximum number of DIDs sent in a single request.
+        """
+        for i in range(0, len(dids), chunk_size):
+            data = {'dids': dids[i:i + chunk_size], 'all_states': all_states}
+            if rse_expression:
+                data['rse_expression'] = rse_expression
+            if schemes:
+                data['schemes'] = schemes
+
+            yield from self._stream_rucio_request('POST', 'replicas/list', data=json.dumps(data))
 
     def add_replication_rule(self, dids, copies, rse_expression, weight=None, lifetime=None, grouping='DATASET', account=None,
                              locked=False, source_replica_expression=None, activity=None, notify='N', purge_replicas=False,
@@ -311,20 +498,34 @@ class RucioAPI:
         token = self._get_auth_token()
         headers = {'X-Rucio-Auth-Token': token}
 
-        response = requests.post(url=f'{self.base_url}/rules/', headers=headers, json=data, verify=self.rucio_ca_cert)
-        return response.json()
+        with self._get_session() as session:
+            response = session.post(url=f'{self.base_url}/rules/', headers=headers, json=data, verify=self.rucio_ca_cert)
+            result = response.json()
+
+        # The new rule must show up on the next status check
+        for did in dids:
+            self._invalidate_cached_rucio_request('dids', did['scope'], did['name'] + '/rules')
+
+        return result
 
     def _get_auth_token(self):
         config = self.instance_config
         instance_name = config.get('name')
         cached_token = self._get_cached_token(instance_name)
         if cached_token:
+            AuthTokenRefresher.touch(instance_name)
             return cached_token
 
         token, expiry = self.authenticate(self.auth_config, self.auth_type)
         RucioAPI.rucio_auth_token_cache[instance_name] = (token, expiry)
+        AuthTokenRefresher.schedule(instance_name, expiry, self._refresh_auth_token, config.get('auth_token_refresh_fraction'))
         return token
 
+    def _refresh_auth_token(self):
+        token, expiry = self.authenticate(self.auth_config, self.auth_type)
+        RucioAPI.rucio_auth_token_cache[self.instance_config.get('name')] = (token, expiry)
+        return expiry
+
     def _get_cached_token(self, instance):
         if instance in RucioAPI.rucio_auth_token_cache:
             token_cache, expiry = RucioAPI.rucio_auth_token_cache[instance]
@@ -355,26 +556,34 @@ class RucioAPI:
                 account = auth_config.get('account')
 
                 # TODO VO is currently not accepted by the userpass authenticator, so we pass None
-                return authenticate_userpass(base_url=self.auth_url, username=username, password=password, account=account, vo=None, app_id=app_id, rucio_ca_cert=self.rucio_ca_cert)
+                with self._get_session(self.auth_url) as session:
+                    return authenticate_userpass(base_url=self.auth_url, username=username, password=password, account=account, vo=None, app_id=app_id, rucio_ca_cert=self.rucio_ca_cert,
+                                                 session=session)
             elif auth_type == 'x509':
                 cert_path = auth_config.get('certificate')
                 key_path = auth_config.get('key')
                 account = auth_config.get('account')
 
                 # TODO VO is currently not accepted by the x509 authenticator, so we pass None
-                return authenticate_x509(base_url=self.auth_url, cert_path=cert_path, key_path=key_path, account=account, vo=None, app_id=app_id, rucio_ca_cert=self.rucio_ca_cert)
+                with self._get_session(self.auth_url, cert=(cert_path, key_path or cert_path) if cert_path else None) as session:
+                    return authenticate_x509(base_url=self.auth_url, cert_path=cert_path, key_path=key_path, account=account, vo=None, app_id=app_id, rucio_ca_cert=self.rucio_ca_cert,
+                                             session=session)
             elif auth_type == 'x509_proxy':
                 proxy = auth_config.get('proxy')
                 account = auth_config.get('account')
 
                 # TODO VO is currently not accepted by the x509_proxy authenticator, so we pass None
-                return authenticate_x509(base_url=self.auth_url, cert_path=proxy, key_path=proxy, account=account, vo=None, app_id=app_id, rucio_ca_cert=self.rucio_ca_cert)
+                with self._get_session(self.auth_url, cert=(proxy, proxy) if proxy else None) as session:
+                    return authenticate_x509(base_url=self.auth_url, cert_path=proxy, key_path=proxy, account=account, vo=None, app_id=app_id, rucio_ca_cert=self.rucio_ca_cert,
+                                             session=session)
 
             elif auth_type == 'oidc':
                 oidc_auth = self.instance_config.get('oidc_auth')
                 oidc_auth_source = self.instance_config.get('oidc_env_name') if oidc_auth == 'env' else self.instance_config.get('oidc_file_name')
 
-                return authenticate_oidc(base_url=self.base_url, oidc_auth=oidc_auth, oidc_auth_source=oidc_auth_source, rucio_ca_cert=self.rucio_ca_cert)
+                with self._get_session() as session:
+                    return authenticate_oidc(base_url=self.base_url, oidc_auth=oidc_auth, oidc_auth_source=oidc_auth_source, rucio_ca_cert=self.rucio_ca_cert,
+                                             session=session)
 
         except requests.exceptions.HTTPError as e:
             logger.error("HTTP error during authentication for %s: %s %s", auth_type, e.response.status_code, e.response.reason)
@@ -408,3 +617,6 @@ class RucioAPIFactory:  # pragma: no cover
         auth_config = db.get_rucio_auth_credentials(instance, auth_type)
 
         return RucioAPI(instance_config=instance_config, auth_type=auth_type, auth_config=auth_config)
+
+    def for_instance_async(self, instance):
+        return AsyncRucioAPI(self.for_instance(instance))
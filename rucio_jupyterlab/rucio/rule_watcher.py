@@ -0,0 +1,138 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import threading
+import time
+from rucio_jupyterlab.db import close_db_connection
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WATCH_INTERVAL = 30  # seconds
+# Watchers nobody asked about for this long are stopped, the next lookup starts them again
+IDLE_TIMEOUT = 600  # seconds
+
+# Rule attributes whose change is reported, the lock counters move as files get replicated
+WATCHED_ATTRIBUTES = ('id', 'state', 'expires_at', 'locks_ok_cnt', 'locks_replicating_cnt', 'locks_stuck_cnt')
+
+
+class RuleWatcher:
+    """
+    Lists the replication rules of an account on an RSE at a fixed interval in a background thread,
+    and reports the DIDs whose rule appeared, changed or disappeared since the previous listing.
+
+    One watcher replaces one rule request per polled DID and poll: callers look the rule of a DID up
+    in the latest listing, and only refetch what depends on a rule when it is reported as changed.
+    """
+
+    _lock = threading.Lock()
+    _watchers = dict()
+
+    def __init__(self, key, list_rules, on_change, interval):
+        """
+        :param key: Identifier of the watcher, e.g. (instance, account, RSE).
+        :param list_rules: Callable returning the rules to watch, as returned by Rucio.
+        :param on_change: Callable receiving a DID, its previous rule and its current rule, either of which may be None.
+                          It is not called for the first listing.
+        :param interval: Seconds between two listings.
+        """
+        self.key = key
+        self.interval = interval
+        self._list_rules = list_rules
+        self._on_change = on_change
+        self._rules = None
+        self._listed_at = 0
+        self._last_used = time.time()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def watch(cls, key, list_rules, on_change, interval=None):
+        """
+        Returns the watcher identified by key, starting it if it is not running.
+        """
+        with cls._lock:
+            watcher = cls._watchers.get(key)
+            if watcher is None:
+                watcher = RuleWatcher(key, list_rules, on_change, interval or DEFAULT_WATCH_INTERVAL)
+                cls._watchers[key] = watcher
+                watcher._start()
+                logger.info("Started watching replication rules of %s every %ds", key, watcher.interval)
+            watcher._last_used = time.time()
+        return watcher
+
+    @classmethod
+    def stop_all(cls):
+        with cls._lock:
+            for watcher in cls._watchers.values():
+                watcher._stop_event.set()
+            cls._watchers.clear()
+
+    def is_current(self):
+        """
+        Returns whether the latest listing is recent enough to be used instead of asking Rucio.
+        """
+        return self._rules is not None and time.time() - self._listed_at < 2 * self.interval
+
+    def get_rule(self, did):
+        """
+        Returns the rule of a DID in the latest listing, or None if it has none or nothing was listed yet.
+        """
+        return (self._rules or {}).get(did)
+
+    def covers(self, did):
+        return did in (self._rules or {})
+
+    def poll(self):
+        """
+        Lists the rules and reports the changes since the previous listing.
+        """
+        rules = dict()
+        for rule in self._list_rules():
+            # Keep the first rule of a DID, as the per-DID lookup does
+            rules.setdefault(f"{rule['scope']}:{rule['name']}", rule)
+
+        previous_rules, self._rules, self._listed_at = self._rules, rules, time.time()
+        if previous_rules is None:
+            return []
+
+        changed = [did for did in rules.keys() | previous_rules.keys()
+                   if self._watched_state(rules.get(did)) != self._watched_state(previous_rules.get(did))]
+        for did in changed:
+            try:
+                self._on_change(did, previous_rules.get(did), rules.get(did))
+            except Exception as e:
+                logger.warning("Failed to apply the rule change of '%s': %s", did, e)
+
+        logger.debug("Listed %d replication rules of %s, %d changed", len(rules), self.key, len(changed))
+        return changed
+
+    @staticmethod
+    def _watched_state(rule):
+        return tuple(rule.get(attribute) for attribute in WATCHED_ATTRIBUTES) if rule else None
+
+    def _start(self):
+        self._thread = threading.Thread(target=self._run, name=f"rucio_rule_watcher_{self.key}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        try:
+            while not self._stop_event.is_set():
+                with RuleWatcher._lock:
+                    if time.time() - self._last_used > IDLE_TIMEOUT:
+                        if RuleWatcher._watchers.get(self.key) is self:
+                            RuleWatcher._watchers.pop(self.key)
+                        logger.info("Stopped watching replication rules of %s, unused for %ds", self.key, IDLE_TIMEOUT)
+                        return
+
+                try:
+                    self.poll()
+                except Exception as e:
+                    logger.warning("Listing the replication rules of %s failed: %s", self.key, e)
+
+                self._stop_event.wait(self.interval)
+        finally:
+            close_db_connection()
@@ -0,0 +1,110 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_IDLE_TIMEOUT = 300  # seconds
+
+
+class RucioSessionPool:
+    """
+    Process-wide registry of keep-alive HTTP sessions towards Rucio servers.
+
+    Sessions are keyed by (base_url, CA bundle, client certificate, pool size), so every
+    handler thread and background fetcher talking to the same server reuses the
+    same TCP+TLS connections instead of paying a new handshake per request.
+    The underlying urllib3 connection pools are thread-safe, and callers pass
+    headers per request, so a session can safely be shared across threads.
+    The idle timeout is the one given when the session was created.
+
+    Sessions are checked out for the duration of a request, including the reading
+    of a streamed response. Sessions that have not been checked out for longer than
+    their idle timeout are dropped from the registry, and closed as soon as the
+    last checkout still using them is released.
+    """
+
+    _lock = threading.Lock()
+    _sessions = dict()
+
+    @classmethod
+    @contextmanager
+    def checkout(cls, base_url, verify=True, cert=None, pool_size=None, idle_timeout=None):
+        """
+        Checks out the shared session for the given server and TLS settings, creating it if needed.
+
+        :param base_url: Base URL of the Rucio server.
+        :param verify: CA bundle path, or a boolean to toggle certificate verification.
+        :param cert: Optional client certificate path, or (cert, key) tuple.
+        :param pool_size: Maximum number of connections kept alive for this server.
+        :param idle_timeout: Seconds after which an unused session is dropped.
+        :return: A context manager yielding a requests.Session instance.
+        """
+        pool_size = pool_size or DEFAULT_POOL_SIZE
+        idle_timeout = idle_timeout or DEFAULT_IDLE_TIMEOUT
+        key = (base_url, verify, cert, pool_size)
+        now = time.monotonic()
+
+        with cls._lock:
+            cls._evict_idle_sessions(now)
+
+            entry = cls._sessions.get(key)
+            if entry is None:
+                logger.debug("Creating pooled HTTP session for %s (pool_size=%d)", base_url, pool_size)
+                entry = {'session': cls._create_session(verify, cert, pool_size), 'idle_timeout': idle_timeout,
+                         'checkouts': 0, 'evicted': False}
+                cls._sessions[key] = entry
+
+            entry['last_used'] = now
+            entry['checkouts'] += 1
+
+        try:
+            yield entry['session']
+        finally:
+            with cls._lock:
+                entry['checkouts'] -= 1
+                entry['last_used'] = time.monotonic()
+                if entry['evicted'] and not entry['checkouts']:
+                    logger.debug("Closing evicted HTTP session for %s", base_url)
+                    entry['session'].close()
+
+    @classmethod
+    def close_all(cls):
+        with cls._lock:
+            for entry in cls._sessions.values():
+                entry['session'].close()
+            cls._sessions.clear()
+
+    @staticmethod
+    def _create_session(verify, cert, pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.verify = verify
+        if cert:
+            session.cert = cert
+        return session
+
+    @classmethod
+    def _evict_idle_sessions(cls, now):
+        expired_keys = [key for key, entry in cls._sessions.items() if now - entry['last_used'] > entry['idle_timeout']]
+        for key in expired_keys:
+            entry = cls._sessions.pop(key)
+            entry['evicted'] = True
+            if entry['checkouts']:
+                logger.debug("Dropping idle HTTP session for %s, closing it once its %d checkouts are released",
+                             key[0], entry['checkouts'])
+            else:
+                logger.debug("Closing idle HTTP session for %s", key[0])
+                entry['session'].close()
@@ -0,0 +1,51 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import threading
+from concurrent.futures import Future
+from rucio_jupyterlab.metrics import SINGLEFLIGHT_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls into a single execution.
+
+    The first caller for a key runs the function, every caller arriving while it is
+    still running waits for it and receives the same result, or the same exception.
+    Nothing is cached once the call completes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight = dict()
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self._inflight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._inflight[key] = future
+
+        if not leader:
+            SINGLEFLIGHT_REQUESTS.labels(outcome='merged').inc()
+            logger.debug("Joining in-flight request for %s", key)
+            return future.result()
+
+        SINGLEFLIGHT_REQUESTS.labels(outcome='executed').inc()
+        try:
+            result = func(*args, **kwargs)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
@@ -0,0 +1,122 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_REFRESH_FRACTION = 0.8
+
+
+class AuthTokenRefresher:
+    """
+    Re-authenticates against Rucio in the background before cached tokens expire,
+    so that user requests do not pay for the authentication round trips.
+
+    A refresh is scheduled once a fraction of the remaining token lifetime has elapsed.
+    Tokens which have not been used since the last refresh are left to expire, so an idle
+    server does not keep authenticating forever; the next request then authenticates lazily.
+    Tokens with listeners, e.g. shared with a running Rucio client, are always refreshed.
+    """
+
+    _lock = threading.Lock()
+    _timers = dict()
+    _last_used = dict()
+    _listeners = dict()
+
+    @classmethod
+    def schedule(cls, key, expiry, refresh, fraction=None):
+        """
+        Schedules a background refresh of the token identified by key.
+
+        :param key: Identifier of the token, e.g. the instance name.
+        :param expiry: Expiry of the current token, in seconds since the epoch.
+        :param refresh: Callable authenticating again and returning the new expiry.
+        :param fraction: Fraction of the remaining lifetime after which the token is refreshed.
+        """
+        fraction = fraction or DEFAULT_REFRESH_FRACTION
+        now = time.time()
+        lifetime = float(expiry) - now
+        if lifetime <= 0:
+            return
+
+        with cls._lock:
+            cls._cancel(key)
+            cls._last_used.setdefault(key, now)
+            timer = threading.Timer(lifetime * fraction, cls._refresh, args=(key, refresh, fraction, now))
+            timer.daemon = True
+            cls._timers[key] = timer
+            timer.start()
+
+        logger.debug("Auth token refresh for '%s' scheduled in %.0fs", key, lifetime * fraction)
+
+    @classmethod
+    def touch(cls, key):
+        """
+        Records that the token identified by key has been used.
+        """
+        with cls._lock:
+            cls._last_used[key] = time.time()
+
+    @classmethod
+    def add_listener(cls, key, listener):
+        """
+        Registers a callable called after each background refresh of the token identified by key.
+        """
+        with cls._lock:
+            cls._listeners.setdefault(key, []).append(listener)
+
+    @classmethod
+    def remove_listener(cls, key, listener):
+        with cls._lock:
+            listeners = cls._listeners.get(key, [])
+            if listener in listeners:
+                listeners.remove(listener)
+            if not listeners:
+                cls._listeners.pop(key, None)
+
+    @classmethod
+    def cancel_all(cls):
+        with cls._lock:
+            for key in list(cls._timers):
+                cls._cancel(key)
+            cls._last_used.clear()
+
+    @classmethod
+    def _cancel(cls, key):
+        timer = cls._timers.pop(key, None)
+        if timer is not None:
+            timer.cancel()
+
+    @classmethod
+    def _refresh(cls, key, refresh, fraction, scheduled_at):
+        with cls._lock:
+            if cls._timers.get(key) is not threading.current_thread():
+                return      # Cancelled or superseded in the meantime
+            cls._timers.pop(key)
+
+            if cls._last_used.get(key, 0) < scheduled_at and not cls._listeners.get(key):
+                logger.debug("Auth token for '%s' unused since the last refresh, letting it expire", key)
+                cls._last_used.pop(key, None)
+                return
+
+        try:
+            expiry = refresh()
+            logger.info("Refreshed auth token for '%s' in the background", key)
+            cls.schedule(key, expiry, refresh, fraction)
+        except Exception as e:
+            logger.warning("Background refresh of the auth token for '%s' failed: %s", key, e)
+            return
+
+        with cls._lock:
+            listeners = list(cls._listeners.get(key, []))
+        for listener in listeners:
+            try:
+                listener()
+            except Exception as e:
+                logger.warning("Failed to notify the refresh of the auth token for '%s': %s", key, e)
@@ -9,6 +9,7 @@
 # - Giovanni Guerrieri, <giovanni.guerrieri@cern.ch>, 2025
 
 import logging
+from rucio_jupyterlab.cache_maintenance import configure_cache, start_cache_maintenance
 from rucio_jupyterlab.handlers import setup_handlers
 from rucio_jupyterlab.logging_config import setup_logging
 
@@ -26,5 +27,8 @@ def load_jupyter_server_extension(server_app):  # pragma: no cover
 
     setup_logging(server_app.web_app)  # Will use the default value in the jupyter_server_config.json or default to INFO (see RucioConfig in rucio_jupyterlab.config.config)
 
+    configure_cache(server_app.web_app)
+    start_cache_maintenance(server_app.web_app)
+
     logger = logging.getLogger("rucio_jupyterlab")
     logger.info("Rucio JupyterLab server extension loaded.")
@@ -8,7 +8,9 @@
 # - Muhammad Aditya Hilmy, <mhilmy@hey.com>, 2020
 
 import pytest
-from rucio_jupyterlab.rucio import RucioAPI
+from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
+from rucio_jupyterlab.rucio import RucioAPI, AsyncRucioAPI
+from rucio_jupyterlab.rucio.rule_watcher import RuleWatcher
 
 MOCK_BASE_URL = "https://rucio"
 MOCK_USERNAME = "username"
@@ -18,6 +20,14 @@ MOCK_APP_ID = "app_id"
 MOCK_AUTH_TOKEN = 'abcde_token_ghijk'
 
 
+@pytest.fixture(autouse=True)
+def rule_watchers(mocker):
+    # Watchers are created but never list rules in the background, tests call poll() instead
+    mocker.patch.object(RuleWatcher, '_start')
+    yield
+    RuleWatcher.stop_all()
+
+
 @pytest.fixture
 def rucio():
     instance_config = {
@@ -38,5 +48,12 @@ def rucio():
         'password': MOCK_PASSWORD,
         'account': MOCK_ACCOUNT
     }
+    RucioAPI.response_cache.clear()
+    ReplicaModeHandler.did_details_cache.clear()
     rucio_api = RucioAPI(instance_config, auth_type=mock_auth_type, auth_config=mock_auth_config)
     return rucio_api
+
+
+@pytest.fixture
+def async_rucio(rucio):  # pylint: disable=redefined-outer-name
+    return AsyncRucioAPI(rucio)
@@ -40,22 +40,43 @@ class MockDatabaseInstance:
     def set_rucio_auth_credentials(self, namespace, auth_type, params):
         pass
 
-    def get_attached_files(self, namespace, did):
+    def get_attached_files(self, namespace, did, offset=0, limit=None):
         return [
             AttachedFile(did='scope:name1', size=123456),
             AttachedFile(did='scope:name2', size=123456),
             AttachedFile(did='scope:name3', size=123456)
         ]
 
-    def set_attached_files(self, namespace, parent_did, attached_files):
+    def summarize_attached_file_replicas(self, namespace, did):
+        return None
+
+    def get_packed_file_replicas(self, namespace, did):
+        return None
+
+    def is_attached_files_stale(self, namespace, did, max_stale):
+        return False
+
+    def set_attached_files(self, namespace, parent_did, attached_files, ttl=None):
         pass
 
+    def set_attached_files_bulk(self, namespace, attached_files, ttl=None):
+        pass
+
+    def get_attached_files_version(self, namespace, did):
+        return 1
+
+    def increment_attached_files_version(self, namespace, did):
+        pass
+
+    def sync_attached_file_replicas(self, namespace, parent_did, file_replicas, ttl=None, replica_ttl=None):
+        return {'added': len(file_replicas), 'removed': 0, 'changed': 0, 'version': 1}
+
     def get_file_replica(self, namespace, file_did):
         current_time = 168999754
         return Struct(namespace='atlas', did='scope:name', pfn='root://root//home/abcde', size=123456, expiry=current_time + 3600)
 
-    def get_file_replicas_bulk(self, namespace, file_dids):
-        """Mock bulk replica retrieval - returns dict of all requested DIDs."""
+    def lookup_file_replicas(self, namespace, file_dids):
+        """Mock bulk replica retrieval - finds all requested DIDs."""
         current_time = 168999754
         replica_dict = {}
         for file_did in file_dids:
@@ -66,10 +87,43 @@ class MockDatabaseInstance:
                 size=123456, 
                 expiry=current_time + 3600
             )
-        return replica_dict
+        return replica_dict, []
+
+    def set_file_replica(self, namespace, file_did, pfn, size, ttl=None):
+        pass
 
-    def set_file_replica(self, namespace, file_did, pfn, size):
+    def set_file_replicas_bulk(self, namespace, file_replicas, chunk_size=1000, ttl=None):  # pylint: disable=unused-argument
         pass
 
-    def set_file_replicas_bulk(self, namespace, file_replicas, chunk_size=1000):  # pylint: disable=unused-argument
+    def get_replication_rule(self, namespace, did, rse, max_stale):
+        return None
+
+    def set_replication_rule(self, namespace, did, rse, rule, ttl=None):
         pass
+
+    def get_response_cache(self, namespace, key):
+        return None
+
+    def set_response_cache(self, namespace, key, value, stored_at):
+        pass
+
+    def delete_response_cache(self, namespace, key):
+        pass
+
+    def flush_access_times(self):
+        pass
+
+    def delete_expired_cache(self, response_max_age, batch_size=500):  # pylint: disable=unused-argument
+        return {'filereplicascache': 0, 'attachedfilescache': 0, 'rucioresponsecache': 0, 'replicationrulecache': 0}
+
+    def evict_least_recently_used_cache(self, fraction, batch_size=500):  # pylint: disable=unused-argument
+        return {'filereplicascache': 0, 'attachedfilescache': 0, 'rucioresponsecache': 0, 'replicationrulecache': 0}
+
+    def get_cache_size(self):
+        return 0
+
+    def vacuum(self, pages=None):
+        pass
+
+    def invalidate_cache(self, namespace=None, did=None, tables=None, batch_size=500):  # pylint: disable=unused-argument
+        return {table: 0 for table in tables or []}
@@ -0,0 +1,71 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+from unittest.mock import MagicMock
+from rucio_jupyterlab.cache import TTLCache, DatabaseCacheStore
+from .mocks.mock_db import MockDatabaseInstance
+from .conftest import MOCK_BASE_URL, MOCK_AUTH_TOKEN
+
+
+def test_get_or_load__fresh_entry__should_not_reload():
+    cache = TTLCache()
+    loader = MagicMock(return_value=['scope1'])
+
+    assert cache.get_or_load('key', loader, ttl=60) == ['scope1']
+    assert cache.get_or_load('key', loader, ttl=60) == ['scope1']
+    loader.assert_called_once()
+
+
+def test_get_or_load__stale_entry__should_return_stale_value_and_refresh(mocker):
+    cache = TTLCache()
+    mock_time = mocker.patch('rucio_jupyterlab.cache.time.time', return_value=1000)
+    cache.get_or_load('key', lambda: 'old', ttl=60)
+
+    submit = mocker.patch.object(TTLCache._refresh_executor, 'submit', side_effect=lambda fn: fn())
+    mock_time.return_value = 1090
+
+    assert cache.get_or_load('key', lambda: 'new', ttl=60) == 'old'
+    submit.assert_called_once()
+    assert cache.get_or_load('key', lambda: 'newer', ttl=60) == 'new'
+
+
+def test_get_or_load__size_exceeded__should_evict_least_recently_used():
+    cache = TTLCache(max_bytes=10)
+    cache.get_or_load('a', lambda: 'aaa', ttl=60)     # 5 bytes once serialized
+    cache.get_or_load('b', lambda: 'bbb', ttl=60)
+    cache.get_or_load('a', lambda: 'reloaded', ttl=60)
+    cache.get_or_load('c', lambda: 'ccc', ttl=60)
+
+    assert cache.get_or_load('a', lambda: 'reloaded', ttl=60) == 'aaa'
+    assert cache.get_or_load('b', lambda: 'reloaded', ttl=60) == 'reloaded'
+
+
+def test_get_or_load__persisted_entry__should_load_from_store(mocker):
+    mock_db = MockDatabaseInstance()
+    mocker.patch.object(mock_db, 'get_response_cache', return_value=('["scope1"]', 1000))
+    mocker.patch('rucio_jupyterlab.cache.time.time', return_value=1010)
+    loader = MagicMock()
+
+    result = TTLCache().get_or_load('key', loader, ttl=60, store=DatabaseCacheStore('atlas', mock_db))
+
+    assert result == ['scope1']
+    mock_db.get_response_cache.assert_called_once_with('atlas', 'key')
+    loader.assert_not_called()
+
+
+def test_get_rules__after_add_replication_rule__should_not_use_cache(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+
+    requests_mock.get(f"{MOCK_BASE_URL}/dids/scope/name/rules", text='')
+    requests_mock.post(f"{MOCK_BASE_URL}/rules/", json=['rule_id'])
+
+    rucio.get_rules('scope', 'name')
+    rucio.get_rules('scope', 'name')
+    assert requests_mock.call_count == 1, "Rules should be served from the cache"
+
+    rucio.add_replication_rule(dids=[{'scope': 'scope', 'name': 'name'}], copies=1, rse_expression='SWAN-EOS')
+    rucio.get_rules('scope', 'name')
+    assert requests_mock.call_count == 3, "Rules should be fetched again once a rule is added"
@@ -0,0 +1,35 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import pytest
+from rucio_jupyterlab.cache_codec import encode_file_list, decode_file_list
+
+MOCK_FILES = [
+    ('scope:name1', 123, 'root://xrd1:1094//eos/rucio/scope/ab/cd/name1'),
+    ('scope:name2', None, None),
+    ('other:name3', 0, 'root://xrd1:1094//eos/rucio/other/ef/01/name3'),
+    ('scope:name4', 456, 'davs://xrd2:443/name4.moved')
+]
+
+
+@pytest.mark.parametrize('encoding', ['packed', 'zlib', 'zstd'])
+def test_decode_file_list__should_return_encoded_files(encoding):
+    assert decode_file_list(encode_file_list(MOCK_FILES, encoding)) == (MOCK_FILES, True)
+
+
+def test_decode_file_list__empty_list__should_return_empty_list():
+    assert decode_file_list(encode_file_list([], 'zlib', with_replicas=False)) == ([], False)
+
+
+def test_encode_file_list__shared_prefix__should_be_stored_once():
+    files = [(f'scope:name{i}', i, f'root://xrd1:1094//eos/experiment/rucio/scope/name{i}') for i in range(1000)]
+
+    assert len(encode_file_list(files, 'packed')) < sum(len(did) + len(pfn) for did, _, pfn in files) / 2
+
+
+def test_encode_file_list__newline_in_did__should_raise_value_error():
+    with pytest.raises(ValueError):
+        encode_file_list([('scope:name\n', 1, None)])
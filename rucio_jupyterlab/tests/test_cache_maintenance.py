@@ -0,0 +1,39 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+from rucio_jupyterlab.cache_maintenance import CacheMaintenance
+from rucio_jupyterlab.metrics import CACHE_SIZE, CACHE_EVICTIONS
+from .mocks.mock_db import MockDatabaseInstance
+
+
+def test_run__size_exceeded__should_evict_until_below_limit(mocker):
+    mock_db = MockDatabaseInstance()
+    mocker.patch('rucio_jupyterlab.cache_maintenance.get_db', return_value=mock_db)
+    mocker.patch.object(mock_db, 'delete_expired_cache', return_value={'filereplicascache': 3})
+    mocker.patch.object(mock_db, 'get_cache_size', side_effect=[3000, 2000, 900])
+    mocker.patch.object(mock_db, 'evict_least_recently_used_cache', return_value={'filereplicascache': 10})
+    mocker.patch.object(mock_db, 'vacuum')
+    expired_before = CACHE_EVICTIONS.labels(table='filereplicascache', reason='expired')._value.get()
+    lru_before = CACHE_EVICTIONS.labels(table='filereplicascache', reason='lru')._value.get()
+
+    CacheMaintenance(max_size_bytes=1000, interval=600).run()
+
+    assert mock_db.evict_least_recently_used_cache.call_count == 2
+    mock_db.vacuum.assert_called_once()
+    assert CACHE_SIZE._value.get() == 900
+    assert CACHE_EVICTIONS.labels(table='filereplicascache', reason='expired')._value.get() - expired_before == 3
+    assert CACHE_EVICTIONS.labels(table='filereplicascache', reason='lru')._value.get() - lru_before == 20
+
+
+def test_run__nothing_left_to_evict__should_stop(mocker):
+    mock_db = MockDatabaseInstance()
+    mocker.patch('rucio_jupyterlab.cache_maintenance.get_db', return_value=mock_db)
+    mocker.patch.object(mock_db, 'get_cache_size', return_value=3000)
+    mocker.patch.object(mock_db, 'evict_least_recently_used_cache', return_value={'filereplicascache': 0})
+
+    CacheMaintenance(max_size_bytes=1000, interval=600).run()
+
+    mock_db.evict_least_recently_used_cache.assert_called_once()
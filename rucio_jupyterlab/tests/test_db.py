@@ -10,9 +10,11 @@
 
 import json
 import time
+from unittest.mock import MagicMock
 import pytest
-from rucio_jupyterlab.db import DatabaseInstance
-from rucio_jupyterlab.entity import AttachedFile
+from peewee import SqliteDatabase
+from rucio_jupyterlab.db import DatabaseInstance, AttachedFilesCache, AttachedFileCache, FileReplicasCache, FileUploadJob, ReplicationRuleCache, RucioResponseCache, SchemaVersion, get_cache_ttl, get_pragmas, migrate_attached_files_list_cache, migrate_schema
+from rucio_jupyterlab.entity import AttachedFile, PfnFileReplica
 from .mocks.mock_db import Struct
 
 
@@ -49,80 +51,109 @@ def test_get_config__config_not_exists(database_instance, mocker):  # pylint: di
     assert result is None, "Return value should be None"
 
 
-def test_get_attached_files__files_exist(database_instance, mocker):  # pylint: disable=redefined-outer-name
-    class MockAttachedFilesListCache:
-        namespace = 'namespace'
-        did = 'did'
-        expiry = 0
+@pytest.fixture
+def memory_db(mocker):
+    test_db = SqliteDatabase(':memory:')
+    mocker.patch('rucio_jupyterlab.db.db', test_db)
+    models = [AttachedFilesCache, AttachedFileCache, FileReplicasCache, RucioResponseCache, ReplicationRuleCache, FileUploadJob]
+    with test_db.bind_ctx(models):
+        test_db.create_tables(models)
+        yield test_db
 
-        @staticmethod
-        def get_or_none(*args, **kwargs):  # pylint: disable=unused-argument
-            file_dids = [
-                {'did': 'did1', 'size': 1},
-                {'did': 'did2', 'size': 3}
-            ]
-            file_dids_json = json.dumps(file_dids)
-            return Struct(file_dids=file_dids_json)
 
-    mocker.patch('rucio_jupyterlab.db.AttachedFilesListCache', MockAttachedFilesListCache)
-    result = database_instance.get_attached_files('namespace', 'did')
-    result_dict = [x.__dict__ for x in result]
+def test_get_attached_files__files_exist(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    attached_files = [AttachedFile(did=f'scope:name{i}', size=i) for i in range(5)]
+    database_instance.set_attached_files('namespace', 'scope:dataset', attached_files)
 
-    expected_result = [
-        AttachedFile(did='did1', size=1),
-        AttachedFile(did='did2', size=3)
-    ]
-    expected_result_dict = [x.__dict__ for x in expected_result]
+    result = database_instance.get_attached_files('namespace', 'scope:dataset')
 
-    assert result_dict == expected_result_dict, "Invalid return value"
+    assert [x.__dict__ for x in result] == [x.__dict__ for x in attached_files], "Invalid return value"
 
-    for res in result:
-        assert isinstance(res, AttachedFile), "Return array element is not AttachedFile"
 
+def test_get_attached_files__with_paging__should_return_page(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    attached_files = [AttachedFile(did=f'scope:name{i}', size=i) for i in range(5)]
+    database_instance.set_attached_files('namespace', 'scope:dataset', attached_files)
 
-def test_get_attached_files__files_not_exist(database_instance, mocker):  # pylint: disable=redefined-outer-name
-    class MockAttachedFilesListCache:
-        namespace = 'namespace'
-        did = 'did'
-        expiry = 0
+    result = database_instance.get_attached_files('namespace', 'scope:dataset', offset=1, limit=2)
 
-        @staticmethod
-        def get_or_none(*args, **kwargs):  # pylint: disable=no-self-use,unused-argument
-            return None
+    assert [x.did for x in result] == ['scope:name1', 'scope:name2'], "Invalid return value"
 
-    mocker.patch('rucio_jupyterlab.db.AttachedFilesListCache', MockAttachedFilesListCache)
-    result = database_instance.get_attached_files('namespace', 'did')
 
-    assert result is None, "Invalid return value"
+def test_get_attached_files__files_not_exist(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    assert database_instance.get_attached_files('namespace', 'scope:dataset') is None, "Invalid return value"
 
 
-def test_set_attached_files(database_instance, mocker):  # pylint: disable=redefined-outer-name
-    class MockAttachedFilesListCache:
-        @staticmethod
-        def execute(*args, **kwargs):  # pylint: disable=unused-argument
-            pass
+def test_get_attached_files__expired__should_return_none(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='scope:name', size=1)])
+    mock_time.return_value = 1000 + 7201
 
-        @staticmethod
-        def replace(namespace, did, file_dids, expiry):
-            assert namespace == 'namespace', "Invalid namespace"
-            assert did == 'scope:name', "Invalid DID"
-            expected_file_dids = [
-                {'did': 'did1', 'size': 1},
-                {'did': 'did2', 'size': 3}
-            ]
+    assert database_instance.get_attached_files('namespace', 'scope:dataset') is None, "Invalid return value"
 
-            assert json.loads(file_dids) == expected_file_dids, "Invalid file DIDs"
-            assert expiry > int(time.time()), "Expiry should be later than current time"
 
-            return MockAttachedFilesListCache
+def test_get_attached_files__stale__should_return_files(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    ttl = {'fresh': 60, 'max_stale': 600}
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='scope:name', size=1)], ttl=ttl)
+    assert not database_instance.is_attached_files_stale('namespace', 'scope:dataset', ttl['max_stale'])
+
+    mock_time.return_value = 1000 + 61
+    assert [x.did for x in database_instance.get_attached_files('namespace', 'scope:dataset')] == ['scope:name'], "Stale files should be served"
+    assert database_instance.is_attached_files_stale('namespace', 'scope:dataset', ttl['max_stale'])
+
+    mock_time.return_value = 1000 + 661
+    assert database_instance.get_attached_files('namespace', 'scope:dataset') is None, "Files past the stale window should not be served"
+
+
+def test_set_attached_files__existing_list__should_replace_files(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='did1', size=1), AttachedFile(did='did2', size=2)])
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='did3', size=3)])
+
+    result = database_instance.get_attached_files('namespace', 'scope:dataset')
+
+    assert [x.__dict__ for x in result] == [{'did': 'did3', 'size': 3}], "Invalid return value"
+
+
+@pytest.mark.parametrize('compact_encoding', [None, 'packed'])
+def test_set_attached_files__unchanged__should_keep_version(database_instance, memory_db, mocker, compact_encoding):  # pylint: disable=redefined-outer-name,unused-argument
+    mocker.patch.object(DatabaseInstance, 'compact_encoding', compact_encoding)
+    attached_files = [AttachedFile(did='scope:name1', size=1), AttachedFile(did='scope:name2', size=2)]
+
+    database_instance.set_attached_files('namespace', 'scope:dataset', attached_files)
+    version = database_instance.get_attached_files_version('namespace', 'scope:dataset')
+    database_instance.set_attached_files('namespace', 'scope:dataset', list(attached_files))
+
+    assert database_instance.get_attached_files_version('namespace', 'scope:dataset') == version, "Storing the same list should not be a change"
 
-    mocker.patch('rucio_jupyterlab.db.AttachedFilesListCache', MockAttachedFilesListCache)
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='scope:name1', size=1)])
+    assert database_instance.get_attached_files_version('namespace', 'scope:dataset') == version + 1
+    assert [x.did for x in database_instance.get_attached_files('namespace', 'scope:dataset')] == ['scope:name1']
 
-    attached_files = [
-        AttachedFile(did='did1', size=1),
-        AttachedFile(did='did2', size=3)
-    ]
-    database_instance.set_attached_files('namespace', 'scope:name', attached_files)
+
+def test_set_attached_files_bulk__should_store_each_list(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    database_instance.set_attached_files('namespace', 'scope:name1', [AttachedFile(did='scope:old', size=1)])
+    database_instance.set_attached_files_bulk('namespace', {
+        'scope:name1': [AttachedFile(did='scope:name1', size=1)],
+        'scope:name2': [AttachedFile(did='scope:name2', size=2)]
+    })
+
+    assert [x.__dict__ for x in database_instance.get_attached_files('namespace', 'scope:name1')] == [{'did': 'scope:name1', 'size': 1}]
+    assert [x.__dict__ for x in database_instance.get_attached_files('namespace', 'scope:name2')] == [{'did': 'scope:name2', 'size': 2}]
+
+
+def test_migrate_attached_files_list_cache__should_move_lists_to_rows(database_instance, memory_db):  # pylint: disable=redefined-outer-name
+    memory_db.execute_sql('CREATE TABLE attachedfileslistcache (namespace TEXT, did TEXT, file_dids TEXT, expiry DATETIME)')
+    memory_db.execute_sql('INSERT INTO attachedfileslistcache VALUES (?, ?, ?, ?)',
+                          ('namespace', 'scope:dataset', json.dumps([{'did': 'did1', 'size': 1}, {'did': 'did2', 'size': None}]), int(time.time()) + 60))
+    memory_db.execute_sql('INSERT INTO attachedfileslistcache VALUES (?, ?, ?, ?)',
+                          ('namespace', 'scope:expired', json.dumps([{'did': 'did3', 'size': 3}]), int(time.time()) - 60))
+
+    migrate_attached_files_list_cache()
+
+    result = database_instance.get_attached_files('namespace', 'scope:dataset')
+    assert [x.__dict__ for x in result] == [{'did': 'did1', 'size': 1}, {'did': 'did2', 'size': None}]
+    assert database_instance.get_attached_files('namespace', 'scope:expired') is None
+    assert 'attachedfileslistcache' not in memory_db.get_tables()
 
 
 def test_set_file_replica(database_instance, mocker):  # pylint: disable=redefined-outer-name
@@ -146,29 +177,223 @@ def test_set_file_replica(database_instance, mocker):  # pylint: disable=redefin
     database_instance.set_file_replica('namespace', 'scope:name', 'root://xrd1:1094//test', 123)
 
 
-def test_purge_cache(database_instance, mocker):  # pylint: disable=redefined-outer-name
-    class MockDeleteQuery:
-        @staticmethod
-        def execute(*args, **kwargs):
-            pass
+def test_get_pragmas__with_override__should_replace_defaults(monkeypatch):
+    monkeypatch.setenv('RUCIO_CACHE_DB_PRAGMAS', 'journal_mode=delete, mmap_size=0,malformed')
+
+    pragmas = get_pragmas()
+
+    assert pragmas['journal_mode'] == 'delete'
+    assert pragmas['mmap_size'] == '0'
+    assert pragmas['synchronous'] == 'normal'
+    assert 'malformed' not in pragmas
+
+
+def test_migrate_schema__should_apply_each_migration_once(mocker):
+    test_db = SqliteDatabase(':memory:')
+    mocker.patch('rucio_jupyterlab.db.db', test_db)
+    first_migration, second_migration = MagicMock(), MagicMock()
+    migrations = [first_migration]
+    mocker.patch('rucio_jupyterlab.db.SCHEMA_MIGRATIONS', migrations)
+
+    with test_db.bind_ctx([SchemaVersion]):
+        migrate_schema()
+        migrations.append(second_migration)
+        migrate_schema()
+        migrate_schema()
+
+        versions = [v.version for v in SchemaVersion.select().order_by(SchemaVersion.version)]
+
+    first_migration.assert_called_once()
+    second_migration.assert_called_once()
+    assert versions == [1, 2], "Invalid schema versions"
+
+
+def test_delete_expired_cache__should_delete_expired_rows_only(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    database_instance.set_file_replicas_bulk('namespace', [Struct(did=f'scope:name{i}', pfn='root://pfn', size=1) for i in range(5)])
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='scope:name0', size=1)])
+    database_instance.set_response_cache('namespace', 'old', '[]', 500)
+    database_instance.set_response_cache('namespace', 'new', '[]', 7000)
+    database_instance.set_replication_rule('namespace', 'scope:dataset', 'RSE', ('rule', 'OK', None))
+    mock_time.return_value = 1000 + 7201
+
+    deleted = database_instance.delete_expired_cache(response_max_age=3000, batch_size=2)
+
+    assert deleted == {'filereplicascache': 5, 'attachedfilescache': 1, 'rucioresponsecache': 1, 'replicationrulecache': 1}
+    assert AttachedFileCache.select().count() == 0, "Files of expired lists should be deleted"
+    assert [r.key for r in RucioResponseCache.select()] == ['new']
+
+
+def test_evict_least_recently_used_cache__should_evict_oldest_accessed(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time')
+    for i in range(3):
+        mock_time.return_value = 1000 + i
+        database_instance.set_file_replica('namespace', f'scope:name{i}', 'root://pfn', 1)
+    database_instance.get_file_replica('namespace', 'scope:name0')
+    mock_time.return_value = 2000
+    database_instance.flush_access_times()
+
+    evicted = database_instance.evict_least_recently_used_cache(fraction=0.3)
+
+    assert evicted['filereplicascache'] == 1
+    assert sorted(r.did for r in FileReplicasCache.select()) == ['scope:name0', 'scope:name2'], "Least recently used replica should be evicted"
+
+
+def test_sync_attached_file_replicas__should_write_changes_only(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    replicas = [PfnFileReplica(did=f'scope:name{i}', pfn=f'root://pfn{i}', size=i) for i in range(3)]
+
+    assert database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas) == {'added': 3, 'removed': 0, 'changed': 0, 'version': 1}
+    assert database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas) == {'added': 0, 'removed': 0, 'changed': 0, 'version': 1}
+
+    updated_replicas = [PfnFileReplica(did='scope:name0', pfn='root://moved', size=0), replicas[1]]
+    assert database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', updated_replicas) == {'added': 0, 'removed': 1, 'changed': 1, 'version': 2}
+
+    assert database_instance.get_attached_files_version('namespace', 'scope:dataset') == 2
+    assert [x.did for x in database_instance.get_attached_files('namespace', 'scope:dataset')] == ['scope:name0', 'scope:name1']
+    assert database_instance.get_file_replica('namespace', 'scope:name0').pfn == 'root://moved'
+
+
+def test_increment_attached_files_version__should_increment_cached_list_only(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', [PfnFileReplica(did='scope:name', pfn=None, size=1)])
+
+    database_instance.increment_attached_files_version('namespace', 'scope:dataset')
+    database_instance.increment_attached_files_version('namespace', 'scope:unknown')
+
+    assert database_instance.get_attached_files_version('namespace', 'scope:dataset') == 2
+    assert database_instance.get_attached_files_version('namespace', 'scope:unknown') is None
+
+
+def test_sync_attached_file_replicas__unchanged__should_extend_expiry(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    replicas = [PfnFileReplica(did='scope:name', pfn='root://pfn', size=1)]
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)
+    mock_time.return_value = 2000
+
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)
+    assert FileReplicasCache.get().expiry == 1000 + 7200, "Replicas should only be extended past half of their fresh window"
+
+    mock_time.return_value = 3000
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)
+    assert FileReplicasCache.get().expiry == 3000 + 7200
+    assert AttachedFilesCache.get().expiry == 3000 + 7200
+
+
+def test_sync_attached_file_replicas__unchanged__should_not_write(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    replicas = [PfnFileReplica(did=f'scope:name{i}', pfn=f'root://pfn{i}', size=i) for i in range(3)]
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)
+    mock_time.return_value = 1060
+    changes_before = memory_db.connection().total_changes
+
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)
+
+    assert memory_db.connection().total_changes == changes_before, "Refreshing an unchanged dataset should not write"
+    assert AttachedFilesCache.get().expiry == 1000 + 7200
+
+
+@pytest.mark.parametrize('count', [3, 1200])
+def test_lookup_file_replicas__should_return_found_and_missing(database_instance, memory_db, mocker, count):  # pylint: disable=redefined-outer-name,unused-argument
+    mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    replicas = [PfnFileReplica(did=f'scope:name{i}', pfn=f'root://pfn{i}', size=i) for i in range(0, count, 2)]
+    database_instance.set_file_replicas_bulk('namespace', replicas)
+    FileReplicasCache.update(expiry=999).where(FileReplicasCache.did == 'scope:name0').execute()
+
+    dids = [f'scope:name{i}' for i in range(count)]
+    found, missing = database_instance.lookup_file_replicas('namespace', dids)
+
+    assert missing == ['scope:name0'] + [f'scope:name{i}' for i in range(1, count, 2)], "Expired and unknown replicas should be missing, in input order"
+    assert len(found) == len(replicas) - 1
+    assert found['scope:name2'].pfn == 'root://pfn2'
+
+
+def test_sync_attached_file_replicas__compact_encoding__should_store_packed_list(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mocker.patch.object(DatabaseInstance, 'compact_encoding', 'zlib')
+    replicas = [PfnFileReplica(did=f'scope:name{i}', pfn=f'root://pfn/scope:name{i}', size=i) for i in range(3)]
+
+    assert database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)['added'] == 3
+    assert database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)['version'] == 1
+    assert AttachedFileCache.select().count() == 0 and FileReplicasCache.select().count() == 0, "Files should not be stored as rows"
+
+    result = database_instance.get_packed_file_replicas('namespace', 'scope:dataset')
+    assert [(x.did, x.pfn, x.size) for x in result] == [(x.did, x.pfn, x.size) for x in replicas]
+    assert [x.did for x in database_instance.get_attached_files('namespace', 'scope:dataset', offset=1, limit=1)] == ['scope:name1']
+
+    mocker.patch.object(DatabaseInstance, 'compact_encoding', None)
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas[:2])
+    assert database_instance.get_packed_file_replicas('namespace', 'scope:dataset') is None
+    assert database_instance.lookup_file_replicas('namespace', ['scope:name0', 'scope:name1'])[1] == [], "Turning the compact format off should store rows again"
+
+
+def test_set_attached_files__compact_encoding__should_not_return_replicas(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mocker.patch.object(DatabaseInstance, 'compact_encoding', 'packed')
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='scope:name1', size=1), AttachedFile(did='scope:name2', size=2)])
+
+    assert database_instance.get_packed_file_replicas('namespace', 'scope:dataset') is None, "File lists without PFNs hold no replicas"
+    assert [(x.did, x.size) for x in database_instance.get_attached_files('namespace', 'scope:dataset')] == [('scope:name1', 1), ('scope:name2', 2)]
+
+
+@pytest.mark.parametrize('compact_encoding', [None, 'packed'])
+def test_summarize_attached_file_replicas__should_aggregate_cached_replicas(database_instance, memory_db, mocker, compact_encoding):  # pylint: disable=redefined-outer-name,unused-argument
+    mocker.patch.object(DatabaseInstance, 'compact_encoding', compact_encoding)
+    replicas = [PfnFileReplica(did=f'scope:name{i}', pfn=f'root://pfn/scope:name{i}' if i else None, size=i) for i in range(4)]
+
+    assert database_instance.summarize_attached_file_replicas('namespace', 'scope:dataset') is None
+    database_instance.sync_attached_file_replicas('namespace', 'scope:dataset', replicas)
+    assert database_instance.summarize_attached_file_replicas('namespace', 'scope:dataset') == (4, 6, 3, 0)
+
+    database_instance.set_file_replicas_bulk('namespace', replicas[1:2])
+    database_instance.set_attached_files('namespace', 'scope:dataset', [AttachedFile(did='scope:name1', size=1), AttachedFile(did='scope:new', size=5)])
+    assert database_instance.summarize_attached_file_replicas('namespace', 'scope:dataset') == (2, 6, 1, 1), "Uncached replicas should be counted as missing"
+
+
+def test_get_replication_rule__should_return_rule_and_staleness(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    mock_time = mocker.patch('rucio_jupyterlab.db.time.time', return_value=1000)
+    ttl = {'fresh': 30, 'max_stale': 600}
+    database_instance.set_replication_rule('namespace', 'scope:dataset', 'RSE', ('rule', 'REPLICATING', None), ttl=ttl)
+    database_instance.set_replication_rule('namespace', 'scope:other', 'RSE', None, ttl=ttl)
+
+    assert database_instance.get_replication_rule('namespace', 'scope:dataset', 'RSE', 600) == (('rule', 'REPLICATING', None), False)
+    assert database_instance.get_replication_rule('namespace', 'scope:other', 'RSE', 600) == (None, False), "A missing rule should be cached"
+    assert database_instance.get_replication_rule('namespace', 'scope:dataset', 'OTHER-RSE', 600) is None
+
+    mock_time.return_value = 1000 + 31
+    assert database_instance.get_replication_rule('namespace', 'scope:dataset', 'RSE', 600)[1] is True
+    mock_time.return_value = 1000 + 631
+    assert database_instance.get_replication_rule('namespace', 'scope:dataset', 'RSE', 600) is None
+
+
+def test_get_cache_ttl__should_merge_instance_overrides(mocker):
+    mocker.patch.object(DatabaseInstance, 'cache_ttl', {'file_replicas': {'max_stale': 0}})
+    instance_config = {'cache_ttl': {'file_replicas': {'fresh': 60}}}
+
+    assert get_cache_ttl(instance_config, 'file_replicas') == {'fresh': 60, 'max_stale': 0}
+    assert get_cache_ttl(instance_config, 'attached_files') == {'fresh': 3600, 'max_stale': 3600}
+
 
-    class MockCacheEntity:
-        def __init__(self):
-            self.called = False
+def test_invalidate_cache__did_specified__should_delete_did_and_attached_files_only(database_instance, memory_db, mocker):  # pylint: disable=redefined-outer-name,unused-argument
+    replicas = [PfnFileReplica(did=f'scope:name{i}', pfn='root://pfn', size=i) for i in range(3)]
+    database_instance.sync_attached_file_replicas('atlas', 'scope:dataset', replicas[:2])
+    database_instance.sync_attached_file_replicas('atlas', 'scope:other', replicas[2:])
+    database_instance.sync_attached_file_replicas('cms', 'scope:dataset', replicas[:2])
+    database_instance.set_response_cache('atlas', 'atlas|userpass|root|https://rucio/dids/scope/dataset/rules', '[]', time.time())
+    database_instance.add_upload_job('atlas', 'scope:name0', 'scope:dataset', '/path', 'RSE', None, 1)
+    database_instance.set_replication_rule('atlas', 'scope:dataset', 'RSE', ('rule', 'OK', None))
+    database_instance.set_replication_rule('atlas', 'scope:other', 'RSE', None)
 
-        def delete(self, *args, **kwargs):  # pylint: disable=unused-argument
-            self.called = True
-            return MockDeleteQuery
+    deleted = database_instance.invalidate_cache(namespace='atlas', did='scope:dataset', batch_size=1)
 
-    mock_replicas_cache = MockCacheEntity()
-    mock_attached_files_list_cache = MockCacheEntity()
-    mock_file_upload_job = MockCacheEntity()
+    assert deleted == {'attached_files': 1, 'file_replicas': 2, 'responses': 1, 'replication_rules': 1}
+    assert sorted((r.namespace, r.did) for r in AttachedFilesCache.select()) == [('atlas', 'scope:other'), ('cms', 'scope:dataset')]
+    assert sorted((r.namespace, r.did) for r in FileReplicasCache.select()) == [('atlas', 'scope:name2'), ('cms', 'scope:name0'), ('cms', 'scope:name1')]
+    assert AttachedFileCache.select().count() == 3
+    assert FileUploadJob.select().count() == 1, "Upload jobs should only be deleted when asked for"
 
-    mocker.patch('rucio_jupyterlab.db.FileReplicasCache', mock_replicas_cache)
-    mocker.patch('rucio_jupyterlab.db.AttachedFilesListCache', mock_attached_files_list_cache)
-    mocker.patch('rucio_jupyterlab.db.FileUploadJob', mock_file_upload_job)
 
-    database_instance.purge_cache()
+def test_invalidate_cache__tables_specified__should_delete_from_tables_only(database_instance, memory_db):  # pylint: disable=redefined-outer-name,unused-argument
+    database_instance.sync_attached_file_replicas('atlas', 'scope:dataset', [PfnFileReplica(did='scope:name', pfn='root://pfn', size=1)])
+    database_instance.add_upload_job('atlas', 'scope:name0', None, '/path', 'RSE', None, 1)
 
-    assert mock_replicas_cache.called, "FileReplicasCache not cleared"
-    assert mock_attached_files_list_cache.called, "AttachedFilesListCache not cleared"
+    assert database_instance.invalidate_cache(tables=['file_replicas', 'upload_jobs']) == {'file_replicas': 1, 'upload_jobs': 1}
+    assert AttachedFilesCache.select().count() == 1
+    with pytest.raises(ValueError):
+        database_instance.invalidate_cache(tables=['userconfig'])
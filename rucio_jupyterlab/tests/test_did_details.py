@@ -55,3 +55,146 @@ def test_get_handler(mocker, rucio):
     calls = [call('namespace'), call('force', '0'), call('did')]
     mock_self.get_query_argument.assert_has_calls(calls, any_order=True)  # pylint: disable=no-member
     rucio_api_factory.for_instance.assert_called_once_with(mock_active_instance)  # pylint: disable=no-member
+
+
+def test_post_handler__replica_mode__should_get_details_in_bulk(mocker, rucio):
+    mock_self = MockHandler()
+    mock_active_instance = 'atlas'
+    mock_dids = ['scope:name1', 'scope:name2']
+
+    mocker.patch.object(mock_self, 'get_query_argument', return_value=mock_active_instance)
+    mocker.patch.object(mock_self, 'get_json_body', return_value={'dids': mock_dids})
+
+    rucio_api_factory = RucioAPIFactory(None)
+    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mock_self.rucio = rucio_api_factory
+
+    mock_did_details = [
+        {'status': 'OK', 'did': 'scope:name1', 'path': '/eos/user/rucio/scope:name1', 'size': 123},
+        {'status': 'OK', 'did': 'scope:name2', 'path': '/eos/user/rucio/scope:name2', 'size': 456}
+    ]
+
+    class MockReplicaModeHandler(ReplicaModeHandler):
+        def get_file_dids_details(self, dids):
+            assert dids == mock_dids, "Invalid DIDs"
+            return mock_did_details
+
+    mocker.patch('rucio_jupyterlab.handlers.did_details.ReplicaModeHandler', MockReplicaModeHandler)
+
+    def finish_side_effect(output):
+        finish_json = json.loads(output)
+        assert finish_json == mock_did_details, "Invalid finish response"
+
+    mocker.patch.object(mock_self, 'finish', side_effect=finish_side_effect)
+
+    asyncio.run(DIDDetailsHandler.post(mock_self))
+
+    mock_self.get_query_argument.assert_called_once_with('namespace')  # pylint: disable=no-member
+    mock_self.finish.assert_called_once()  # pylint: disable=no-member
+
+
+def test_post_handler__malformed_body__should_return_400(mocker, rucio):
+    mock_self = MockHandler()
+    mocker.patch.object(mock_self, 'get_query_argument', return_value='atlas')
+    mocker.patch.object(mock_self, 'set_status')
+    mocker.patch.object(mock_self, 'finish')
+
+    for body in [{}, {'dids': 'scope:name'}, {'dids': ['name']}, ['scope:name']]:
+        mocker.patch.object(mock_self, 'get_json_body', return_value=body)
+        asyncio.run(DIDDetailsHandler.post(mock_self))
+
+        mock_self.set_status.assert_called_with(400)  # pylint: disable=no-member
+        assert json.loads(mock_self.finish.call_args.args[0])['success'] is False  # pylint: disable=no-member
+
+
+def test_get_handler__paging_arguments__should_return_page(mocker, rucio):
+    mock_self = MockHandler()
+
+    def mock_get_query_argument(key, default=None):
+        args = {
+            'namespace': 'atlas',
+            'did': 'scope:name',
+            'offset': '1',
+            'limit': '1'
+        }
+        return args.get(key, default)
+
+    mocker.patch.object(mock_self, 'get_query_argument', side_effect=mock_get_query_argument)
+
+    rucio_api_factory = RucioAPIFactory(None)
+    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mock_self.rucio = rucio_api_factory
+
+    mock_page = {
+        'files': [{'status': 'OK', 'did': 'scope:name2', 'path': '/eos/user/rucio/scope:name2', 'size': 456}],
+        'offset': 1,
+        'limit': 1,
+        'total': 2,
+        'total_bytes': 579,
+        'status_counts': {'OK': 2}
+    }
+
+    class MockReplicaModeHandler(ReplicaModeHandler):
+        def get_did_details_page(self, scope, name, force_fetch=False, offset=0, limit=None):
+            assert (scope, name, force_fetch, offset, limit) == ('scope', 'name', False, 1, 1), "Invalid arguments"
+            return mock_page
+
+    mocker.patch('rucio_jupyterlab.handlers.did_details.ReplicaModeHandler', MockReplicaModeHandler)
+    mocker.patch.object(mock_self, 'finish')
+
+    asyncio.run(DIDDetailsHandler.get(mock_self))
+
+    mock_self.finish.assert_called_once_with(json.dumps(mock_page))  # pylint: disable=no-member
+
+
+def test_get_handler__invalid_paging_arguments__should_return_400(mocker, rucio):
+    mock_self = MockHandler()
+
+    def mock_get_query_argument(key, default=None):
+        args = {
+            'namespace': 'atlas',
+            'did': 'scope:name',
+            'offset': '-1'
+        }
+        return args.get(key, default)
+
+    mocker.patch.object(mock_self, 'get_query_argument', side_effect=mock_get_query_argument)
+    mocker.patch.object(mock_self, 'set_status')
+    mocker.patch.object(mock_self, 'finish')
+    mock_self.rucio = RucioAPIFactory(None)
+
+    asyncio.run(DIDDetailsHandler.get(mock_self))
+
+    mock_self.set_status.assert_called_once_with(400)  # pylint: disable=no-member
+    assert json.loads(mock_self.finish.call_args[0][0])['success'] is False  # pylint: disable=no-member
+
+
+def test_get_handler__summary__should_return_totals_only(mocker, rucio):
+    mock_self = MockHandler()
+
+    def mock_get_query_argument(key, default=None):
+        args = {
+            'namespace': 'atlas',
+            'did': 'scope:name',
+            'summary': '1'
+        }
+        return args.get(key, default)
+
+    mocker.patch.object(mock_self, 'get_query_argument', side_effect=mock_get_query_argument)
+
+    rucio_api_factory = RucioAPIFactory(None)
+    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mock_self.rucio = rucio_api_factory
+
+    mock_summary = {'total': 2, 'total_bytes': 579, 'status_counts': {'OK': 2}, 'status': 'OK'}
+
+    class MockReplicaModeHandler(ReplicaModeHandler):
+        def get_did_summary(self, scope, name, force_fetch=False):
+            return mock_summary
+
+    mocker.patch('rucio_jupyterlab.handlers.did_details.ReplicaModeHandler', MockReplicaModeHandler)
+    mocker.patch.object(mock_self, 'finish')
+
+    asyncio.run(DIDDetailsHandler.get(mock_self))
+
+    mock_self.finish.assert_called_once_with(json.dumps(mock_summary))  # pylint: disable=no-member
@@ -9,7 +9,7 @@
 
 import json
 from unittest.mock import call
-from rucio_jupyterlab.handlers.did_browser import DIDBrowserHandler, DIDBrowserHandlerImpl
+from rucio_jupyterlab.handlers.did_browser import DIDBrowserHandler, DIDBrowserHandlerImpl, _to_attached_file
 from rucio_jupyterlab.entity import AttachedFile
 from rucio_jupyterlab.rucio import RucioAPIFactory
 from .mocks.mock_db import MockDatabaseInstance
@@ -20,16 +20,23 @@ import asyncio
 MOCK_ACTIVE_INSTANCE = 'atlas'
 
 
-def test_get_files__cache_exist__no_force_fetch(mocker, rucio):
+def mock_get_replicas(replicas, delay=0):
+    async def get_replicas(scope, name, map_record=None):  # pylint: disable=unused-argument
+        await asyncio.sleep(delay)
+        return [map_record(replica) for replica in replicas]
+    return get_replicas
+
+
+def test_get_files__cache_exist__no_force_fetch(mocker, async_rucio):
     """
     If cache exist and force_fetch is false, assert method
-    to call db.get_attached_files and NOT rucio.get_replicas.
+    to call db.get_attached_files and NOT async_rucio.get_replicas.
     Assert their call parameters as well.
     """
 
     mock_db = MockDatabaseInstance()
     mocker.patch('rucio_jupyterlab.handlers.did_browser.get_db', return_value=mock_db)
-    mocker.patch.object(rucio, 'get_replicas', return_value=[])
+    mocker.patch.object(async_rucio, 'get_replicas', return_value=[])
 
     mock_attached_files = [
         AttachedFile('scope1:name1', 123456),
@@ -39,20 +46,20 @@ def test_get_files__cache_exist__no_force_fetch(mocker, rucio):
 
     mocker.patch.object(mock_db, 'get_attached_files', return_value=mock_attached_files)
 
-    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
-    result = handler.get_files('scope', 'name', False)
+    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.get_files('scope', 'name', False))
 
-    rucio.get_replicas.assert_not_called()
+    async_rucio.get_replicas.assert_not_called()
     mock_db.get_attached_files.assert_called_once_with(namespace=MOCK_ACTIVE_INSTANCE, did='scope:name')     # pylint: disable=no-member
 
     expected = [x.__dict__ for x in mock_attached_files]
     assert result == expected, "Invalid return value"
 
 
-def test_get_files__cache_exist__force_fetch(mocker, rucio):
+def test_get_files__cache_exist__force_fetch(mocker, async_rucio):
     """
     If cache exist and force_fetch is true, assert method
-    to NOT call db.get_attached_files and call rucio.get_replicas.
+    to NOT call db.get_attached_files and call async_rucio.get_replicas.
     Assert their call parameters as well.
     """
 
@@ -70,23 +77,23 @@ def test_get_files__cache_exist__force_fetch(mocker, rucio):
         for d in mock_replicas
     ]
 
-    mocker.patch.object(rucio, 'get_replicas', return_value=mock_replicas)
+    mocker.patch.object(async_rucio, 'get_replicas', side_effect=mock_get_replicas(mock_replicas))
     mocker.patch.object(mock_db, 'get_attached_files', return_value=mock_attached_files)
 
-    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
-    result = handler.get_files('scope', 'name', True)
+    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.get_files('scope', 'name', True))
 
-    rucio.get_replicas.assert_called_once_with('scope', 'name')
+    async_rucio.get_replicas.assert_called_once_with('scope', 'name', map_record=_to_attached_file)
     mock_db.get_attached_files.assert_not_called()   # pylint: disable=no-member
 
     expected = [x.__dict__ for x in mock_attached_files]
     assert result == expected, "Invalid return value"
 
 
-def test_get_files__cache_not_exist(mocker, rucio):
+def test_get_files__cache_not_exist(mocker, async_rucio):
     """
     If cache not exist and force_fetch is false, assert method
-    to call db.get_attached_files and rucio.get_replicas.
+    to call db.get_attached_files and async_rucio.get_replicas.
     Assert their call parameters as well.
     """
 
@@ -104,19 +111,41 @@ def test_get_files__cache_not_exist(mocker, rucio):
         for d in mock_replicas
     ]
 
-    mocker.patch.object(rucio, 'get_replicas', return_value=mock_replicas)
+    mocker.patch.object(async_rucio, 'get_replicas', side_effect=mock_get_replicas(mock_replicas))
     mocker.patch.object(mock_db, 'get_attached_files', return_value=None)
 
-    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
-    result = handler.get_files('scope', 'name')
+    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.get_files('scope', 'name'))
 
-    rucio.get_replicas.assert_called_once_with('scope', 'name')  # pylint: disable=no-member
+    async_rucio.get_replicas.assert_called_once_with('scope', 'name', map_record=_to_attached_file)  # pylint: disable=no-member
     mock_db.get_attached_files.assert_called_once_with(namespace=MOCK_ACTIVE_INSTANCE, did='scope:name')  # pylint: disable=no-member
 
     expected = [x.__dict__ for x in mock_attached_files]
     assert result == expected, "Invalid return value"
 
-def test_get_handler(mocker, rucio):
+def test_get_files__stale_cache__should_return_cache_and_fetch_in_background(mocker, async_rucio):
+    mock_db = MockDatabaseInstance()
+    mocker.patch('rucio_jupyterlab.handlers.did_browser.get_db', return_value=mock_db)
+    mocker.patch.object(mock_db, 'is_attached_files_stale', return_value=True)
+    mocker.patch.object(mock_db, 'set_attached_files')
+    mocker.patch.object(async_rucio, 'get_replicas', side_effect=mock_get_replicas([{'scope': 'scope1', 'name': 'name1', 'bytes': 1}], delay=0.05))
+
+    handler = DIDBrowserHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+
+    async def get_files_twice():
+        result = await handler.get_files('scope', 'name')
+        await handler.get_files('scope', 'name')
+        await asyncio.sleep(0.1)   # Let the background refresh run
+        return result
+
+    result = asyncio.run(get_files_twice())
+
+    assert result == [x.__dict__ for x in mock_db.get_attached_files(MOCK_ACTIVE_INSTANCE, 'scope:name')], "Stale files should be returned"
+    async_rucio.get_replicas.assert_called_once_with('scope', 'name', map_record=_to_attached_file)  # pylint: disable=no-member
+    mock_db.set_attached_files.assert_called_once()  # pylint: disable=no-member
+
+
+def test_get_handler(mocker, async_rucio):
     mock_self = MockHandler()
 
     def mock_get_query_argument(key, default=None):
@@ -130,7 +159,7 @@ def test_get_handler(mocker, rucio):
     mocker.patch.object(mock_self, 'get_query_argument', side_effect=mock_get_query_argument)
 
     rucio_api_factory = RucioAPIFactory(None)
-    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mocker.patch.object(rucio_api_factory, 'for_instance_async', return_value=async_rucio)
     mock_self.rucio = rucio_api_factory
 
     mock_attached_files = [
@@ -140,7 +169,7 @@ def test_get_handler(mocker, rucio):
     ]
 
     class MockDIDBrowserHandlerImpl(DIDBrowserHandlerImpl):
-        def get_files(self, scope, name, force_fetch=False):
+        async def get_files(self, scope, name, force_fetch=False):
             return [x.__dict__ for x in mock_attached_files]
 
     mocker.patch('rucio_jupyterlab.handlers.did_browser.DIDBrowserHandlerImpl', MockDIDBrowserHandlerImpl)
@@ -156,4 +185,4 @@ def test_get_handler(mocker, rucio):
     calls = [call('namespace'), call('poll', '0'), call('did')]
     mock_self.get_query_argument.assert_has_calls(calls, any_order=True)  # pylint: disable=no-member
 
-    rucio_api_factory.for_instance.assert_called_once_with(MOCK_ACTIVE_INSTANCE)  # pylint: disable=no-member
+    rucio_api_factory.for_instance_async.assert_called_once_with(MOCK_ACTIVE_INSTANCE)  # pylint: disable=no-member
@@ -0,0 +1,146 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import json
+from tornado.iostream import StreamClosedError
+from rucio_jupyterlab.handlers.did_events import DIDEventsHandler
+from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
+from rucio_jupyterlab.rucio import RucioAPIFactory
+from rucio_jupyterlab.rucio.exceptions import RucioAPIException
+from .mocks.mock_handler import MockHandler
+
+
+def make_events_handler(mocker, rucio, dids, flushes=None):
+    mock_self = MockHandler()
+    args = {'namespace': 'atlas', 'dids': dids}
+    mocker.patch.object(mock_self, 'get_query_argument', side_effect=lambda key, default=None: args.get(key, default))
+    mocker.patch.object(mock_self, 'set_header', create=True)
+    mocker.patch.object(mock_self, 'write', create=True)
+    mocker.patch.object(mock_self, 'flush', create=True, new_callable=mocker.AsyncMock,
+                        side_effect=[None] * (flushes - 1) + [StreamClosedError()] if flushes else None)
+
+    rucio_api_factory = RucioAPIFactory(None)
+    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mock_self.rucio = rucio_api_factory
+    mocker.patch('rucio_jupyterlab.handlers.did_events.EVENTS_INTERVAL', 0)
+    return mock_self
+
+
+def get_written_events(mock_self):
+    chunks = [call.args[0] for call in mock_self.write.call_args_list]
+    return [json.loads(chunk.split('data: ')[1]) if chunk.startswith('event: status') else None for chunk in chunks]
+
+
+def make_mock_replica_mode_handler(mocker, summaries, revisions):
+    class MockReplicaModeHandler(ReplicaModeHandler):
+        get_did_summary = mocker.Mock(side_effect=lambda scope, name, force_fetch=False: next(summaries[f'{scope}:{name}']))
+        get_did_revision = mocker.Mock(side_effect=lambda did: next(revisions[did]))
+
+    mocker.patch('rucio_jupyterlab.handlers.did_events.ReplicaModeHandler', MockReplicaModeHandler)
+    return MockReplicaModeHandler
+
+
+def test_get_handler__should_send_states_once_then_only_changes(mocker, rucio):
+    summaries = {
+        'scope:name1': iter([
+            {'total': 2, 'total_bytes': 3, 'status_counts': {'REPLICATING': 2}, 'status': 'REPLICATING'},
+            {'total': 2, 'total_bytes': 3, 'status_counts': {'OK': 2}, 'status': 'OK'}
+        ]),
+        'scope:name2': iter([{'total': 1, 'total_bytes': 1, 'status_counts': {'OK': 1}, 'status': 'OK'}])
+    }
+    revisions = {
+        'scope:name1': iter([(1, 'REPLICATING'), (1, 'REPLICATING'), (2, 'OK')]),
+        'scope:name2': iter([(5, 'OK')] * 3)
+    }
+    handler_class = make_mock_replica_mode_handler(mocker, summaries, revisions)
+    mocker.patch('rucio_jupyterlab.handlers.did_events.SUMMARY_REFRESH_INTERVAL', 3600)
+    mock_self = make_events_handler(mocker, rucio, 'scope:name1,scope:name2,scope:name1', flushes=3)
+
+    asyncio.run(DIDEventsHandler.get(mock_self))
+
+    mock_self.set_header.assert_any_call('Content-Type', 'text/event-stream')  # pylint: disable=no-member
+    assert get_written_events(mock_self) == [
+        {'did': 'scope:name1', 'version': 1, 'total': 2, 'total_bytes': 3, 'status_counts': {'REPLICATING': 2}, 'status': 'REPLICATING'},
+        {'did': 'scope:name2', 'version': 5, 'total': 1, 'total_bytes': 1, 'status_counts': {'OK': 1}, 'status': 'OK'},
+        None,
+        {'did': 'scope:name1', 'version': 2, 'total': 2, 'total_bytes': 3, 'status_counts': {'OK': 2}, 'status': 'OK'}
+    ], "Unchanged states should not be sent again"
+    assert handler_class.get_did_summary.call_count == 3, "Only DIDs with a new revision should be summarized"
+
+
+def test_get_handler__refresh_due__should_summarize_unchanged_dids(mocker, rucio):
+    summary = {'total': 1, 'total_bytes': 1, 'status_counts': {'OK': 1}, 'status': 'OK'}
+    handler_class = make_mock_replica_mode_handler(mocker, {'scope:name': iter([summary] * 2)}, {'scope:name': iter([(1, 'OK')] * 2)})
+    mocker.patch('rucio_jupyterlab.handlers.did_events.SUMMARY_REFRESH_INTERVAL', 0)
+    mock_self = make_events_handler(mocker, rucio, 'scope:name', flushes=2)
+
+    asyncio.run(DIDEventsHandler.get(mock_self))
+
+    assert get_written_events(mock_self) == [{'did': 'scope:name', 'version': 1, **summary}, None]
+    assert handler_class.get_did_summary.call_count == 2
+
+
+def test_get_handler__fetching__should_summarize_until_settled(mocker, rucio):
+    fetching = {'total': 1, 'total_bytes': 0, 'status_counts': {'FETCHING': 1}, 'status': 'FETCHING'}
+    handler_class = make_mock_replica_mode_handler(mocker, {'scope:name': iter([fetching] * 2)}, {'scope:name': iter([(1, 'OK')] * 2)})
+    mocker.patch('rucio_jupyterlab.handlers.did_events.SUMMARY_REFRESH_INTERVAL', 3600)
+    mock_self = make_events_handler(mocker, rucio, 'scope:name', flushes=2)
+
+    asyncio.run(DIDEventsHandler.get(mock_self))
+
+    assert handler_class.get_did_summary.call_count == 2, "DIDs being fetched should be summarized on every check"
+
+
+def test_get_handler__rucio_error__should_send_error_state(mocker, rucio):
+    class MockReplicaModeHandler(ReplicaModeHandler):
+        def get_did_revision(self, did):
+            return None
+
+        def get_did_summary(self, scope, name, force_fetch=False):
+            raise RucioAPIException(None, 'Rucio is down')
+
+    mocker.patch('rucio_jupyterlab.handlers.did_events.ReplicaModeHandler', MockReplicaModeHandler)
+    mock_self = make_events_handler(mocker, rucio, 'scope:name', flushes=1)
+
+    asyncio.run(DIDEventsHandler.get(mock_self))
+
+    assert get_written_events(mock_self) == [{'did': 'scope:name', 'error': 'Rucio is down'}]
+
+
+def test_get_handler__unexpected_error__should_send_error_state_for_that_did_only(mocker, rucio):
+    class MockReplicaModeHandler(ReplicaModeHandler):
+        def get_did_revision(self, did):
+            if did == 'scope:name2':
+                raise ValueError('Corrupted cache')
+            return 1, 'OK'
+
+        def get_did_summary(self, scope, name, force_fetch=False):
+            if name == 'name1':
+                raise KeyError('pfn')
+            return {'total': 1, 'total_bytes': 1, 'status_counts': {'OK': 1}, 'status': 'OK'}
+
+    mocker.patch('rucio_jupyterlab.handlers.did_events.ReplicaModeHandler', MockReplicaModeHandler)
+    mock_self = make_events_handler(mocker, rucio, 'scope:name1,scope:name2', flushes=1)
+
+    asyncio.run(DIDEventsHandler.get(mock_self))
+
+    assert get_written_events(mock_self) == [
+        {'did': 'scope:name1', 'error': "'pfn'"},
+        {'did': 'scope:name2', 'version': None, 'total': 1, 'total_bytes': 1, 'status_counts': {'OK': 1}, 'status': 'OK'}
+    ]
+
+
+def test_get_handler__malformed_dids__should_return_400(mocker, rucio):
+    mock_self = make_events_handler(mocker, rucio, 'scope:name,name')
+    mocker.patch.object(mock_self, 'set_status')
+    mocker.patch.object(mock_self, 'finish')
+
+    asyncio.run(DIDEventsHandler.get(mock_self))
+
+    mock_self.set_status.assert_called_once_with(400)  # pylint: disable=no-member
+    assert json.loads(mock_self.finish.call_args.args[0])['success'] is False  # pylint: disable=no-member
+    mock_self.write.assert_not_called()  # pylint: disable=no-member
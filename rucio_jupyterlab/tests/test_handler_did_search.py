@@ -18,19 +18,19 @@ import asyncio
 MOCK_ACTIVE_INSTANCE = 'atlas'
 
 
-def test_search_did__with_wildcard__wildcard_enabled__should_return_correct_response(mocker, rucio):
-    rucio.instance_config['wildcard_enabled'] = True
+def test_search_did__with_wildcard__wildcard_enabled__should_return_correct_response(mocker, async_rucio):
+    async_rucio.instance_config['wildcard_enabled'] = True
 
-    mocker.patch.object(rucio, 'search_did', return_value=[
+    mocker.patch.object(async_rucio, 'search_did', return_value=[
         {'scope': 'scope', 'name': 'name1', 'bytes': None, 'did_type': 'DIDTYPE.CONTAINER'},
         {'scope': 'scope', 'name': 'name2', 'bytes': None, 'did_type': 'DIDTYPE.DATASET'},
         {'scope': 'scope', 'name': 'name3', 'bytes': 123, 'did_type': 'DIDTYPE.FILE'}
     ])
 
-    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
-    result = handler.search_did('scope', 'name*', 'all', None, 100)
+    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.search_did('scope', 'name*', 'all', None, 100))
 
-    rucio.search_did.assert_called_once_with('scope', 'name*', 'all', None, 100)
+    async_rucio.search_did.assert_called_once_with('scope', 'name*', 'all', None, 100, offset=0)
 
     expected = [
         {'did': 'scope:name1', 'size': None, 'type': 'container'},
@@ -41,19 +41,19 @@ def test_search_did__with_wildcard__wildcard_enabled__should_return_correct_resp
     assert result == expected, "Invalid return value"
 
 
-def test_search_did__without_wildcard__wildcard_disabled__should_return_correct_response(mocker, rucio):
-    rucio.instance_config['wildcard_enabled'] = False
+def test_search_did__without_wildcard__wildcard_disabled__should_return_correct_response(mocker, async_rucio):
+    async_rucio.instance_config['wildcard_enabled'] = False
 
-    mocker.patch.object(rucio, 'search_did', return_value=[
+    mocker.patch.object(async_rucio, 'search_did', return_value=[
         {'scope': 'scope', 'name': 'name1', 'bytes': None, 'did_type': 'DIDTYPE.CONTAINER'},
         {'scope': 'scope', 'name': 'name2', 'bytes': None, 'did_type': 'DIDTYPE.DATASET'},
         {'scope': 'scope', 'name': 'name3', 'bytes': 123, 'did_type': 'DIDTYPE.FILE'}
     ])
 
-    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
-    result = handler.search_did('scope', 'name', 'all', None, 100)
+    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.search_did('scope', 'name', 'all', None, 100))
 
-    rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100)
+    async_rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100, offset=0)
 
     expected = [
         {'did': 'scope:name1', 'size': None, 'type': 'container'},
@@ -64,39 +64,74 @@ def test_search_did__without_wildcard__wildcard_disabled__should_return_correct_
     assert result == expected, "Invalid return value"
 
 
-def test_search_did__with_wildcard__wildcard_disabled__should_raise_exception(mocker, rucio):
-    rucio.instance_config['wildcard_enabled'] = False
+def test_search_did__offset_past_last_result__should_return_empty_list(mocker, async_rucio):
+    mocker.patch.object(async_rucio, 'search_did', return_value=[])
 
-    mocker.patch.object(rucio, 'search_did', return_value=[
+    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.search_did('scope', 'name', 'all', None, 100, offset=100))
+
+    async_rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100, offset=100)
+    assert result == [], "Invalid return value"
+
+
+def test_search_did__missing_did_type__should_fetch_metadata_in_bulk(mocker, async_rucio):
+    mocker.patch.object(async_rucio, 'search_did', return_value=[
+        {'scope': 'scope', 'name': 'name1', 'bytes': None, 'did_type': None},
+        {'scope': 'scope', 'name': 'name2', 'bytes': None, 'did_type': None},
+        {'scope': 'scope', 'name': 'name3', 'bytes': 123, 'did_type': 'FILE'}
+    ])
+    mocker.patch.object(async_rucio, 'get_metadata_bulk', return_value={
+        ('scope', 'name1'): {'scope': 'scope', 'name': 'name1', 'did_type': 'CONTAINER', 'bytes': None, 'length': None},
+        ('scope', 'name2'): {'scope': 'scope', 'name': 'name2', 'did_type': 'DATASET', 'bytes': 456, 'length': 2}
+    })
+
+    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
+    result = asyncio.run(handler.search_did('scope', 'name', 'all', {'key': 'value'}, 100))
+
+    async_rucio.get_metadata_bulk.assert_called_once_with([{'scope': 'scope', 'name': 'name1'}, {'scope': 'scope', 'name': 'name2'}])
+
+    expected = [
+        {'did': 'scope:name1', 'size': None, 'type': 'container'},
+        {'did': 'scope:name2', 'size': 456, 'type': 'dataset'},
+        {'did': 'scope:name3', 'size': 123, 'type': 'file'}
+    ]
+
+    assert result == expected, "Invalid return value"
+
+
+def test_search_did__with_wildcard__wildcard_disabled__should_raise_exception(mocker, async_rucio):
+    async_rucio.instance_config['wildcard_enabled'] = False
+
+    mocker.patch.object(async_rucio, 'search_did', return_value=[
         {'scope': 'scope', 'name': 'name1', 'bytes': None, 'did_type': 'DIDTYPE.CONTAINER'},
         {'scope': 'scope', 'name': 'name2', 'bytes': None, 'did_type': 'DIDTYPE.DATASET'},
         {'scope': 'scope', 'name': 'name3', 'bytes': 123, 'did_type': 'DIDTYPE.FILE'}
     ])
 
-    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
+    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
 
     with pytest.raises(WildcardDisallowedException):
-        handler.search_did('scope', 'name*', 'all', None, 100)
-        rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100)
+        asyncio.run(handler.search_did('scope', 'name*', 'all', None, 100))
+        async_rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100)
 
 
-def test_search_did__with_percent_wildcard__wildcard_disabled__should_raise_exception(mocker, rucio):
-    rucio.instance_config['wildcard_enabled'] = False
+def test_search_did__with_percent_wildcard__wildcard_disabled__should_raise_exception(mocker, async_rucio):
+    async_rucio.instance_config['wildcard_enabled'] = False
 
-    mocker.patch.object(rucio, 'search_did', return_value=[
+    mocker.patch.object(async_rucio, 'search_did', return_value=[
         {'scope': 'scope', 'name': 'name1', 'bytes': None, 'did_type': 'DIDTYPE.CONTAINER'},
         {'scope': 'scope', 'name': 'name2', 'bytes': None, 'did_type': 'DIDTYPE.DATASET'},
         {'scope': 'scope', 'name': 'name3', 'bytes': 123, 'did_type': 'DIDTYPE.FILE'}
     ])
 
-    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, rucio)
+    handler = DIDSearchHandlerImpl(MOCK_ACTIVE_INSTANCE, async_rucio)
 
     with pytest.raises(WildcardDisallowedException):
-        handler.search_did('scope', 'name%', 'all', None, 100)
-        rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100)
+        asyncio.run(handler.search_did('scope', 'name%', 'all', None, 100))
+        async_rucio.search_did.assert_called_once_with('scope', 'name', 'all', None, 100)
 
 
-def test_get_handler__inputs_correct__should_not_error(mocker, rucio):
+def test_get_handler__inputs_correct__should_not_error(mocker, async_rucio):
     mock_self = MockHandler()
 
     def mock_get_query_argument(key, default=None):
@@ -111,7 +146,7 @@ def test_get_handler__inputs_correct__should_not_error(mocker, rucio):
 
     class MockDIDSearchHandler(DIDSearchHandlerImpl):
         @staticmethod
-        def search_did(scope, name, search_type='all', filter=None, limit=100):
+        async def search_did(scope, name, search_type='all', filter=None, limit=100, offset=0):
             return [
                 {'did': 'scope:name1', 'size': None, 'type': 'container'},
                 {'did': 'scope:name2', 'size': None, 'type': 'dataset'},
@@ -132,7 +167,7 @@ def test_get_handler__inputs_correct__should_not_error(mocker, rucio):
     mocker.patch.object(mock_self, 'finish', side_effect=finish_side_effect)
 
     rucio_api_factory = RucioAPIFactory(None)
-    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mocker.patch.object(rucio_api_factory, 'for_instance_async', return_value=async_rucio)
     mock_self.rucio = rucio_api_factory
 
     asyncio.run(DIDSearchHandler.get(mock_self))
@@ -141,7 +176,7 @@ def test_get_handler__inputs_correct__should_not_error(mocker, rucio):
     mock_self.get_query_argument.assert_has_calls(calls, any_order=True)  # pylint: disable=no-member
 
 
-def test_get_handler__wildcard_disabled__should_print_error(mocker, rucio):
+def test_get_handler__wildcard_disabled__should_print_error(mocker, async_rucio):
     mock_self = MockHandler()
 
     def mock_get_query_argument(key, default=None):
@@ -156,7 +191,7 @@ def test_get_handler__wildcard_disabled__should_print_error(mocker, rucio):
 
     class MockDIDSearchHandler(DIDSearchHandlerImpl):
         @staticmethod
-        def search_did(scope, name, search_type='all', filter=None, limit=100):
+        async def search_did(scope, name, search_type='all', filter=None, limit=100, offset=0):
             raise WildcardDisallowedException()
 
     mocker.patch('rucio_jupyterlab.handlers.did_search.DIDSearchHandlerImpl', MockDIDSearchHandler)
@@ -170,7 +205,7 @@ def test_get_handler__wildcard_disabled__should_print_error(mocker, rucio):
     mocker.patch.object(mock_self, 'finish', side_effect=finish_side_effect)
 
     rucio_api_factory = RucioAPIFactory(None)
-    mocker.patch.object(rucio_api_factory, 'for_instance', return_value=rucio)
+    mocker.patch.object(rucio_api_factory, 'for_instance_async', return_value=async_rucio)
     mock_self.rucio = rucio_api_factory
 
     asyncio.run(DIDSearchHandler.get(mock_self))
@@ -0,0 +1,53 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import json
+from rucio_jupyterlab.handlers.purge_cache import PurgeCacheHandler
+from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
+from rucio_jupyterlab.rucio import RucioAPI
+from .mocks.mock_db import MockDatabaseInstance
+from .mocks.mock_handler import MockHandler
+
+
+def test_post_handler__did_specified__should_invalidate_did_only(mocker):
+    mock_self = MockHandler()
+    mocker.patch.object(mock_self, 'get_query_argument', return_value='atlas')
+    mocker.patch.object(mock_self, 'get_json_body', return_value={'did': 'scope:name'})
+    mocker.patch.object(mock_self, 'finish')
+    mock_db = MockDatabaseInstance()
+    mocker.patch.object(mock_db, 'invalidate_cache', return_value={'attached_files': 1, 'file_replicas': 3, 'responses': 0}, create=True)
+    mocker.patch('rucio_jupyterlab.handlers.purge_cache.get_db', return_value=mock_db)
+
+    RucioAPI.response_cache.put('atlas|userpass|root|https://rucio/dids/scope/name/rules', [])
+    RucioAPI.response_cache.put('atlas|userpass|root|https://rucio/dids/scope/other/rules', [])
+    ReplicaModeHandler.did_details_cache.put('atlas|scope:name', [], size=1)
+    ReplicaModeHandler.did_details_cache.put('cms|scope:name', [], size=1)
+
+    asyncio.run(PurgeCacheHandler.post(mock_self))
+
+    mock_db.invalidate_cache.assert_called_once_with(namespace='atlas', did='scope:name', tables=['attached_files', 'file_replicas', 'responses', 'replication_rules'])
+    mock_self.finish.assert_called_once_with(json.dumps({'success': True, 'deleted': {'attached_files': 1, 'file_replicas': 3, 'responses': 0}}))
+    assert RucioAPI.response_cache.lookup('atlas|userpass|root|https://rucio/dids/scope/name/rules', 60) is None
+    assert RucioAPI.response_cache.lookup('atlas|userpass|root|https://rucio/dids/scope/other/rules', 60) is not None
+    assert ReplicaModeHandler.did_details_cache.lookup('atlas|scope:name', 60) is None
+    assert ReplicaModeHandler.did_details_cache.lookup('cms|scope:name', 60) is not None
+    RucioAPI.response_cache.clear()
+    ReplicaModeHandler.did_details_cache.clear()
+
+
+def test_post_handler__unknown_table__should_return_400(mocker):
+    mock_self = MockHandler()
+    mocker.patch.object(mock_self, 'get_json_body', return_value={'tables': ['users']})
+    mocker.patch.object(mock_self, 'set_status')
+    mocker.patch.object(mock_self, 'finish')
+    mocker.patch('rucio_jupyterlab.handlers.purge_cache.get_db', return_value=MockDatabaseInstance())
+    mocker.patch.object(MockDatabaseInstance, 'invalidate_cache', side_effect=ValueError("Unknown cache tables: users"), create=True)
+
+    asyncio.run(PurgeCacheHandler.post(mock_self))
+
+    mock_self.set_status.assert_called_once_with(400)
+    mock_self.finish.assert_called_once_with(json.dumps({'success': False, 'error': "Unknown cache tables: users"}))
@@ -7,8 +7,9 @@
 # Authors:
 # - Muhammad Aditya Hilmy, <mhilmy@hey.com>, 2020
 
-from rucio_jupyterlab.entity import AttachedFile
+from rucio_jupyterlab.entity import AttachedFile, PfnFileReplica
 from rucio_jupyterlab.mode_handlers.replica import ReplicaModeHandler
+from rucio_jupyterlab.rucio.exceptions import RucioAPIException
 from .mocks.mock_db import MockDatabaseInstance, Struct
 
 
@@ -140,7 +141,7 @@ def create_mock_db_get_file_replica(exist=None, missing=None):
     return mock_db_get_file_replica
 
 
-def create_mock_db_get_file_replicas_bulk(exist=None, missing=None):
+def create_mock_db_lookup_file_replicas(exist=None, missing=None):
     """Create a mock for bulk replica retrieval that mimics individual get_file_replica behavior."""
     if not exist:
         exist = []
@@ -148,7 +149,7 @@ def create_mock_db_get_file_replicas_bulk(exist=None, missing=None):
     if not missing:
         missing = []
 
-    def mock_db_get_file_replicas_bulk(namespace, file_dids):  # pylint: disable=unused-argument
+    def mock_db_lookup_file_replicas(namespace, file_dids):  # pylint: disable=unused-argument
         replica_dict = {}
         for i, did in enumerate(file_dids):
             # Check if this replica should be missing from DB
@@ -164,24 +165,21 @@ def create_mock_db_get_file_replicas_bulk(exist=None, missing=None):
             pfn = "root://xrd1:1094//test/" + did if should_exist else None
             replica_dict[did] = Struct(namespace=namespace, did=did, pfn=pfn, size=123, expiry=123456798)
         
-        # If any replicas are missing, return None to indicate incomplete cache
-        if len(replica_dict) != len(file_dids):
-            return None
-            
-        return replica_dict
+        missing_dids = [did for did in file_dids if did not in replica_dict]
+        return replica_dict, missing_dids
 
-    return mock_db_get_file_replicas_bulk
+    return mock_db_lookup_file_replicas
 
 
-def mock_db_set_file_replica(namespace, file_did, pfn, size):  # pylint: disable=unused-argument
+def mock_db_set_file_replica(namespace, file_did, pfn, size, ttl=None):  # pylint: disable=unused-argument
     pass
 
 
-def mock_db_set_file_replicas_bulk(namespace, file_replicas, chunk_size=1000):  # pylint: disable=unused-argument
+def mock_db_set_file_replicas_bulk(namespace, file_replicas, chunk_size=1000, ttl=None):  # pylint: disable=unused-argument
     pass
 
 
-def mock_db_set_attached_files(namespace, did, attached_dids):  # pylint: disable=unused-argument
+def mock_db_set_attached_files(namespace, did, attached_dids, ttl=None):  # pylint: disable=unused-argument
     pass
 
 
@@ -191,6 +189,7 @@ def setup_common_mocks(mocker):
     mocker.patch.object(mock_db, "set_attached_files", side_effect=mock_db_set_attached_files)
     mocker.patch.object(mock_db, "set_file_replica", side_effect=mock_db_set_file_replica)
     mocker.patch.object(mock_db, "set_file_replicas_bulk", side_effect=mock_db_set_file_replicas_bulk)
+    mocker.patch.object(mock_db, "set_attached_files_bulk")
     refresh_mock = mocker.patch.object(ReplicaModeHandler, "_refresh_replicas_async", autospec=True)
     fetch_async_mock = mocker.patch.object(ReplicaModeHandler, "_fetch_and_cache_async", autospec=True)
 
@@ -201,7 +200,7 @@ def test_get_did_details__no_force_fetch__attached_files_cached__all_replicas_ca
     mock_db, refresh_mock, _ = setup_common_mocks(mocker)
     mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
     mocker.patch.object(mock_db, "get_file_replica", side_effect=create_mock_db_get_file_replica())
-    mocker.patch.object(mock_db, "get_file_replicas_bulk", side_effect=create_mock_db_get_file_replicas_bulk())
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas())
 
     mock_scope = 'scope'
     mock_name = 'name'
@@ -245,7 +244,7 @@ def test_get_did_details__no_force_fetch__attached_files_cached__all_replicas_ca
     mock_db, _, _ = setup_common_mocks(mocker)
     mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
     mocker.patch.object(mock_db, "get_file_replica", side_effect=create_mock_db_get_file_replica(exist=[False, True, True]))
-    mocker.patch.object(mock_db, "get_file_replicas_bulk", side_effect=create_mock_db_get_file_replicas_bulk(exist=[False, True, True]))
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(exist=[False, True, True]))
     mocker.patch.object(rucio, 'get_rules', return_value=mock_rucio_rule_status_replicating)
 
     mock_scope = 'scope'
@@ -269,7 +268,7 @@ def test_get_did_details__no_force_fetch__attached_files_cached__all_replicas_ca
     mock_db, _, _ = setup_common_mocks(mocker)
     mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
     mocker.patch.object(mock_db, "get_file_replica", side_effect=create_mock_db_get_file_replica(exist=[False, True, True]))
-    mocker.patch.object(mock_db, "get_file_replicas_bulk", side_effect=create_mock_db_get_file_replicas_bulk(exist=[False, True, True]))
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(exist=[False, True, True]))
     mocker.patch.object(rucio, 'get_rules', return_value=[])
 
     mock_scope = 'scope'
@@ -293,7 +292,7 @@ def test_get_did_details__no_force_fetch__attached_files_cached__all_replicas_ca
     mock_db, _, _ = setup_common_mocks(mocker)
     mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
     mocker.patch.object(mock_db, "get_file_replica", side_effect=create_mock_db_get_file_replica(exist=[False, True, True]))
-    mocker.patch.object(mock_db, "get_file_replicas_bulk", side_effect=create_mock_db_get_file_replicas_bulk(exist=[False, True, True]))
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(exist=[False, True, True]))
     mocker.patch.object(rucio, 'get_rules', return_value=mock_rucio_rule_status_ok)
 
     mock_scope = 'scope'
@@ -326,7 +325,7 @@ def test_get_did_details__force_fetch__attached_files_cached__some_replicas_cach
     handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
     result = handler.get_did_details(mock_scope, mock_name, True)
 
-    rucio.get_replicas.assert_called_once()
+    rucio.get_replicas.assert_called_once_with(mock_scope, mock_name, rse_expression='SWAN-EOS', stream=True)
     rucio.get_rules.assert_not_called()
 
     expected_result = [
@@ -483,3 +482,383 @@ def test_make_available__lifetime_not_specified__should_call_add_rule__lifetime_
 
     expected_dids = [{'scope': 'scope', 'name': 'name'}]
     rucio.add_replication_rule.assert_called_once_with(dids=expected_dids, rse_expression='SWAN-EOS', copies=1, lifetime=None)
+
+
+def test_get_did_details__repeated_poll__should_be_served_from_memory(rucio, mocker):
+    mock_db, refresh_mock, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
+    mocker.patch.object(mock_db, "lookup_file_replicas", wraps=mock_db.lookup_file_replicas)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    first = handler.get_did_details('scope', 'name')
+    second = handler.get_did_details('scope', 'name')
+
+    assert first == second, "Invalid return value"
+    mock_db.get_attached_files.assert_called_once()
+    mock_db.lookup_file_replicas.assert_called_once()
+    assert refresh_mock.call_count == 2, "Background refresh should still be scheduled on memory hits"
+
+
+def test_cache_replicas__changed__should_invalidate_memory_cache(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
+    mocker.patch.object(mock_db, "sync_attached_file_replicas", side_effect=[
+        {'added': 0, 'removed': 0, 'changed': 0, 'version': 1},
+        {'added': 0, 'removed': 0, 'changed': 1, 'version': 2}
+    ])
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    handler.get_did_details('scope', 'name')
+    replicas = [PfnFileReplica(did='scope:name1', pfn='root://pfn', size=1)]
+
+    handler._cache_replicas('scope:name', replicas)  # pylint: disable=protected-access
+    handler.get_did_details('scope', 'name')
+    assert mock_db.get_attached_files.call_count == 1, "Unchanged replicas should keep the memory cache"
+
+    handler._cache_replicas('scope:name', replicas)  # pylint: disable=protected-access
+    handler.get_did_details('scope', 'name')
+    assert mock_db.get_attached_files.call_count == 2, "Changed replicas should invalidate the memory cache"
+
+
+def test_get_file_dids_details__some_dids_available__should_fetch_in_bulk_and_cache(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(rucio, 'list_replicas_bulk', return_value=iter(mock_rucio_replicas_some_available))
+    mocker.patch.object(rucio, 'get_rules', return_value=mock_rucio_rule_status_replicating)
+    mocker.patch.object(rucio, 'get_replicas')
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_file_dids_details(['scope:name1', 'scope:name2', 'scope:name3'])
+
+    rucio.list_replicas_bulk.assert_called_once_with([
+        {'scope': 'scope', 'name': 'name1'},
+        {'scope': 'scope', 'name': 'name2'},
+        {'scope': 'scope', 'name': 'name3'}
+    ], rse_expression='SWAN-EOS')
+    rucio.get_replicas.assert_not_called()
+    mock_db.set_file_replicas_bulk.assert_called_once()
+    mock_db.set_attached_files_bulk.assert_called_once()
+    assert list(mock_db.set_attached_files_bulk.call_args.args[1]) == ['scope:name1', 'scope:name2', 'scope:name3']
+
+    expected_result = [
+        {'status': 'OK', 'did': 'scope:name1', 'path': '/eos/user/rucio/scope:name1', 'size': 123, 'pfn': 'root://xrd1:1094//eos/docker/user/rucio/scope:name1'},
+        {'status': 'REPLICATING', 'did': 'scope:name2', 'path': None, 'size': 123, 'pfn': None},
+        {'status': 'REPLICATING', 'did': 'scope:name3', 'path': None, 'size': 123, 'pfn': None}
+    ]
+
+    assert result == expected_result, "Invalid return value"
+
+
+def test_get_file_dids_details__rules_not_cached__should_list_account_rules_once(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "set_replication_rule")
+    mocker.patch.object(rucio, 'list_replicas_bulk', return_value=iter(mock_rucio_replicas_some_available))
+    mocker.patch.object(rucio, 'list_rules', side_effect=lambda filters: iter([
+        {'id': 'rule2', 'scope': 'scope', 'name': 'name2', 'state': 'STUCK'}
+    ]))
+    mocker.patch.object(rucio, 'get_rules', return_value=[])
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_file_dids_details(['scope:name1', 'scope:name2', 'scope:name3'])
+
+    assert [x['status'] for x in result] == ['OK', 'STUCK', 'NOT_AVAILABLE']
+    rucio.list_rules.assert_any_call({'account': 'account', 'rse_expression': 'SWAN-EOS'})
+    rucio.get_rules.assert_called_once_with('scope', 'name3', stream=True)
+    mock_db.set_replication_rule.assert_any_call('atlas', 'scope:name2', 'SWAN-EOS', ('rule2', 'STUCK', None), ttl=handler.replication_rules_ttl)
+
+
+def test_get_file_dids_details__rucio_error__should_report_failed_dids(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(rucio, 'list_replicas_bulk', side_effect=RucioAPIException(None, 'Rucio is down'))
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_file_dids_details(['scope:name:with:colons', 'scope:name2'])
+
+    rucio.list_replicas_bulk.assert_called_once_with([
+        {'scope': 'scope', 'name': 'name:with:colons'},
+        {'scope': 'scope', 'name': 'name2'}
+    ], rse_expression='SWAN-EOS')
+    assert result == [
+        {'status': 'FAILED', 'did': 'scope:name:with:colons', 'path': None, 'size': None, 'pfn': None, 'error': 'Rucio is down'},
+        {'status': 'FAILED', 'did': 'scope:name2', 'path': None, 'size': None, 'pfn': None, 'error': 'Rucio is down'}
+    ]
+    mock_db.set_file_replicas_bulk.assert_not_called()
+
+
+def test_get_file_dids_details__unknown_did__should_report_not_available(rucio, mocker):
+    setup_common_mocks(mocker)
+    mocker.patch.object(rucio, 'list_replicas_bulk', return_value=iter(mock_rucio_replicas_some_available[:1]))
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_file_dids_details(['scope:name1', 'scope:unknown'])
+
+    assert [x['did'] for x in result] == ['scope:name1', 'scope:unknown']
+    assert result[1] == {'status': 'NOT_AVAILABLE', 'did': 'scope:unknown', 'path': None, 'size': None, 'pfn': None}
+
+
+def test_get_did_details__some_replicas_expired__should_fetch_missing_replicas_only(rucio, mocker):
+    mock_db, _, fetch_async_mock = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(missing=[False, True, False]))
+    missing_replica = PfnFileReplica(did='scope:name2', pfn='root://xrd1:1094//test/scope:name2', size=123)
+    mocker.patch.object(ReplicaModeHandler, "fetch_file_replicas_bulk", return_value=[missing_replica])
+
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_fetch_task", autospec=True)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_details('scope', 'name')
+
+    handler.fetch_file_replicas_bulk.assert_not_called()
+    assert [x['status'] for x in result] == ['FETCHING'], "Missing replicas should be fetched in the background"
+    # The full fetch requested next is skipped, it shares the DID as in-flight key
+    assert schedule_mock.call_args_list[0].args[1] == 'scope:name'
+    assert fetch_async_mock.call_args.args[3] == 'scope:name'
+
+    _, key, worker, _ = schedule_mock.call_args.args
+    assert key == 'scope:name'
+    worker()
+    handler.fetch_file_replicas_bulk.assert_called_once_with(['scope:name2'])
+    mock_db.set_file_replicas_bulk.assert_called_once_with('atlas', [missing_replica], ttl=handler.file_replicas_ttl)
+
+
+def test_get_did_details__missing_replica_unknown_to_rucio__should_store_it_without_pfn(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(missing=[True, True]))
+    mocker.patch.object(mock_db, "increment_attached_files_version")
+    found_replica = PfnFileReplica(did='scope:name1', pfn='root://xrd1:1094//test/scope:name1', size=1)
+    mocker.patch.object(ReplicaModeHandler, "fetch_file_replicas_bulk", return_value=[found_replica])
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_fetch_task", autospec=True)
+    invalidate_mock = mocker.patch.object(ReplicaModeHandler.did_details_cache, "invalidate")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    attached_files = [AttachedFile(did='scope:name1', size=1), AttachedFile(did='scope:name2', size=2)]
+    assert handler.get_all_pfn_file_replicas_from_db(attached_files, 'scope:name') is None
+    schedule_mock.call_args.args[2]()
+
+    stored_replicas = mock_db.set_file_replicas_bulk.call_args.args[1]
+    assert [(x.did, x.pfn, x.size) for x in stored_replicas] == [
+        ('scope:name1', 'root://xrd1:1094//test/scope:name1', 1),
+        ('scope:name2', None, 2)
+    ], "Files unknown to Rucio should be stored without a PFN instead of being fetched again on every poll"
+    mock_db.increment_attached_files_version.assert_called_once_with('atlas', 'scope:name')
+    invalidate_mock.assert_called_once_with('atlas|scope:name')
+
+
+def test_get_did_details__missing_replicas_fetch_fails__should_not_raise(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(missing=[True]))
+    mocker.patch.object(ReplicaModeHandler, "fetch_file_replicas_bulk", side_effect=RucioAPIException(None, 'Rucio is down'))
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_fetch_task", autospec=True)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    handler.get_all_pfn_file_replicas_from_db([AttachedFile(did='scope:name1', size=1)], 'scope:name')
+    worker = schedule_mock.call_args.args[2]
+
+    worker()
+
+
+def test_get_did_details__packed_replicas__should_not_look_up_rows(rucio, mocker):
+    mock_db, refresh_mock, _ = setup_common_mocks(mocker)
+    packed_replicas = [PfnFileReplica(did='scope:name1', pfn='root://xrd1:1094//test/scope:name1', size=123)]
+    mocker.patch.object(mock_db, "get_packed_file_replicas", return_value=packed_replicas)
+    mocker.patch.object(mock_db, "get_attached_files")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_details('scope', 'name')
+
+    assert result == [{'status': 'OK', 'did': 'scope:name1', 'path': '/eos/user/rucio/scope:name1', 'size': 123, 'pfn': 'root://xrd1:1094//test/scope:name1'}]
+    mock_db.get_attached_files.assert_not_called()
+    refresh_mock.assert_called_once_with(handler, 'scope', 'name', 'scope:name')
+
+
+def test_get_did_details_page__should_map_window_only_and_count_all_files(rucio, mocker):
+    setup_common_mocks(mocker)
+    mocker.patch.object(ReplicaModeHandler, "get_attached_file_replicas", return_value=[
+        PfnFileReplica(did='scope:name1', pfn='root://xrd1:1094//test/scope:name1', size=123),
+        PfnFileReplica(did='scope:name2', pfn=None, size=123),
+        PfnFileReplica(did='scope:name3', pfn='root://xrd1:1094//test/scope:name3', size=123)
+    ])
+    mocker.patch.object(ReplicaModeHandler, "get_did_status", return_value=ReplicaModeHandler.STATUS_REPLICATING)
+    translate_spy = mocker.spy(ReplicaModeHandler, "translate_pfn_to_path")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_details_page('scope', 'name', offset=2, limit=5)
+
+    assert result == {
+        'files': [{'status': 'OK', 'did': 'scope:name3', 'path': '/eos/user/rucio/scope:name3', 'size': 123, 'pfn': 'root://xrd1:1094//test/scope:name3'}],
+        'offset': 2,
+        'limit': 5,
+        'total': 3,
+        'total_bytes': 369,
+        'status_counts': {'OK': 2, 'REPLICATING': 1},
+        'status': 'REPLICATING'
+    }
+    assert translate_spy.call_count == 1, "Only the files of the page should be mapped"
+
+
+def test_get_did_details_page__rows_cached__should_page_in_db(rucio, mocker):
+    mock_db, refresh_mock, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_packed_file_replicas", return_value=None)
+    mocker.patch.object(mock_db, "summarize_attached_file_replicas", return_value=(3, 369, 2, 0))
+    mocker.patch.object(mock_db, "get_attached_files", return_value=[AttachedFile(did='scope:name3', size=123)])
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas())
+    mocker.patch.object(ReplicaModeHandler, "get_did_status", return_value=ReplicaModeHandler.STATUS_REPLICATING)
+    get_all_spy = mocker.spy(ReplicaModeHandler, "get_attached_file_replicas")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_details_page('scope', 'name', offset=2, limit=5)
+
+    assert result == {
+        'files': [{'status': 'OK', 'did': 'scope:name3', 'path': '/eos/user/rucio/scope:name3', 'size': 123, 'pfn': 'root://xrd1:1094//test/scope:name3'}],
+        'offset': 2,
+        'limit': 5,
+        'total': 3,
+        'total_bytes': 369,
+        'status_counts': {'OK': 2, 'REPLICATING': 1},
+        'status': 'REPLICATING'
+    }
+    mock_db.get_attached_files.assert_called_once_with('atlas', 'scope:name', 2, 5)
+    mock_db.lookup_file_replicas.assert_called_once_with('atlas', ['scope:name3'])
+    get_all_spy.assert_not_called()
+    refresh_mock.assert_called_once_with(handler, 'scope', 'name', 'scope:name')
+
+
+def test_get_did_details_page__replicas_missing__should_not_page_in_db(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_packed_file_replicas", return_value=None)
+    mocker.patch.object(mock_db, "summarize_attached_file_replicas", return_value=(3, 369, 2, 1))
+    mocker.patch.object(mock_db, "get_attached_files", return_value=None)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_details_page('scope', 'name', offset=2, limit=5)
+
+    assert result['status'] == ReplicaModeHandler.STATUS_FETCHING
+    mock_db.get_attached_files.assert_called_once_with('atlas', 'scope:name')
+
+
+def test_get_did_summary__all_replicas_cached__should_aggregate_in_db(rucio, mocker):
+    mock_db, refresh_mock, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "summarize_attached_file_replicas", return_value=(3, 369, 2, 0))
+    mocker.patch.object(mock_db, "get_attached_files")
+    mocker.patch.object(ReplicaModeHandler, "get_did_status", return_value=ReplicaModeHandler.STATUS_STUCK)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_summary('scope', 'name')
+
+    assert result == {'total': 3, 'total_bytes': 369, 'status_counts': {'OK': 2, 'STUCK': 1}, 'status': 'STUCK'}
+    mock_db.get_attached_files.assert_not_called()
+    refresh_mock.assert_called_once_with(handler, 'scope', 'name', 'scope:name')
+
+
+def test_get_did_summary__replicas_missing__should_fall_back_to_details(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "summarize_attached_file_replicas", return_value=(3, 369, 2, 1))
+    mocker.patch.object(mock_db, "get_attached_files", return_value=MOCK_ATTACHED_FILES)
+    mocker.patch.object(mock_db, "lookup_file_replicas", side_effect=create_mock_db_lookup_file_replicas(missing=[False, True, False]))
+    missing_replica = PfnFileReplica(did='scope:name2', pfn='root://xrd1:1094//test/scope:name2', size=123)
+    mocker.patch.object(ReplicaModeHandler, "fetch_file_replicas_bulk", return_value=[missing_replica])
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_fetch_task", autospec=True)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    result = handler.get_did_summary('scope', 'name')
+
+    assert result == {'total': 1, 'total_bytes': 0, 'status_counts': {'FETCHING': 1}, 'status': 'FETCHING'}
+    schedule_mock.call_args.args[2]()
+    handler.fetch_file_replicas_bulk.assert_called_once_with(['scope:name2'])
+
+
+def test_get_did_status__rule_cached__should_not_fetch_rules(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_replication_rule", return_value=((None, 'REPLICATING', None), True))
+    mocker.patch.object(rucio, 'get_rules', return_value=mock_rucio_rule_status_ok)
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_fetch_task")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+
+    assert handler.get_did_status('scope', 'name') == 'REPLICATING'
+    mock_db.get_replication_rule.assert_called_once_with('atlas', 'scope:name', 'SWAN-EOS', handler.replication_rules_ttl['max_stale'])
+    rucio.get_rules.assert_not_called()
+    assert schedule_mock.call_args[0][0] == 'scope:name|rule', "Stale rules should be refreshed in the background"
+
+
+def test_get_did_status__rule_not_cached__should_fetch_and_cache_rule(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "set_replication_rule")
+    mocker.patch.object(rucio, 'get_rules', return_value=[])
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+
+    assert handler.get_did_status('scope', 'name') == 'NOT_AVAILABLE'
+    mock_db.set_replication_rule.assert_called_once_with('atlas', 'scope:name', 'SWAN-EOS', None, ttl=handler.replication_rules_ttl)
+
+
+def test_get_did_revision__should_read_caches_only(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "get_attached_files_version", return_value=3)
+    mocker.patch.object(mock_db, "get_replication_rule", return_value=((None, 'REPLICATING', None), True))
+    mocker.patch.object(rucio, 'get_rules')
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_fetch_task")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+
+    assert handler.get_did_revision('scope:name') == (3, 'REPLICATING')
+    rucio.get_rules.assert_not_called()
+    schedule_mock.assert_not_called()
+
+
+def test_refresh_replication_rule__replicating_to_ok__should_invalidate_replicas(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "invalidate_cache")
+    mocker.patch.object(rucio, 'get_rules', return_value=mock_rucio_rule_status_ok)
+    ReplicaModeHandler.did_details_cache.put('atlas|scope:name', [], size=1)
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+
+    assert handler._refresh_replication_rule('scope', 'name', 'OK') == 'OK'   # pylint: disable=protected-access
+    mock_db.invalidate_cache.assert_not_called()
+
+    assert handler._refresh_replication_rule('scope', 'name', 'REPLICATING') == 'OK'   # pylint: disable=protected-access
+    mock_db.invalidate_cache.assert_called_once_with('atlas', 'scope:name', tables=['attached_files', 'file_replicas'])
+    assert ReplicaModeHandler.did_details_cache.lookup('atlas|scope:name', 60) is None
+
+
+def test_get_did_status__rule_watched__should_not_fetch_rules(rucio, mocker):
+    setup_common_mocks(mocker)
+    mocker.patch.object(rucio, 'list_rules', return_value=[{'id': 'rule', 'scope': 'scope', 'name': 'name', 'state': 'REPLICATING'}])
+    mocker.patch.object(rucio, 'get_rules')
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    handler._get_rule_watcher().poll()   # pylint: disable=protected-access
+
+    assert handler.get_did_status('scope', 'name') == 'REPLICATING'
+    rucio.list_rules.assert_called_once_with({'account': 'account', 'rse_expression': 'SWAN-EOS'})
+    rucio.get_rules.assert_not_called()
+
+
+def test_refresh_replicas_async__rule_watched__should_not_refresh(rucio, mocker):
+    mocker.patch("rucio_jupyterlab.mode_handlers.replica.get_db", return_value=MockDatabaseInstance())
+    mocker.patch.object(rucio, 'list_rules', return_value=[{'id': 'rule', 'scope': 'scope', 'name': 'name', 'state': 'OK'}])
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_replica_refresh")
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    handler._get_rule_watcher().poll()   # pylint: disable=protected-access
+    handler._refresh_replicas_async('scope', 'other', 'scope:other')   # pylint: disable=protected-access
+    handler._refresh_replicas_async('scope', 'name', 'scope:name')   # pylint: disable=protected-access
+
+    schedule_mock.assert_called_once_with('scope', 'other', 'scope:other')
+
+
+def test_apply_rule_change__should_invalidate_or_refresh_replicas(rucio, mocker):
+    mock_db, _, _ = setup_common_mocks(mocker)
+    mocker.patch.object(mock_db, "set_replication_rule")
+    mocker.patch.object(mock_db, "invalidate_cache")
+    schedule_mock = mocker.patch.object(ReplicaModeHandler, "_schedule_replica_refresh")
+    replicating_rule = {'id': 'rule', 'scope': 'scope', 'name': 'name', 'state': 'REPLICATING', 'locks_ok_cnt': 1}
+
+    handler = ReplicaModeHandler(namespace='atlas', rucio=rucio)
+    handler._apply_rule_change('scope:name', replicating_rule, {**replicating_rule, 'locks_ok_cnt': 2})   # pylint: disable=protected-access
+    schedule_mock.assert_called_once_with('scope', 'name', 'scope:name')
+    mock_db.invalidate_cache.assert_not_called()
+
+    handler._apply_rule_change('scope:name', replicating_rule, {**replicating_rule, 'state': 'OK'})   # pylint: disable=protected-access
+    mock_db.invalidate_cache.assert_called_once_with('atlas', 'scope:name', tables=['attached_files', 'file_replicas'])
+    mock_db.set_replication_rule.assert_called_with('atlas', 'scope:name', 'SWAN-EOS', ('rule', 'OK', None), ttl=handler.replication_rules_ttl)
@@ -8,6 +8,9 @@
 # - Muhammad Aditya Hilmy, <mhilmy@hey.com>, 2020
 
 import json
+import types
+import pytest
+from rucio_jupyterlab.rucio.exceptions import RucioHTTPException
 from .conftest import MOCK_BASE_URL, MOCK_ACCOUNT, MOCK_AUTH_TOKEN
 
 
@@ -41,6 +44,20 @@ def test_search_did_empty_result(rucio, mocker, requests_mock):
     assert response == [], "Invalid response"
 
 
+def test_search_did_with_limit_and_offset_should_return_page(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    scope, name = "scope", "name"
+
+    mock_response_json = [{'scope': 'scope', 'name': f'name{i}', 'type': 'file', 'bytes': i} for i in range(5)]
+    mock_response = '\n'.join([json.dumps(x) for x in mock_response_json])
+
+    requests_mock.get(f"{MOCK_BASE_URL}/dids/{scope}/dids/search?type=all&long=1&name={name}", text=mock_response)
+    response = rucio.search_did(scope, name, 'all', limit=2, offset=1)
+
+    assert response == mock_response_json[1:3], "Invalid response"
+    assert requests_mock.last_request.qs['limit'] == ['3']
+
+
 def test_get_files_non_empty_result(rucio, mocker, requests_mock):
     mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
     scope, name = "scope", "name"
@@ -174,6 +191,66 @@ def test_get_replicas_empty_result(rucio, mocker, requests_mock):
     assert response == [], "Invalid response"
 
 
+def test_get_replicas_with_filters_should_send_query_params(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    scope, name = "scope", "name"
+
+    requests_mock.get(f"{MOCK_BASE_URL}/replicas/{scope}/{name}", text='')
+    rucio.get_replicas(scope, name, rse_expression='SWAN-EOS', schemes=['root', 'https'], all_states=True)
+
+    assert requests_mock.last_request.qs == {'rse_expression': ['swan-eos'], 'schemes': ['root,https'], 'all_states': ['true']}
+
+
+def test_list_replicas_bulk_should_chunk_dids(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+
+    dids = [{'scope': 'scope', 'name': f'name{i}'} for i in range(3)]
+    responses = [
+        {'text': '\n'.join([json.dumps(x) for x in dids[:2]])},
+        {'text': json.dumps(dids[2])}
+    ]
+
+    requests_mock.post(f"{MOCK_BASE_URL}/replicas/list", responses)
+    response = list(rucio.list_replicas_bulk(dids, rse_expression='SWAN-EOS', chunk_size=2))
+
+    assert response == dids, "Invalid response"
+    assert requests_mock.call_count == 2
+    assert requests_mock.request_history[0].json() == {'dids': dids[:2], 'all_states': False, 'rse_expression': 'SWAN-EOS'}
+    assert requests_mock.request_history[1].json() == {'dids': dids[2:], 'all_states': False, 'rse_expression': 'SWAN-EOS'}
+
+
+def test_get_replicas_stream_should_yield_records(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    scope, name = "scope", "name"
+
+    request_headers = {'X-Rucio-Auth-Token': MOCK_AUTH_TOKEN}
+    mock_response_json = [
+        {'scope': 'scope1', 'name': 'name1'},
+        {'scope': 'scope2', 'name': 'name2'},
+        {'scope': 'scope3', 'name': 'name3'}
+    ]
+    mock_response = '\n'.join([json.dumps(x) for x in mock_response_json]) + '\n'
+
+    requests_mock.get(f"{MOCK_BASE_URL}/replicas/{scope}/{name}", request_headers=request_headers, text=mock_response)
+    response = rucio.get_replicas(scope, name, stream=True)
+
+    assert isinstance(response, types.GeneratorType), "Streaming response should be a generator"
+    assert list(response) == mock_response_json, "Invalid response"
+
+
+def test_get_files_stream_http_error_should_raise(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    scope, name = "scope", "name"
+
+    requests_mock.get(f"{MOCK_BASE_URL}/dids/{scope}/{name}/files", status_code=404, headers={'ExceptionClass': 'DataIdentifierNotFound'})
+
+    with pytest.raises(RucioHTTPException) as excinfo:
+        list(rucio.get_files(scope, name, stream=True))
+
+    assert excinfo.value.status_code == 404, "Invalid status code"
+    assert excinfo.value.exception_class == 'DataIdentifierNotFound', "Invalid exception class"
+
+
 def test_add_replication_rule(rucio, mocker, requests_mock):
     mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
 
@@ -218,3 +295,14 @@ def test_add_replication_rule(rucio, mocker, requests_mock):
                         'asynchronous': mock_asynchronous, 'priority': mock_priority, 'meta': mock_meta}
 
     assert adapter.last_request.json() == expected_request, "Invalid request payload"
+
+
+def test_list_rules__should_filter_by_account_and_rse(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    mock_rules = [{'scope': 'scope', 'name': 'name1', 'state': 'OK'}, {'scope': 'scope', 'name': 'name2', 'state': 'REPLICATING'}]
+
+    requests_mock.get(f"{MOCK_BASE_URL}/rules/?account=account&rse_expression=SWAN-EOS", text='\n'.join(json.dumps(x) for x in mock_rules))
+    response = rucio.list_rules({'account': 'account', 'rse_expression': 'SWAN-EOS'})
+
+    assert list(response) == mock_rules, "Invalid response"
+    assert requests_mock.last_request.qs == {'account': ['account'], 'rse_expression': ['swan-eos']}
@@ -0,0 +1,205 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import json
+import pytest
+import tornado.httpserver
+import tornado.web
+from tornado.simple_httpclient import SimpleAsyncHTTPClient
+from tornado.iostream import StreamClosedError
+from tornado.testing import bind_unused_port
+from rucio_jupyterlab.rucio import RucioAPI, AsyncRucioAPI
+from rucio_jupyterlab.rucio.exceptions import RucioHTTPException
+from .conftest import MOCK_AUTH_TOKEN, MOCK_USERNAME, MOCK_PASSWORD, MOCK_ACCOUNT
+
+MOCK_REPLICAS = [
+    {'scope': 'scope', 'name': 'name1', 'bytes': 123},
+    {'scope': 'scope', 'name': 'name2', 'bytes': 456}
+]
+
+
+class MockReplicasHandler(tornado.web.RequestHandler):
+    requests = []
+
+    async def get(self, scope, name):
+        MockReplicasHandler.requests.append((self.request.headers.get('X-Rucio-Auth-Token'), self.request.query_arguments))
+        if name == 'missing':
+            self.set_status(404)
+            self.set_header('ExceptionClass', 'DataIdentifierNotFound')
+            self.set_header('ExceptionMessage', 'Data identifier not found.')
+            self.finish()
+            return
+
+        await asyncio.sleep(0.05)
+        for replica in MOCK_REPLICAS:
+            self.write(json.dumps(replica) + '\n')
+            await self.flush()      # Deliver records in separate chunks
+
+
+class MockSearchHandler(tornado.web.RequestHandler):
+    sent = 0
+    closed = False
+
+    async def get(self, scope):
+        try:
+            for i in range(100):
+                self.write(json.dumps({'scope': scope, 'name': f'name{i}'}) + '\n')
+                await self.flush()      # Deliver records in separate chunks
+                MockSearchHandler.sent += 1
+                await asyncio.sleep(0.01)
+        except StreamClosedError:
+            MockSearchHandler.closed = True
+
+
+class MockBulkMetadataHandler(tornado.web.RequestHandler):
+    supported = True
+    requests = []
+
+    def post(self):
+        if not MockBulkMetadataHandler.supported:
+            raise tornado.web.HTTPError(404)
+
+        dids = json.loads(self.request.body)['dids']
+        MockBulkMetadataHandler.requests.append(dids)
+        for did in dids:
+            self.write(json.dumps({**did, 'did_type': 'DATASET', 'bytes': 123, 'length': 1}) + '\n')
+
+
+class MockMetadataHandler(tornado.web.RequestHandler):
+    requests = []
+
+    def get(self, scope, name):
+        MockMetadataHandler.requests.append((scope, name))
+        self.write(json.dumps({'scope': scope, 'name': name, 'did_type': 'DATASET', 'bytes': 123, 'length': 1}))
+
+
+def run_with_mock_server(coroutine_factory):
+    async def run():
+        sock, port = bind_unused_port()
+        server = tornado.httpserver.HTTPServer(tornado.web.Application([
+            (r'/replicas/([^/]+)/([^/]+)', MockReplicasHandler),
+            (r'/dids/([^/]+)/dids/search', MockSearchHandler),
+            (r'/dids/bulkmeta', MockBulkMetadataHandler),
+            (r'/dids/([^/]+)/([^/]+)/meta', MockMetadataHandler)
+        ]))
+        server.add_sockets([sock])
+        try:
+            rucio = RucioAPI({'name': 'atlas', 'rucio_base_url': f'http://127.0.0.1:{port}'}, auth_type='userpass',
+                             auth_config={'username': MOCK_USERNAME, 'password': MOCK_PASSWORD, 'account': MOCK_ACCOUNT})
+            return await coroutine_factory(AsyncRucioAPI(rucio))
+        finally:
+            server.stop()
+
+    MockReplicasHandler.requests = []
+    MockSearchHandler.sent = 0
+    MockSearchHandler.closed = False
+    MockBulkMetadataHandler.requests = []
+    MockMetadataHandler.requests = []
+    AsyncRucioAPI._bulk_metadata_unsupported.clear()
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def mock_authentication(mocker):
+    RucioAPI.clear_auth_token_cache()
+    RucioAPI.response_cache.clear()
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 4102444800))
+
+
+def test_get_replicas__should_parse_streamed_records():
+    result = run_with_mock_server(lambda rucio: rucio.get_replicas('scope', 'name', rse_expression='SWAN-EOS'))
+
+    assert result == MOCK_REPLICAS, "Invalid response"
+    assert MockReplicasHandler.requests == [(MOCK_AUTH_TOKEN, {'rse_expression': [b'SWAN-EOS']})]
+
+
+def to_did(replica):
+    return replica['scope'] + ':' + replica['name']
+
+
+def test_get_replicas__map_record__should_return_mapped_records():
+    result = run_with_mock_server(lambda rucio: rucio.get_replicas('scope', 'name', map_record=to_did))
+
+    assert result == ['scope:name1', 'scope:name2'], "Invalid response"
+
+
+def test_get_replicas__without_pycurl__should_lift_body_size_limit(mocker):
+    mocker.patch('rucio_jupyterlab.rucio.async_rucio.HTTPClientClass', SimpleAsyncHTTPClient)
+
+    async def get_replicas(rucio):
+        return await rucio.get_replicas('scope', 'name'), rucio._get_client()  # pylint: disable=protected-access
+
+    result, client = run_with_mock_server(get_replicas)
+
+    assert result == MOCK_REPLICAS, "Invalid response"
+    assert isinstance(client, SimpleAsyncHTTPClient)
+    assert client.max_body_size > 100 * 1024 * 1024, "Streamed listings of large datasets exceed the default limit"
+
+
+def test_get_replicas__http_error__should_raise_rucio_http_exception():
+    with pytest.raises(RucioHTTPException) as excinfo:
+        run_with_mock_server(lambda rucio: rucio.get_replicas('scope', 'missing'))
+
+    assert excinfo.value.status_code == 404
+    assert excinfo.value.exception_class == 'DataIdentifierNotFound'
+
+
+def test_get_replicas__concurrent_identical_calls__should_share_upstream_request():
+    async def get_twice(rucio):
+        return await asyncio.gather(rucio.get_replicas('scope', 'name'), rucio.get_replicas('scope', 'name'))
+
+    result = run_with_mock_server(get_twice)
+
+    assert result == [MOCK_REPLICAS, MOCK_REPLICAS], "Invalid response"
+    assert len(MockReplicasHandler.requests) == 1, "Concurrent identical GETs should be coalesced"
+
+
+def test_search_did__limit__should_stop_reading_once_enough_records_arrived():
+    async def search(rucio):
+        result = await rucio.search_did('scope', 'name*', limit=2, offset=3)
+        await asyncio.sleep(0.1)    # Let the server notice the closed connection
+        return result
+
+    result = run_with_mock_server(search)
+
+    assert result == [{'scope': 'scope', 'name': 'name3'}, {'scope': 'scope', 'name': 'name4'}], "Invalid response"
+    assert MockSearchHandler.closed, "The stream should be dropped once offset + limit records were read"
+    assert MockSearchHandler.sent < 100
+
+
+def test_search_did__without_pycurl__should_skip_and_limit_records(mocker):
+    mocker.patch('rucio_jupyterlab.rucio.async_rucio.HTTPClientClass', SimpleAsyncHTTPClient)
+
+    result = run_with_mock_server(lambda rucio: rucio.search_did('scope', 'name*', limit=2, offset=3))
+
+    assert result == [{'scope': 'scope', 'name': 'name3'}, {'scope': 'scope', 'name': 'name4'}], "Invalid response"
+
+
+def test_get_metadata_bulk__should_fetch_in_chunks_and_cache_per_did():
+    dids = [{'scope': 'scope', 'name': f'name{i}'} for i in range(5)]
+
+    async def get_twice(rucio):
+        first = await rucio.get_metadata_bulk(dids, chunk_size=2)
+        second = await rucio.get_metadata_bulk(dids[:3])
+        return first, second
+
+    first, second = run_with_mock_server(get_twice)
+
+    assert len(first) == 5 and first[('scope', 'name4')]['did_type'] == 'DATASET'
+    assert second == {key: first[key] for key in [('scope', 'name0'), ('scope', 'name1'), ('scope', 'name2')]}
+    assert sorted(len(chunk) for chunk in MockBulkMetadataHandler.requests) == [1, 2, 2], "Cached DIDs should not be requested again"
+    assert MockMetadataHandler.requests == []
+
+
+def test_get_metadata_bulk__endpoint_unsupported__should_fall_back_to_individual_requests(mocker):
+    mocker.patch.object(MockBulkMetadataHandler, 'supported', False)
+    dids = [{'scope': 'scope', 'name': 'name1'}, {'scope': 'scope', 'name': 'name2'}]
+
+    result = run_with_mock_server(lambda rucio: rucio.get_metadata_bulk(dids))
+
+    assert result[('scope', 'name2')] == {'scope': 'scope', 'name': 'name2', 'did_type': 'DATASET', 'bytes': 123, 'length': 1}
+    assert sorted(MockMetadataHandler.requests) == [('scope', 'name1'), ('scope', 'name2')]
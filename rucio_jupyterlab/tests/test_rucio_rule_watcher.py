@@ -0,0 +1,64 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import time
+from unittest.mock import MagicMock, call
+from rucio_jupyterlab.rucio import rule_watcher
+from rucio_jupyterlab.rucio.rule_watcher import RuleWatcher
+
+
+def make_rule(name, state='REPLICATING', locks_ok_cnt=0):
+    return {'id': f'rule_{name}', 'scope': 'scope', 'name': name, 'state': state, 'locks_ok_cnt': locks_ok_cnt}
+
+
+def test_poll__should_report_changed_rules_only():
+    listings = [
+        [make_rule('name1'), make_rule('name2'), make_rule('name3')],
+        [make_rule('name1'), make_rule('name2', locks_ok_cnt=5), make_rule('name4', state='OK')]
+    ]
+    on_change = MagicMock()
+    watcher = RuleWatcher.watch('atlas', lambda: listings.pop(0), on_change, interval=30)
+
+    assert watcher.poll() == [], "The first listing should not be reported"
+    assert watcher.is_current() and watcher.covers('scope:name3')
+
+    assert sorted(watcher.poll()) == ['scope:name2', 'scope:name3', 'scope:name4']
+    on_change.assert_has_calls([
+        call('scope:name2', make_rule('name2'), make_rule('name2', locks_ok_cnt=5)),
+        call('scope:name3', make_rule('name3'), None),
+        call('scope:name4', None, make_rule('name4', state='OK'))
+    ], any_order=True)
+    assert watcher.get_rule('scope:name3') is None
+
+
+def test_poll__on_change_fails__should_report_other_changes():
+    listings = [[make_rule('name1'), make_rule('name2')], [make_rule('name1', state='OK'), make_rule('name2', state='OK')]]
+    on_change = MagicMock(side_effect=[Exception('database is locked'), None])
+    watcher = RuleWatcher.watch('atlas', lambda: listings.pop(0), on_change, interval=30)
+
+    watcher.poll()
+    watcher.poll()
+
+    assert on_change.call_count == 2
+
+
+def test_watch__same_key__should_return_running_watcher():
+    watcher = RuleWatcher.watch('atlas', list, MagicMock())
+
+    assert RuleWatcher.watch('atlas', list, MagicMock()) is watcher
+    assert not watcher.is_current(), "Nothing has been listed yet"
+
+
+def test_run__unused_watcher__should_stop(mocker):
+    mocker.patch.object(rule_watcher, 'IDLE_TIMEOUT', 0)
+    list_rules = MagicMock(return_value=[])
+    watcher = RuleWatcher.watch('atlas', list_rules, MagicMock())
+    watcher._last_used = time.time() - 1   # pylint: disable=protected-access
+
+    watcher._run()   # pylint: disable=protected-access
+
+    list_rules.assert_not_called()
+    assert RuleWatcher.watch('atlas', list_rules, MagicMock()) is not watcher, "An unused watcher should be replaced"
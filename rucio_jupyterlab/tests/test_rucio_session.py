@@ -0,0 +1,79 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import pytest
+from rucio_jupyterlab.rucio.session import RucioSessionPool
+from .conftest import MOCK_BASE_URL, MOCK_AUTH_TOKEN
+
+
+@pytest.fixture(autouse=True)
+def clear_session_pool():
+    RucioSessionPool.close_all()
+    yield
+    RucioSessionPool.close_all()
+
+
+def get_session(*args, **kwargs):
+    with RucioSessionPool.checkout(*args, **kwargs) as session:
+        return session
+
+
+def test_checkout__same_server__should_reuse_session():
+    session1 = get_session(MOCK_BASE_URL, verify='/rucio.crt')
+    session2 = get_session(MOCK_BASE_URL, verify='/rucio.crt')
+
+    assert session1 is session2, "Session should be reused"
+
+
+def test_checkout__different_tls_settings__should_not_reuse_session():
+    session1 = get_session(MOCK_BASE_URL, verify='/rucio.crt')
+    session2 = get_session(MOCK_BASE_URL, verify='/rucio.crt', cert=('/cert.pem', '/key.pem'))
+
+    assert session1 is not session2, "Sessions with different client certs should not be shared"
+    assert session2.cert == ('/cert.pem', '/key.pem'), "Client cert not set on session"
+
+
+def test_checkout__different_pool_size__should_not_reuse_session():
+    session1 = get_session(MOCK_BASE_URL, pool_size=2)
+    session2 = get_session(MOCK_BASE_URL, pool_size=20)
+
+    assert session1 is not session2, "Sessions with different pool sizes should not be shared"
+    assert session2.get_adapter(MOCK_BASE_URL)._pool_maxsize == 20  # pylint: disable=protected-access
+
+
+def test_checkout__idle_session__should_be_evicted_and_closed(mocker):
+    mock_time = mocker.patch('rucio_jupyterlab.rucio.session.time.monotonic', return_value=1000)
+    session1 = get_session(MOCK_BASE_URL, idle_timeout=10)
+    mock_close = mocker.patch.object(session1, 'close')
+
+    mock_time.return_value = 1011
+    session2 = get_session(MOCK_BASE_URL, idle_timeout=10)
+
+    assert session1 is not session2, "Idle session should have been replaced"
+    mock_close.assert_called_once()
+
+
+def test_checkout__idle_session_in_use__should_be_closed_once_released(mocker):
+    mock_time = mocker.patch('rucio_jupyterlab.rucio.session.time.monotonic', return_value=1000)
+    with RucioSessionPool.checkout(MOCK_BASE_URL, idle_timeout=10) as session:
+        mock_close = mocker.patch.object(session, 'close')
+
+        mock_time.return_value = 1011
+        assert get_session(MOCK_BASE_URL, idle_timeout=10) is not session, "Idle session should have been replaced"
+        mock_close.assert_not_called()
+
+    mock_close.assert_called_once()
+
+
+def test_rucio_api_requests__should_share_pooled_session(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    requests_mock.get(f"{MOCK_BASE_URL}/dids/scope/name/rules", text='')
+    requests_mock.get(f"{MOCK_BASE_URL}/dids/scope/name/parents", text='')
+
+    rucio.get_rules('scope', 'name')
+    rucio.get_parents('scope', 'name')
+
+    assert len(RucioSessionPool._sessions) == 1, "Requests to the same server should share one session"  # pylint: disable=protected-access
@@ -0,0 +1,73 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from rucio_jupyterlab.rucio.singleflight import SingleFlight
+from .conftest import MOCK_BASE_URL, MOCK_AUTH_TOKEN
+
+
+def test_do__concurrent_identical_calls__should_execute_once():
+    single_flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def slow_call():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ['result']
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        leader = executor.submit(single_flight.do, 'key', slow_call)
+        started.wait(5)
+        follower = executor.submit(single_flight.do, 'key', slow_call)
+        time.sleep(0.1)     # Let the follower join the in-flight call
+        release.set()
+
+        assert leader.result() == ['result']
+        assert follower.result() is leader.result()
+
+    assert len(calls) == 1, "Identical calls should share a single execution"
+
+
+def test_do__call_raises__should_propagate_and_forget_key():
+    single_flight = SingleFlight()
+
+    def failing_call():
+        raise ValueError('failure')
+
+    with pytest.raises(ValueError):
+        single_flight.do('key', failing_call)
+
+    assert single_flight.do('key', lambda: 'ok') == 'ok'
+
+
+def test_get_scopes__concurrent_calls__should_share_upstream_request(rucio, mocker, requests_mock):
+    mocker.patch('rucio_jupyterlab.rucio.rucio.authenticate_userpass', return_value=(MOCK_AUTH_TOKEN, 1368440583))
+    barrier = threading.Barrier(2)
+    release = threading.Event()
+
+    def scopes_callback(request, context):
+        release.wait(5)
+        return '["scope1", "scope2"]'
+
+    requests_mock.get(f"{MOCK_BASE_URL}/scopes/", text=scopes_callback)
+
+    def get_scopes():
+        barrier.wait(5)
+        return rucio.get_scopes()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [executor.submit(get_scopes) for _ in range(2)]
+        threading.Timer(0.2, release.set).start()
+        results = [future.result() for future in futures]
+
+    assert results == [['scope1', 'scope2'], ['scope1', 'scope2']]
+    assert requests_mock.call_count == 1, "Concurrent identical GETs should be coalesced"
@@ -0,0 +1,108 @@
+# Copyright European Organization for Nuclear Research (CERN)
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# You may not use this file except in compliance with the License.
+# You may obtain a copy of the License at http://www.apache.org/licenses/LICENSE-2.0
+
+import asyncio
+import os
+import threading
+import time
+import pytest
+from rucio_jupyterlab.rucio.async_rucio import AsyncRucioAPI
+from rucio_jupyterlab.rucio.client_environment import RucioClientEnvironment
+from rucio_jupyterlab.rucio.token_refresher import AuthTokenRefresher
+from .conftest import MOCK_AUTH_TOKEN
+
+
+@pytest.fixture(autouse=True)
+def cancel_refreshes():
+    AuthTokenRefresher.cancel_all()
+    yield
+    AuthTokenRefresher.cancel_all()
+
+
+def test_schedule__token_used__should_refresh_before_expiry():
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return 0    # Already expired, so no further refresh is scheduled
+
+    AuthTokenRefresher.schedule('atlas', time.time() + 0.2, refresh, fraction=0.5)
+    AuthTokenRefresher.touch('atlas')
+
+    assert refreshed.wait(2), "Token should have been refreshed"
+
+
+def test_schedule__token_unused__should_not_refresh():
+    refreshed = threading.Event()
+
+    def refresh():
+        refreshed.set()
+        return time.time() + 0.2
+
+    AuthTokenRefresher.schedule('atlas', time.time() + 0.2, refresh, fraction=0.5)
+
+    assert refreshed.wait(2), "The first refresh follows the authentication, which counts as a use"
+    refreshed.clear()
+    assert not refreshed.wait(0.5), "Token unused since the last refresh should not be refreshed"
+
+
+def test_schedule__expired_token__should_not_schedule():
+    AuthTokenRefresher.schedule('atlas', time.time() - 1, lambda: 0)
+
+    assert 'atlas' not in AuthTokenRefresher._timers
+
+
+def test_client_environment__should_share_auth_token(rucio, mocker):
+    mocker.patch.object(rucio, '_get_auth_token', return_value=MOCK_AUTH_TOKEN)
+
+    with RucioClientEnvironment(rucio) as rucio_home:
+        token_file_path = os.path.join(rucio_home, 'auth_token')
+        with open(token_file_path) as token_file:
+            assert token_file.read() == MOCK_AUTH_TOKEN
+        with open(os.path.join(rucio_home, 'etc', 'rucio.cfg')) as config_file:
+            assert f'auth_token_file_path={token_file_path}\n' in config_file.readlines()
+
+
+def test_schedule__token_with_listener__should_refresh_and_notify():
+    notified = threading.Event()
+    refresh_count = []
+
+    def refresh():
+        refresh_count.append(1)
+        return time.time() + 0.2
+
+    AuthTokenRefresher.add_listener('atlas', notified.set)
+    try:
+        AuthTokenRefresher.schedule('atlas', time.time() + 0.2, refresh, fraction=0.5)
+        assert notified.wait(2), "Listener should be notified of the refresh"
+        notified.clear()
+        assert notified.wait(2), "Token with a listener should be refreshed although it is unused"
+    finally:
+        AuthTokenRefresher.remove_listener('atlas', notified.set)
+
+
+def test_client_environment__token_refreshed__should_republish_token(rucio, mocker):
+    mocker.patch.object(rucio, '_get_auth_token', return_value=MOCK_AUTH_TOKEN)
+    mocker.patch.object(rucio, '_get_cached_token', return_value='renewed-token')
+    mock_add_listener = mocker.spy(AuthTokenRefresher, 'add_listener')
+
+    with RucioClientEnvironment(rucio) as rucio_home:
+        listener = mock_add_listener.call_args.args[1]
+        listener()
+        with open(os.path.join(rucio_home, 'auth_token')) as token_file:
+            assert token_file.read() == 'renewed-token'
+
+    assert 'atlas' not in AuthTokenRefresher._listeners, "Listener should be removed on exit"  # pylint: disable=protected-access
+
+
+def test_async_get_auth_token__cached__should_touch_token(rucio, mocker):
+    mocker.patch.object(rucio, '_get_cached_token', return_value=MOCK_AUTH_TOKEN)
+    mock_touch = mocker.patch.object(AuthTokenRefresher, 'touch')
+
+    token = asyncio.run(AsyncRucioAPI(rucio)._get_auth_token())  # pylint: disable=protected-access
+
+    assert token == MOCK_AUTH_TOKEN
+    mock_touch.assert_called_once_with('atlas')
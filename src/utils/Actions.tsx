@@ -86,9 +86,10 @@ export class Actions {
     namespace: string,
     did: string,
     type: DIDSearchType,
-    filters: string
+    filters: string,
+    offset = 0
   ): Promise<IDIDSearchResult[]> {
-    const query = { namespace, did, type, filters };
+    const query = { namespace, did, type, filters, offset };
     return requestAPI<IDIDSearchResult[]>(`did-search?${qs.encode(query)}`);
   }
 
@@ -153,6 +154,34 @@ export class Actions {
     return didDetails[0];
   }
 
+  async getFileDIDsDetails(
+    namespace: string,
+    dids: string[]
+  ): Promise<IFileDIDDetails[]> {
+    const init = {
+      method: 'POST',
+      body: JSON.stringify({ dids })
+    };
+
+    const didDetails = await requestAPI<IFileDIDDetails[]>(
+      'did?namespace=' + encodeURIComponent(namespace),
+      init
+    );
+    const didMap = didDetails.reduce(
+      (acc: { [did: string]: IFileDIDDetails }, curr) => {
+        acc[curr.did] = curr;
+        return acc;
+      },
+      {}
+    );
+
+    UIStore.update(s => {
+      s.fileDetails = { ...s.fileDetails, ...didMap };
+    });
+
+    return didDetails;
+  }
+
   async getCollectionDIDDetails(
     namespace: string,
     did: string,
@@ -51,3 +51,69 @@ export async function requestAPI<T>(
 
   return convertSnakeCase ? camelcaseKeysDeep(data) : data;
 }
+
+/**
+ * Listen to a Server-Sent Events stream of the API extension
+ *
+ * @param endPoint API REST end point for the extension
+ * @param onEvent Called with the name and the parsed data of each event
+ * @param signal Aborts the stream
+ * @returns Resolves when the server closes the stream
+ */
+export async function requestEventStream(
+  endPoint: string,
+  onEvent: (event: string, data: any) => void,
+  signal?: AbortSignal
+): Promise<void> {
+  const settings = ServerConnection.makeSettings();
+  const [path, queryString] = endPoint.split('?');
+  const base = URLExt.join(settings.baseUrl, EXTENSION_ID, path);
+  const requestUrl = queryString ? `${base}?${queryString}` : base;
+
+  let response: Response;
+  try {
+    response = await ServerConnection.makeRequest(
+      requestUrl,
+      { signal },
+      settings
+    );
+  } catch (error) {
+    throw new ServerConnection.NetworkError(error as TypeError);
+  }
+
+  if (!response.ok || !response.body) {
+    throw new ServerConnection.ResponseError(response);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let pending = '';
+
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) {
+      return;
+    }
+
+    pending += decoder.decode(value, { stream: true });
+    const messages = pending.split('\n\n');
+    pending = messages.pop() || '';
+
+    messages.forEach(message => {
+      let event = 'message';
+      const data: string[] = [];
+      message.split('\n').forEach(line => {
+        // Lines starting with a colon are comments, sent to keep the connection alive
+        if (line.startsWith('event:')) {
+          event = line.slice(6).trim();
+        } else if (line.startsWith('data:')) {
+          data.push(line.slice(5).trim());
+        }
+      });
+
+      if (data.length > 0) {
+        onEvent(event, JSON.parse(data.join('\n')));
+      }
+    });
+  }
+}
@@ -11,12 +11,18 @@
  */
 
 import React from 'react';
+import qs from 'querystring';
 import { UIStore } from '../stores/UIStore';
 import { actions } from './Actions';
+import { requestEventStream } from './ApiRequest';
 
 const isBusyStatus = (status?: string) =>
   status === 'REPLICATING' || status === 'FETCHING';
 
+// Larger subscriptions would not fit in the stream URL, they are polled instead.
+// Must not exceed MAX_SUBSCRIBED_DIDS of the did/events handler.
+const MAX_STREAMED_DIDS = 200;
+
 export class PollingRequesterRef {}
 type DIDType = 'file' | 'collection';
 class DIDPollingManager {
@@ -24,6 +30,13 @@ class DIDPollingManager {
     [did: string]: { type: DIDType; refs: PollingRequesterRef[] };
   } = {};
 
+  // Status changes of the polled DIDs are pushed over this stream while it is open
+  private eventStream?: { key: string; controller: AbortController };
+  // Set once the stream failed before delivering anything, e.g. on older servers
+  private eventStreamUnavailable = false;
+  private eventStates: { [did: string]: string } = {};
+  private subscriptionTimeout?: number;
+
   constructor() {
     setInterval(() => {
       this.poll();
@@ -47,6 +60,8 @@ class DIDPollingManager {
       this.fetchDid(did);
     }
 
+    this.scheduleSubscriptionUpdate();
+
     return () => {
       this.disablePolling(did, requesterRef);
     };
@@ -58,19 +73,156 @@ class DIDPollingManager {
         did
       ].refs.filter(r => r !== ref);
     }
+
+    this.scheduleSubscriptionUpdate();
   }
 
-  private poll() {
-    const dids = Object.keys(this.pollingRequesterMap).filter(did => {
+  private stopPolling(did: string) {
+    delete this.pollingRequesterMap[did];
+    delete this.eventStates[did];
+    this.scheduleSubscriptionUpdate();
+  }
+
+  private getPolledDids() {
+    return Object.keys(this.pollingRequesterMap).filter(did => {
       return (
         this.pollingRequesterMap[did] &&
         this.pollingRequesterMap[did].refs.length > 0
       );
     });
+  }
 
-    dids.forEach(did => {
-      this.fetchDid(did);
-    });
+  private scheduleSubscriptionUpdate() {
+    // Coalesce the changes made while rendering into a single new stream
+    window.clearTimeout(this.subscriptionTimeout);
+    this.subscriptionTimeout = window.setTimeout(() => {
+      this.updateSubscription();
+    }, 500);
+  }
+
+  private updateSubscription() {
+    const { activeInstance } = UIStore.getRawState();
+    const dids = this.getPolledDids();
+    const key = activeInstance
+      ? activeInstance.name + '|' + [...dids].sort().join(',')
+      : '';
+
+    if (this.eventStream && this.eventStream.key === key) {
+      return;
+    }
+
+    if (this.eventStream) {
+      this.eventStream.controller.abort();
+      this.eventStream = undefined;
+    }
+
+    if (
+      !activeInstance ||
+      dids.length === 0 ||
+      dids.length > MAX_STREAMED_DIDS ||
+      this.eventStreamUnavailable
+    ) {
+      return;
+    }
+
+    const controller = new AbortController();
+    const eventStream = { key, controller };
+    this.eventStream = eventStream;
+
+    let received = false;
+    const query = { namespace: activeInstance.name, dids: dids.join(',') };
+    requestEventStream(
+      'did/events?' + qs.encode(query),
+      (event, state) => {
+        received = true;
+        if (event === 'status') {
+          this.onStatusEvent(state);
+        }
+      },
+      controller.signal
+    )
+      .catch(() => {
+        if (!received && !controller.signal.aborted) {
+          this.eventStreamUnavailable = true;
+        }
+      })
+      .finally(() => {
+        if (this.eventStream === eventStream) {
+          // Poll until the next interval opens the stream again
+          this.eventStream = undefined;
+          this.pollDids();
+        }
+      });
+  }
+
+  private onStatusEvent(state: { did: string }) {
+    const serializedState = JSON.stringify(state);
+
+    // States are sent again when the subscription changes, only fetch what actually changed
+    if (this.eventStates[state.did] === serializedState) {
+      return;
+    }
+
+    this.eventStates[state.did] = serializedState;
+    if (this.pollingRequesterMap[state.did]) {
+      this.fetchDid(state.did);
+    }
+  }
+
+  private poll() {
+    this.updateSubscription();
+
+    if (!this.eventStream) {
+      this.pollDids();
+    }
+  }
+
+  private pollDids() {
+    const dids = this.getPolledDids();
+
+    const fileDids = dids.filter(
+      did => this.pollingRequesterMap[did].type === 'file'
+    );
+
+    // Resolve all polled files in a single request rather than one per DID
+    if (fileDids.length > 1) {
+      this.fetchFileDids(fileDids);
+    } else {
+      fileDids.forEach(did => {
+        this.fetchDid(did);
+      });
+    }
+
+    dids
+      .filter(did => this.pollingRequesterMap[did].type === 'collection')
+      .forEach(did => {
+        this.fetchDid(did);
+      });
+  }
+
+  private fetchFileDids(dids: string[]) {
+    const { activeInstance } = UIStore.getRawState();
+
+    if (!activeInstance) {
+      return;
+    }
+
+    actions
+      .getFileDIDsDetails(activeInstance.name, dids)
+      .then(didDetails => {
+        didDetails.forEach(details => {
+          if (!isBusyStatus(details.status)) {
+            this.stopPolling(details.did);
+          }
+        });
+      })
+      .catch(e => {
+        // Resolve the DIDs one by one, so that a failing batch does not stall all of them
+        console.log(e);
+        dids
+          .filter(did => this.pollingRequesterMap[did])
+          .forEach(did => this.fetchDid(did));
+      });
   }
 
   private fetchDid(did: string) {
@@ -88,9 +240,10 @@ class DIDPollingManager {
           .getFileDIDDetails(activeInstance.name, did, true)
           .then(details => {
             if (!isBusyStatus(details.status)) {
-              delete this.pollingRequesterMap[did];
+              this.stopPolling(did);
             }
-          });
+          })
+          .catch(e => console.log(e));
         break;
       case 'collection': {
         // Optimistically set FETCHING status if no data exists
@@ -114,9 +267,10 @@ class DIDPollingManager {
           .getCollectionDIDDetails(activeInstance.name, did, true)
           .then(didDetails => {
             if (!didDetails.find(d => isBusyStatus(d.status))) {
-              delete this.pollingRequesterMap[did];
+              this.stopPolling(did);
             }
-          });
+          })
+          .catch(e => console.log(e));
         break;
       }
     }